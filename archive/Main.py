@@ -20,17 +20,23 @@ class DatabaseManager:
         self.cur = None
         
     def connect(self):
-        self.conn = sqlite3.connect(self.db_name)
-        self.cur = self.conn.cursor()
+        #reuse the open connection instead of reconnecting for every batch
+        if self.conn is None:
+            self.conn = sqlite3.connect(self.db_name)
+            self.conn.execute('PRAGMA journal_mode=WAL')
+            self.cur = self.conn.cursor()
+        return self.conn
 
     def close(self):
         if self.conn:
             self.cur.close()
             self.conn.close()
+            self.conn = None
+            self.cur = None
 
     def create_db(self):
-        conn = sqlite3.connect('MajorMap.db')
-        cur = conn.cursor()
+        conn = self.connect()
+        cur = self.cur
 
         #credits can be in different formats such as individual integer or range.
         courses_table = '''
@@ -57,18 +63,16 @@ class DatabaseManager:
             FOREIGN KEY (related_course_id) REFERENCES courses(id)
         );'''
 
-        cur.execute(courses_table)
-        cur.execute(relationships_table)
-        conn.commit()
-        cur.close()
-        conn.close()
+        with conn:
+            cur.execute(courses_table)
+            cur.execute(relationships_table)
 
     def add_courses(self, courses):
-        self.connect()
-        self.cur.executemany('INSERT INTO courses (name, subject, number, credits, description, restrictions) VALUES (?, ?, ?, ?, ?, ?)',
-                        [(course.name, course.subject, course.number, course.credits, course.description, course.restrictions) for course in courses])
-        self.conn.commit()
-        self.close()
+        #one transaction per batch on the shared connection
+        conn = self.connect()
+        with conn:
+            self.cur.executemany('INSERT INTO courses (name, subject, number, credits, description, restrictions) VALUES (?, ?, ?, ?, ?, ?)',
+                            [(course.name, course.subject, course.number, course.credits, course.description, course.restrictions) for course in courses])
 
 '''
 load courses first so that all courses have an id.
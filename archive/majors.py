@@ -1,5 +1,4 @@
 import graphviz
-import CourseManager as cm
 import sqlite3
 
 major = graphviz.Digraph(comment='Major Major')
@@ -135,50 +134,35 @@ python_ds = [
 
 major_courses = mecheng
 
-major_courses_ids = cm.CourseManager.get_ids_list(major_courses)
+#creating nodes from major list, de-duplicated with a set
+node_set = set()
+for course in major_courses:
+    if course not in node_set:
+        major.node(course, course)
+        node_set.add(course)
 
-node_list = []
+#load the prerequisites of every course in the major with one query instead of one per course
 
-#creating nodes from major list and adding to node list
-for course, course_id in zip(major_courses, major_courses_ids):
-    major.node(str(course_id), course)
-    if course_id not in node_list:
-        node_list.append(course_id)
-
-#for each course in major list, get prerequisites and add them to the graph
-
-conn = sqlite3.connect('courses.db')
+conn = sqlite3.connect('../data/MajorMap.db')
 cur = conn.cursor()
-for course_id in major_courses_ids:
-    prereq_id_dict = {}
-
-    find_prereq_query = '''
-                        SELECT relationships.prerequisite,courses.subject,courses.number 
-                        FROM relationships 
-                        LEFT JOIN courses ON relationships.prerequisite = courses.id
-                        WHERE requisite = ?
-                        '''
-    
-    cur.execute(find_prereq_query, (course_id,))
-    prereq_list = cur.fetchall()
-
-    #add pairs to dict
-    for prereq in prereq_list:
-        if prereq is not None:
-            prereq_id = prereq[0]
-            prereq_subject = prereq[1]
-            prereq_number = prereq[2]
-
-            if prereq_subject is not None and prereq_number is not None:
-                prereq_tag = " ".join([prereq_subject, str(prereq_number)])
-                prereq_id_dict[prereq_id] = prereq_tag            
-
-    #go through pairs, add to graph
-    for prereq_id in prereq_id_dict.keys():
-        prereq_tag = prereq_id_dict[prereq_id]
-        if prereq_id not in node_list:
-            major.node(str(prereq_id), prereq_tag)
-        major.edge(str(prereq_id),str(course_id))
+
+cur.execute('CREATE TEMP TABLE major_courses (subject TEXT, number TEXT, PRIMARY KEY (subject, number))')
+cur.executemany('INSERT OR IGNORE INTO major_courses VALUES (?, ?)', [tuple(course.split(' ', 1)) for course in major_courses])
+
+find_prereq_query = '''
+                    SELECT DISTINCT courses.subject || ' ' || courses.number, relationships.related_code
+                    FROM major_courses
+                    JOIN courses ON courses.subject = major_courses.subject AND courses.number = major_courses.number
+                    JOIN relationships ON relationships.target_course_id = courses.id
+                    WHERE relationships.type = 'prerequisite'
+                    '''
+
+#go through pairs, add to graph
+for course, prereq_tag in cur.execute(find_prereq_query):
+    if prereq_tag not in node_set:
+        major.node(prereq_tag, prereq_tag)
+        node_set.add(prereq_tag)
+    major.edge(prereq_tag, course)
 
 
 cur.close()
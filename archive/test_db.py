@@ -2,20 +2,20 @@ import sqlite3
 
 def test_prereq(subject, number):
 
-    conn = sqlite3.connect('courses.db')
+    conn = sqlite3.connect('../data/MajorMap.db')
     cur = conn.cursor()
 
+    # (subject, number) and (target_course_id, type) are both indexed, so this is two point lookups
     find_prereq_query = '''
                                 select 
-                                    courses.subject || ' ' || courses.number as course_tag
+                                    relationships.related_code as course_tag
                                 from
-                                    relationships
-                                left join
-                                    courses on relationships.prerequisite = courses.id
+                                    courses
+                                join
+                                    relationships on relationships.target_course_id = courses.id
                                 where
-                                    requisite = (
-                                        select id from courses where subject = ? and number = ?
-                                    )
+                                    courses.subject = ? and courses.number = ?
+                                    and relationships.type = 'prerequisite'
                                 '''
 
     cur.execute(find_prereq_query, (subject, number))
@@ -659,23 +659,27 @@ function visualizeMajor(majorId) {
     // Calculate prerequisite levels for each course
     function calculatePrereqLevels(courseIds) {
         const levels = new Map();
+        const inMajor = new Set(courseIds);
         
         // Initialize all courses to level 0
         courseIds.forEach(id => levels.set(id, 0));
         
+        // Only edges between two courses of this major matter; filter them once
+        const edges = prerequisites.filter(prereq =>
+            inMajor.has(prereq.course_id) && inMajor.has(prereq.prerequisite_id));
+        
         // Repeatedly update levels until no changes are made
         let changed = true;
-        while (changed) {
+        let rounds = 0;
+        while (changed && rounds <= courseIds.length) {
             changed = false;
-            prerequisites.forEach(prereq => {
-                if (courseIds.includes(prereq.course_id) && courseIds.includes(prereq.prerequisite_id)) {
-                    const currentLevel = levels.get(prereq.course_id);
-                    const prereqLevel = levels.get(prereq.prerequisite_id);
-                    const newLevel = prereqLevel + 1;
-                    if (currentLevel < newLevel) {
-                        levels.set(prereq.course_id, newLevel);
-                        changed = true;
-                    }
+            rounds++;
+            edges.forEach(prereq => {
+                const currentLevel = levels.get(prereq.course_id);
+                const newLevel = levels.get(prereq.prerequisite_id) + 1;
+                if (currentLevel < newLevel) {
+                    levels.set(prereq.course_id, newLevel);
+                    changed = true;
                 }
             });
         }
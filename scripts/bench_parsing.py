@@ -0,0 +1,74 @@
+import argparse
+import glob
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from bs4 import BeautifulSoup
+from html_parsing import parse_course_cells
+from scrape_courses import parse_page
+
+# Compares the original full html.parser tree against the lxml + SoupStrainer backend
+# on saved catalog pages (page_<n>.html, as served by catalog_stub_server.py).
+#
+# With --processes, also times full course extraction (scrape_courses.parse_page) in one
+# process against a pool of 1..N worker processes.
+#
+#   python scripts/bench_parsing.py --pages saved_pages --repeat 5
+#   python scripts/bench_parsing.py --pages saved_pages --processes 8
+
+def parse_full_tree(html):
+    soup = BeautifulSoup(html, 'html.parser')
+    return soup.find_all('td', class_='width')
+
+def time_backend(name, parse, pages, repeat):
+    best = None
+    cells = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        cells = sum(len(parse(html)) for html in pages)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    print(f"{name:<28} {best * 1000:9.1f} ms  {cells} course cells")
+    return best
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark catalog page parsing backends")
+    parser.add_argument('--pages', default='saved_pages', help="directory containing page_<n>.html files")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--processes', type=int, help="also time extraction in up to this many worker processes")
+    args = parser.parse_args()
+
+    pages = []
+    for path in sorted(glob.glob(os.path.join(args.pages, 'page_*.html'))):
+        with open(path, encoding='utf-8') as f:
+            pages.append(f.read())
+    print(f"Parsing {len(pages)} pages, best of {args.repeat}")
+
+    baseline = time_backend('html.parser (full tree)', parse_full_tree, pages, args.repeat)
+    strained = time_backend('html.parser + SoupStrainer', lambda html: parse_course_cells(html, 'html.parser'), pages, args.repeat)
+    fast = time_backend('lxml + SoupStrainer', lambda html: parse_course_cells(html, 'lxml'), pages, args.repeat)
+
+    # The extracted cells must be identical whichever backend produced them
+    for html in pages:
+        expected = [cell.get_text() for cell in parse_full_tree(html)]
+        if [cell.get_text() for cell in parse_course_cells(html, 'lxml')] != expected:
+            print("WARNING: lxml backend extracted different course text")
+            break
+
+    print(f"Speedup: {baseline / strained:.1f}x strained, {baseline / fast:.1f}x lxml")
+
+    if args.processes:
+        serial = time_backend('extraction, main process', parse_page, pages, args.repeat)
+        workers = 1
+        while workers <= args.processes:
+            with ProcessPoolExecutor(workers) as pool:
+                # The first map starts the workers, so it is not timed
+                list(pool.map(parse_page, pages[:workers]))
+                best = None
+                for _ in range(args.repeat):
+                    start = time.perf_counter()
+                    list(pool.map(parse_page, pages))
+                    elapsed = time.perf_counter() - start
+                    best = elapsed if best is None else min(best, elapsed)
+            print(f"extraction, {workers:>2} processes   {best * 1000:9.1f} ms  {serial / best:.1f}x")
+            workers *= 2
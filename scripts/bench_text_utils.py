@@ -0,0 +1,63 @@
+import argparse
+import glob
+import os
+import re
+import timeit
+from html_parsing import parse_course_cells
+from text_utils import clean_course_text, clean_text, extract_course_codes
+
+# Micro-benchmarks for the shared text helpers over real catalog text.
+# The corpus is every text fragment inside the course cells of saved catalog pages.
+#
+#   python scripts/bench_text_utils.py --pages saved_pages
+
+# Previous per-scraper implementations, kept here only for comparison
+def legacy_clean_course_text(text):
+    text = re.sub(r'<[^>]+>', '', text)
+    text = text.replace('&amp;', '&')
+    text = text.replace('&nbsp;', ' ')
+    text = re.sub(r'\s*Schedule of Classes\s*', '', text)
+    text = re.sub(r'\([^)]*\)', '', text)
+    return text.strip()
+
+def legacy_clean_text(text):
+    text = re.sub(r'<[^>]+>', '', text)
+    text = text.replace('&amp;', '&')
+    text = text.replace('&nbsp;', ' ')
+    return text.strip()
+
+def legacy_extract_course_codes(text):
+    course_pattern = r'[A-Z]{4}\s+\d{4}L?'
+    return re.findall(course_pattern, text)
+
+def load_corpus(pages_dir):
+    corpus = []
+    for path in sorted(glob.glob(os.path.join(pages_dir, 'page_*.html'))):
+        with open(path, encoding='utf-8') as f:
+            for cell in parse_course_cells(f.read()):
+                corpus.extend(str(fragment) for fragment in cell.find_all(string=True))
+    return corpus
+
+def bench(name, func, corpus, number):
+    seconds = min(timeit.repeat(lambda: [func(text) for text in corpus], number=number, repeat=3)) / number
+    print(f"{name:<32} {seconds * 1000:8.2f} ms per pass")
+    return seconds
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark text normalization helpers")
+    parser.add_argument('--pages', default='saved_pages', help="directory containing page_<n>.html files")
+    parser.add_argument('--number', type=int, default=5)
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.pages)
+    print(f"Corpus: {len(corpus)} text fragments")
+
+    pairs = [
+        ('clean_course_text', legacy_clean_course_text, clean_course_text),
+        ('clean_text', legacy_clean_text, clean_text),
+        ('extract_course_codes', legacy_extract_course_codes, extract_course_codes),
+    ]
+    for name, legacy, current in pairs:
+        before = bench(f'{name} (legacy)', legacy, corpus, args.number)
+        after = bench(name, current, corpus, args.number)
+        print(f"{'':<32} {before / after:8.2f}x")
@@ -0,0 +1,393 @@
+import argparse
+import contextlib
+import functools
+import os
+import sqlite3
+import threading
+from catalog_files import COURSE_CODE_SQL, REQUIREMENT_CSVS
+from csv_sink import CsvSink
+from requirements_parser import parse_requirement
+
+DEFAULT_DB_PATH = 'data/MajorMap.db'
+
+# Groups of CSVs export_csvs can write, each with the table that holds its rows
+EXPORT_TABLES = {'courses': 'courses', 'majors': 'major_categories'}
+
+SCHEMA = '''
+-- credits can be in different formats such as individual integer or range.
+CREATE TABLE IF NOT EXISTS courses (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    subject TEXT NOT NULL,
+    number TEXT NOT NULL,
+    credits TEXT,
+    description TEXT,
+    restrictions TEXT
+);
+-- (subject, number) is the natural key courses are upserted by; older stores had a plain index on it
+DROP INDEX IF EXISTS idx_courses_subject_number;
+CREATE UNIQUE INDEX IF NOT EXISTS idx_courses_code ON courses (subject, number);
+
+-- type is "prerequisite", "corequisite" or "pre_or_corequisite".
+-- related_course_id is NULL when the required course is not in the catalog; related_code always holds it.
+-- choice_group is NULL for hard requirements; courses sharing a choice_group are alternatives.
+CREATE TABLE IF NOT EXISTS relationships (
+    id INTEGER PRIMARY KEY,
+    target_course_id INTEGER NOT NULL,
+    related_course_id INTEGER,
+    related_code TEXT NOT NULL,
+    type TEXT NOT NULL,
+    choice_group INTEGER,
+    FOREIGN KEY (target_course_id) REFERENCES courses(id),
+    FOREIGN KEY (related_course_id) REFERENCES courses(id)
+);
+CREATE INDEX IF NOT EXISTS idx_relationships_target_type ON relationships (target_course_id, type);
+CREATE INDEX IF NOT EXISTS idx_relationships_related ON relationships (related_course_id);
+
+-- Structured requirement expressions, see requirements_parser.py
+CREATE TABLE IF NOT EXISTS requirements (
+    id INTEGER PRIMARY KEY,
+    target_course_id INTEGER NOT NULL,
+    type TEXT NOT NULL,
+    text TEXT,
+    expression TEXT NOT NULL,
+    FOREIGN KEY (target_course_id) REFERENCES courses(id)
+);
+CREATE INDEX IF NOT EXISTS idx_requirements_target_type ON requirements (target_course_id, type);
+
+CREATE TABLE IF NOT EXISTS major_categories (
+    id INTEGER PRIMARY KEY,
+    major TEXT NOT NULL,
+    name TEXT NOT NULL,
+    credits INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_major_categories_major ON major_categories (major);
+
+CREATE TABLE IF NOT EXISTS category_courses (
+    id INTEGER PRIMARY KEY,
+    category_id INTEGER NOT NULL,
+    course_code TEXT NOT NULL,
+    FOREIGN KEY (category_id) REFERENCES major_categories(id)
+);
+CREATE INDEX IF NOT EXISTS idx_category_courses_category ON category_courses (category_id);
+CREATE INDEX IF NOT EXISTS idx_category_courses_course ON category_courses (course_code);
+'''
+
+def choice_groups(tree):
+    # Maps each course inside a top-level alternative to the index of that alternative, e.g.
+    # "A & (B | C) & (D | E)" gives {B: 0, C: 0, D: 1, E: 1}; A is a hard requirement
+    groups = {}
+    if tree is None:
+        return groups
+    terms = tree[1] if tree[0] == 'and' else (tree,)
+    group = 0
+    for term in terms:
+        if term[0] != 'or':
+            continue
+        stack = [term]
+        while stack:
+            node = stack.pop()
+            if node[0] == 'course':
+                groups.setdefault(node[1], group)
+            elif node[0] in ('and', 'or'):
+                stack.extend(node[1])
+        group += 1
+    return groups
+
+@functools.lru_cache(maxsize=None)
+def upsert_sql(table, columns, key_columns):
+    # Built once per shape so sqlite3's statement cache sees the identical SQL string every time
+    placeholders = ', '.join('?' for _ in columns)
+    updates = ', '.join(f'{column} = excluded.{column}' for column in columns if column not in key_columns)
+    return (f'INSERT INTO {table} ({", ".join(columns)}) VALUES ({placeholders}) '
+            f'ON CONFLICT ({", ".join(key_columns)}) DO UPDATE SET {updates}')
+
+class DatabaseManager:
+    # sqlite3 connections cannot be shared between threads, so every thread gets its own
+    # connection on first use and keeps reusing it (and its prepared-statement cache).
+    # Writes go through transaction(), which queues writers on an in-process lock and takes
+    # the database write lock up front with BEGIN IMMEDIATE, so concurrent scraper workers
+    # never fail with "database is locked" halfway through a batch. In WAL mode readers
+    # are never blocked by the writer.
+
+    def __init__(self, db_name=DEFAULT_DB_PATH, cached_statements=256, timeout=30.0):
+        self.db_name = db_name
+        self.cached_statements = cached_statements
+        self.timeout = timeout
+        self._local = threading.local()
+        self._connections = []
+        self._connections_lock = threading.Lock()
+        self._write_lock = threading.RLock()
+
+    def connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            os.makedirs(os.path.dirname(self.db_name) or '.', exist_ok=True)
+            # isolation_level=None leaves transaction control to transaction()
+            conn = sqlite3.connect(self.db_name, timeout=self.timeout, isolation_level=None,
+                                   cached_statements=self.cached_statements, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute('PRAGMA foreign_keys=ON')
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+
+    @property
+    def conn(self):
+        return self.connect()
+
+    def close(self):
+        with self._connections_lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections = []
+        self._local = threading.local()
+
+    @contextlib.contextmanager
+    def transaction(self):
+        conn = self.connect()
+        with self._write_lock:
+            if conn.in_transaction:
+                # Nested use joins the enclosing transaction
+                yield conn
+                return
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                yield conn
+            except BaseException:
+                conn.execute('ROLLBACK')
+                raise
+            conn.execute('COMMIT')
+
+    @contextlib.contextmanager
+    def bulk_load(self):
+        # Ingest runs as one transaction without fsyncs; the store is rebuilt from the
+        # scrapers if the machine dies mid-load, so durability is not worth the cost here
+        conn = self.connect()
+        conn.execute('PRAGMA synchronous=OFF')
+        try:
+            with self.transaction() as conn:
+                yield conn
+        finally:
+            conn.execute('PRAGMA synchronous=NORMAL')
+
+    def create_db(self):
+        with self._write_lock:
+            self.connect().executescript(SCHEMA)
+
+    def upsert(self, table, columns, rows, key_columns=('id',)):
+        # Bulk insert-or-update through a single prepared statement; key_columns must be the
+        # primary key or carry a unique index, like courses' (subject, number)
+        sql = upsert_sql(table, tuple(columns), tuple(key_columns))
+        with self.transaction() as conn:
+            conn.executemany(sql, rows)
+
+    def get_requirements(self, subject, number, requirement_type='prerequisite'):
+        # Indexed point query: (subject, number) -> course id -> (target_course_id, type)
+        query = '''
+            SELECT relationships.related_code, relationships.choice_group
+            FROM courses
+            JOIN relationships ON relationships.target_course_id = courses.id
+            WHERE courses.subject = ? AND courses.number = ? AND relationships.type = ?
+            ORDER BY relationships.id
+        '''
+        return self.connect().execute(query, (subject, number, requirement_type)).fetchall()
+
+    def get_expression(self, subject, number, requirement_type='prerequisite'):
+        query = '''
+            SELECT requirements.expression
+            FROM courses
+            JOIN requirements ON requirements.target_course_id = courses.id
+            WHERE courses.subject = ? AND courses.number = ? AND requirements.type = ?
+        '''
+        row = self.connect().execute(query, (subject, number, requirement_type)).fetchone()
+        return row[0] if row else None
+
+    def export_csvs(self, output_dir=None, tables=None):
+        # Rewrites the flat CSVs that server.js and the frontend read from the store, by default
+        # next to the database. tables picks from EXPORT_TABLES; by default every group with rows
+        # is written, so a store that only holds courses leaves the major CSVs alone.
+        output_dir = output_dir or os.path.dirname(self.db_name) or '.'
+        os.makedirs(output_dir, exist_ok=True)
+        conn = self.connect()
+        if tables is None:
+            tables = [name for name, table in EXPORT_TABLES.items()
+                      if conn.execute(f'SELECT EXISTS (SELECT 1 FROM {table})').fetchone()[0]]
+
+        def output_path(filename):
+            return os.path.join(output_dir, filename)
+
+        if 'courses' in tables:
+            with CsvSink(output_path('courses.csv'), ['Name', 'Subject', 'Number', 'Credits', 'Description', 'Restrictions']) as sink:
+                sink.writerows(conn.execute('SELECT name, subject, number, credits, description, restrictions '
+                                            'FROM courses ORDER BY id'))
+
+            for requirement_type, filename in REQUIREMENT_CSVS:
+                with CsvSink(output_path(filename), ['Course ID', 'Required Course']) as sink:
+                    sink.writerows(conn.execute(f'''
+                        SELECT {COURSE_CODE_SQL}, relationships.related_code
+                        FROM relationships JOIN courses ON relationships.target_course_id = courses.id
+                        WHERE relationships.type = ? ORDER BY relationships.id
+                    ''', (requirement_type,)))
+
+            with CsvSink(output_path('requirements.csv'), ['Course ID', 'Type', 'Text', 'Expression']) as sink:
+                sink.writerows(conn.execute(f'''
+                    SELECT {COURSE_CODE_SQL}, requirements.type, requirements.text, requirements.expression
+                    FROM requirements JOIN courses ON requirements.target_course_id = courses.id
+                    ORDER BY courses.id, requirements.id
+                '''))
+
+        if 'majors' in tables:
+            with CsvSink(output_path('major_categories.csv'), ['Major', 'Category ID', 'Category Name', 'Credit Hours']) as sink:
+                sink.writerows(conn.execute('SELECT major, id, name, credits FROM major_categories ORDER BY id'))
+
+            with CsvSink(output_path('category_courses.csv'), ['Category ID', 'Course']) as sink:
+                sink.writerows(conn.execute('SELECT category_id, course_code FROM category_courses ORDER BY id'))
+        return tables
+
+# Records buffered by CourseStoreSink between executemany flushes
+STORE_BATCH_SIZE = 500
+COURSE_COLUMNS = ('id', 'name', 'subject', 'number', 'credits', 'description', 'restrictions')
+
+class CourseStoreSink:
+    # Streams course records into the store inside one bulk-load transaction. Courses are upserted
+    # by (subject, number), so a course keeps its row id across loads; courses the new catalog no
+    # longer lists, and all requirement rows of the previous load, are gone on commit.
+    # Rows are buffered and written with one executemany per table every batch_size records.
+    # A required course is linked to the first course with its code; codes that only appear
+    # further down the catalog are linked when the stream ends.
+
+    def __init__(self, db, batch_size=STORE_BATCH_SIZE):
+        self.db = db
+        self.batch_size = batch_size
+        self.count = 0
+        self.course_ids = {}
+        self.unresolved = []
+        self.next_group = 1
+        self.courses = []
+        self.requirements = []
+        self.relationships = []
+
+    def __enter__(self):
+        self.db.create_db()
+        self.load = self.db.bulk_load()
+        self.conn = self.load.__enter__()
+        self.conn.execute('DELETE FROM relationships')
+        self.conn.execute('DELETE FROM requirements')
+        self.row_ids = {(subject, number): row_id
+                        for subject, number, row_id in self.conn.execute('SELECT subject, number, id FROM courses')}
+        self.stale = set(self.row_ids.values())
+        self.next_row_id = max(self.stale, default=0) + 1
+        # Relationships get their ids here, so unresolved ones can be updated by id at the end
+        self.next_relationship_id = 1
+        return self
+
+    def row_id(self, subject, number):
+        row_id = self.row_ids.get((subject, number))
+        if row_id is None:
+            row_id = self.row_ids[(subject, number)] = self.next_row_id
+            self.next_row_id += 1
+        self.stale.discard(row_id)
+        return row_id
+
+    def write(self, record):
+        self.count += 1
+        row_id = self.row_id(record.course[1], record.course[2])
+        self.courses.append([row_id] + list(record.course))
+        self.course_ids.setdefault(record.course_id, row_id)
+
+        trees = {}
+        for _, requirement_type, text, expression in record.requirements:
+            self.requirements.append((row_id, requirement_type, text, expression))
+            trees[requirement_type] = parse_requirement(expression)
+
+        requirement_rows = (record.prerequisites, record.corequisites, record.pre_or_corequisites)
+        for (requirement_type, _), rows in zip(REQUIREMENT_CSVS, requirement_rows):
+            # Alternatives in the structured expression become choice groups
+            groups = choice_groups(trees.get(requirement_type))
+            for _, related_code in rows:
+                group = groups.get(related_code)
+                related_id = self.course_ids.get(related_code)
+                relationship_id = self.next_relationship_id
+                self.next_relationship_id += 1
+                self.relationships.append((relationship_id, row_id, related_id, related_code, requirement_type,
+                                           None if group is None else self.next_group + group))
+                if related_id is None:
+                    self.unresolved.append((relationship_id, related_code))
+            if groups:
+                self.next_group += max(groups.values()) + 1
+
+        if self.count % self.batch_size == 0:
+            self.flush()
+
+    def flush(self):
+        # Courses first: requirement and relationship rows reference them
+        self.db.upsert('courses', COURSE_COLUMNS, self.courses, key_columns=('subject', 'number'))
+        self.conn.executemany('INSERT INTO requirements (target_course_id, type, text, expression) VALUES (?, ?, ?, ?)',
+                              self.requirements)
+        self.conn.executemany(
+            'INSERT INTO relationships (id, target_course_id, related_course_id, related_code, type, choice_group) '
+            'VALUES (?, ?, ?, ?, ?, ?)', self.relationships)
+        self.courses = []
+        self.requirements = []
+        self.relationships = []
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.flush()
+            self.conn.executemany('DELETE FROM courses WHERE id = ?', [(row_id,) for row_id in self.stale])
+            self.conn.executemany('UPDATE relationships SET related_course_id = ? WHERE id = ?',
+                                  [(self.course_ids[code], relationship_id) for relationship_id, code in self.unresolved
+                                   if code in self.course_ids])
+        return self.load.__exit__(exc_type, exc, tb)
+
+class MajorStoreSink:
+    # Streams major categories into the store inside one bulk-load transaction
+
+    def __init__(self, db):
+        self.db = db
+        self.count = 0
+
+    def __enter__(self):
+        self.db.create_db()
+        self.load = self.db.bulk_load()
+        self.conn = self.load.__enter__()
+        self.conn.execute('DELETE FROM category_courses')
+        self.conn.execute('DELETE FROM major_categories')
+        return self
+
+    def write(self, record):
+        self.count += 1
+        self.conn.execute('INSERT INTO major_categories (major, id, name, credits) VALUES (?, ?, ?, ?)',
+                          (record.major, record.category_id, record.name, record.credits))
+        self.conn.executemany('INSERT INTO category_courses (category_id, course_code) VALUES (?, ?)',
+                              [(record.category_id, course) for course in record.courses])
+
+    def __exit__(self, exc_type, exc, tb):
+        return self.load.__exit__(exc_type, exc, tb)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Query or export the SQLite catalog store")
+    parser.add_argument('--db', default=DEFAULT_DB_PATH)
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    export = subparsers.add_parser('export', help="rewrite the flat CSVs from the store")
+    export.add_argument('--output-dir', help="directory of the CSVs (default: the database's directory)")
+    export.add_argument('--only', nargs='+', choices=list(EXPORT_TABLES),
+                        help="CSV groups to write (default: every group the store has rows for)")
+    lookup = subparsers.add_parser('requirements', help="list a course's requirements")
+    lookup.add_argument('subject')
+    lookup.add_argument('number')
+    lookup.add_argument('--type', default='prerequisite', choices=[t for t, _ in REQUIREMENT_CSVS])
+    args = parser.parse_args()
+
+    db = DatabaseManager(args.db)
+    if args.command == 'export':
+        tables = db.export_csvs(args.output_dir, args.only)
+        print(f"Exported {', '.join(tables) or 'nothing'}")
+    else:
+        print(db.get_expression(args.subject, args.number, args.type))
+        for related_code, choice_group in db.get_requirements(args.subject, args.number, args.type):
+            print(related_code if choice_group is None else f"{related_code} (choice group {choice_group})")
+    db.close()
@@ -0,0 +1,48 @@
+import contextlib
+import os
+import uuid
+
+# Names and helpers shared by the scripts that read and write the catalog files in data/.
+#
+# Every output is written through atomic_write (or, for files kept open across calls, to a
+# temp_path that replaces the target at the end), so readers such as server.js and the
+# frontend never see a half-written file. Temp names are unique per write: fetch threads and
+# catalog worker processes may write the same file at the same time.
+
+# Requirement type and the scraper CSV listing its edges (Course ID, Required Course)
+REQUIREMENT_CSVS = [
+    ('prerequisite', 'prerequisites.csv'),
+    ('corequisite', 'corequisites.csv'),
+    ('pre_or_corequisite', 'pre_or_corequisites.csv'),
+]
+REQUIREMENT_TYPES = [requirement_type for requirement_type, _ in REQUIREMENT_CSVS]
+REQUIREMENT_FILES = [filename for _, filename in REQUIREMENT_CSVS]
+
+# Course code as written in the CSVs: "SUBJ 1234", or just the subject when there is no number
+COURSE_CODE_SQL = "CASE WHEN courses.number = '' THEN courses.subject ELSE courses.subject || ' ' || courses.number END"
+
+def course_code(subject, number):
+    return f"{subject} {number}" if number else subject
+
+def row_course_code(row):
+    # Course code of a csv.DictReader row of courses.csv
+    return course_code(row['Subject'], row['Number'])
+
+def temp_path(path):
+    return f'{path}.{uuid.uuid4().hex}.tmp'
+
+@contextlib.contextmanager
+def atomic_write(path, mode='w', **kwargs):
+    # Yields an open file that replaces path when the block finishes; on an exception the
+    # previous file is left alone
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    if 'b' not in mode:
+        kwargs.setdefault('encoding', 'utf-8')
+    tmp_path = temp_path(path)
+    try:
+        with open(tmp_path, mode, **kwargs) as f:
+            yield f
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
@@ -0,0 +1,141 @@
+import argparse
+import collections
+import contextlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from urllib.parse import urlsplit
+from course_ids import DEFAULT_IDS_FILE
+from fetch import DEFAULT_WORKERS, replay_dead_letters, share_hosts
+from html_parsing import DEFAULT_PARSER, PARSERS
+from http_cache import DEFAULT_CACHE_DIR, HttpCache
+from scrape_courses import CATALOG_BASE_URL, DEFAULT_CATALOG_ID, DEFAULT_NAVOID, scrape_courses_to_csv
+from scrape_majors import scrape_majors
+
+# Scrapes several catalogs (institutions, or catalog years of one institution) side by side,
+# so students on older requirements keep the catalog they entered under.
+#
+# Every catalog in the config runs in its own worker process and writes the same files the
+# single-catalog scrapers write to data/, under <output_root>/<name>/<term>/, plus the log of
+# its run in scrape.log. All catalogs share one course ID dictionary, <output_root>/course_ids.csv,
+# so an integer course ID means the same course in every catalog year. Page counts are read from
+# each catalog's first listing page unless the config gives them. The HTTP cache directory is
+# shared; its writes are atomic. Processes scraping the same host split its rate limit and
+# concurrency between them, so the host sees the load of one scraper.
+#
+# The config is JSON:
+#   {
+#     "output_root": "data/catalogs",
+#     "catalogs": [
+#       {"name": "charlotte", "term": "2024-2025", "catalog_id": 38, "navoid": 4596,
+#        "base_url": "https://catalog.charlotte.edu", "majors_url": "https://..."}
+#     ]
+#   }
+# name, term and majors_url, the page listing that catalog year's programs, are required
+# ("majors_url": null skips the majors); the rest default to the single-catalog scrapers' values.
+# Only program links into the catalog's own catalog_id (catoid) are followed from the majors
+# page, and only to base_url's host when it is given, so a catalog year never picks up another
+# year's programs.
+#
+#   python scripts/catalog_pipeline.py scripts/catalogs.json --processes 4
+#   python scripts/catalog_pipeline.py scripts/catalogs.json --only charlotte/2024-2025
+
+DEFAULT_OUTPUT_ROOT = 'data/catalogs'
+
+def load_config(path):
+    with open(path, encoding='utf-8') as f:
+        config = json.load(f)
+    seen = set()
+    for catalog in config['catalogs']:
+        if 'name' not in catalog or 'term' not in catalog:
+            raise SystemExit(f"{path}: every catalog needs a name and a term")
+        key = catalog_key(catalog)
+        if 'majors_url' not in catalog:
+            raise SystemExit(f"{path}: {key} needs a majors_url listing its programs, or null to skip the majors")
+        if key in seen:
+            raise SystemExit(f"{path}: {key} is listed twice")
+        seen.add(key)
+    return config
+
+def catalog_key(catalog):
+    return f"{catalog['name']}/{catalog['term']}"
+
+def catalog_output_dir(output_root, catalog):
+    return os.path.join(output_root, str(catalog['name']), str(catalog['term']))
+
+def host_shares(catalogs, processes):
+    # {host: how many worker processes can be scraping it at once}
+    counts = collections.Counter()
+    for catalog in catalogs:
+        urls = [catalog.get('base_url', CATALOG_BASE_URL), catalog.get('majors_url')]
+        counts.update({urlsplit(url).netloc for url in urls if url})
+    return {host: min(count, processes) for host, count in counts.items()}
+
+def run_catalog(catalog, output_root, cache_dir=DEFAULT_CACHE_DIR, offline=False, workers=DEFAULT_WORKERS,
+                parser=DEFAULT_PARSER, incremental=False, replay=False):
+    # Runs in a worker process; returns (catalog key, output dir, seconds)
+    output_dir = catalog_output_dir(output_root, catalog)
+    course_ids_path = os.path.join(output_root, DEFAULT_IDS_FILE)
+    os.makedirs(output_dir, exist_ok=True)
+    cache = HttpCache(cache_dir, offline=offline) if cache_dir else None
+    start = time.perf_counter()
+
+    with open(os.path.join(output_dir, 'scrape.log'), 'w', encoding='utf-8') as log, contextlib.redirect_stdout(log):
+        if replay:
+            replay_dead_letters(os.path.join(output_dir, 'courses_dead_letters.json'), cache)
+            replay_dead_letters(os.path.join(output_dir, 'majors_dead_letters.json'), cache)
+        scrape_courses_to_csv(workers, catalog.get('base_url', CATALOG_BASE_URL), cache, parser, incremental,
+                              catalog.get('db'), catalog.get('catalog_id', DEFAULT_CATALOG_ID),
+                              catalog.get('navoid', DEFAULT_NAVOID), catalog.get('pages'), output_dir,
+                              course_ids_path=course_ids_path)
+        if catalog['majors_url']:
+            scrape_majors(cache, parser, incremental, catalog.get('db'), catalog['majors_url'], output_dir,
+                          workers=workers, course_ids_path=course_ids_path, catalog_url=catalog.get('base_url'),
+                          catalog_id=catalog.get('catalog_id', DEFAULT_CATALOG_ID))
+
+    return catalog_key(catalog), output_dir, time.perf_counter() - start
+
+def run_pipeline(config, processes=None, only=None, **options):
+    # Scrapes every configured catalog (or those keyed in `only`); returns the keys that failed
+    output_root = config.get('output_root', DEFAULT_OUTPUT_ROOT)
+    catalogs = [catalog for catalog in config['catalogs'] if not only or catalog_key(catalog) in only]
+    failed = []
+
+    processes = processes or min(len(catalogs), os.cpu_count()) or 1
+    with ProcessPoolExecutor(max_workers=processes, initializer=share_hosts,
+                             initargs=(host_shares(catalogs, processes),)) as pool:
+        futures = {pool.submit(run_catalog, catalog, output_root, **options): catalog_key(catalog)
+                   for catalog in catalogs}
+        for future in as_completed(futures):
+            try:
+                key, output_dir, elapsed = future.result()
+                print(f"{key}: done in {elapsed:.1f} s -> {output_dir}")
+            except Exception as e:
+                print(f"{futures[future]}: failed: {e}")
+                failed.append(futures[future])
+    return failed
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Scrape several catalogs in parallel into partitioned directories")
+    parser.add_argument('config', help="JSON file listing the catalogs")
+    parser.add_argument('--processes', type=int, help="catalogs scraped at once (default: one per catalog, up to the cores)")
+    parser.add_argument('--only', nargs='+', metavar='NAME/TERM', help="scrape just these catalogs")
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS,
+                        help="pages fetched concurrently per catalog; catalogs on one host share this many")
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR, help="on-disk HTTP cache directory")
+    parser.add_argument('--no-cache', action='store_true', help="always download pages from scratch")
+    parser.add_argument('--offline', action='store_true', help="replay cached pages without touching the network")
+    parser.add_argument('--parser', choices=PARSERS, default=DEFAULT_PARSER, help="BeautifulSoup parser backend")
+    parser.add_argument('--incremental', action='store_true', help="only re-extract blocks whose content changed")
+    parser.add_argument('--replay', action='store_true', help="retry the pages the last runs failed on before scraping")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    failed = run_pipeline(load_config(args.config), args.processes, args.only,
+                          cache_dir=None if args.no_cache else args.cache_dir, offline=args.offline,
+                          workers=args.workers, parser=args.parser, incremental=args.incremental,
+                          replay=args.replay)
+    print(f"Finished in {time.perf_counter() - start:.1f} s" + (f"; failed: {', '.join(failed)}" if failed else ""))
+    if failed:
+        raise SystemExit(1)
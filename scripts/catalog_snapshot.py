@@ -0,0 +1,263 @@
+import argparse
+import csv
+import json
+import mmap
+import os
+import sys
+import time
+from array import array
+from catalog_files import REQUIREMENT_FILES, REQUIREMENT_TYPES, atomic_write, course_code
+from course_ids import DEFAULT_IDS_FILE, shared_course_ids
+from text_utils import CREDIT_VALUE_PATTERN
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Binary snapshot of a scraped catalog, written at the end of every scrape. Readers map it
+# instead of parsing the CSVs: opening it costs a header read, every array is a zero-copy
+# NumPy view of the mapping, and processes that map the same file share one page-cached copy.
+#
+# Layout (little-endian):
+#   8 bytes   MAGIC
+#   uint32    format version
+#   uint32    header length H
+#   H bytes   JSON header {"arrays": {name: [dtype, offset, count]}, "counts": {...}}
+#   arrays    each at a 64-byte aligned offset from the start of the file
+#
+# Arrays, with course IDs from the course_ids.py dictionary:
+#   code_offsets              course code of every ID, as offsets into heap (IDs + 1)
+#   course_row                row of each ID in the course columns, -1 if not in this catalog
+#   course_id                 ID of each course row
+#   <field>_offsets           name, subject, number, credits, description, restrictions per row
+#   credit_value              first number of the credits text, NaN if none
+#   <type>_offsets/_targets   CSR requirement edges by course ID, for prerequisite, corequisite
+#                             and pre_or_corequisite
+#   category_number, category_major, category_credits, category_name_offsets, major_name_offsets
+#   category_offsets/_courses CSR course IDs of every category
+#   heap                      UTF-8 bytes of every string
+#
+#   python scripts/catalog_snapshot.py build --data-dir data
+#   python scripts/catalog_snapshot.py show "ITSC 2214"
+
+MAGIC = b'MMSNAP\0\0'
+SNAPSHOT_VERSION = 1
+DEFAULT_SNAPSHOT_FILE = 'catalog.snapshot'
+ALIGNMENT = 64
+COURSE_FIELDS = ['name', 'subject', 'number', 'credits', 'description', 'restrictions']
+
+# array typecode -> NumPy dtype of the same width
+DTYPES = {'b': '<i1', 'B': '<u1', 'i': '<i4', 'q': '<i8', 'f': '<f4'}
+
+def read_rows(path):
+    if not os.path.exists(path):
+        return []
+    with open(path, newline='', encoding='utf-8') as f:
+        reader = csv.reader(f)
+        next(reader, None)
+        return [row for row in reader]
+
+class StringHeap:
+    def __init__(self):
+        self.data = bytearray()
+
+    def column(self, strings):
+        # Offsets of the strings, appended back to back (len + 1 entries)
+        offsets = array('q', [len(self.data)])
+        for text in strings:
+            self.data += (text or '').encode('utf-8')
+            offsets.append(len(self.data))
+        return offsets
+
+def csr(n, pairs):
+    # pairs of (row, value) -> offsets (n + 1) and values, in input order within each row
+    counts = [0] * (n + 1)
+    for row, _ in pairs:
+        counts[row + 1] += 1
+    for i in range(n):
+        counts[i + 1] += counts[i]
+    values = array('i', bytes(4 * len(pairs)))
+    fill = counts[:-1]
+    for row, value in pairs:
+        values[fill[row]] = value
+        fill[row] += 1
+    return array('i', counts), values
+
+def build_snapshot_arrays(data_dir='data', ids_path=None):
+    courses = read_rows(os.path.join(data_dir, 'courses.csv'))
+    codes = [course_code(row[1], row[2]) for row in courses]
+    requirement_rows = {requirement_type: [row for row in read_rows(os.path.join(data_dir, filename)) if len(row) >= 2]
+                        for requirement_type, filename in zip(REQUIREMENT_TYPES, REQUIREMENT_FILES)}
+    categories = read_rows(os.path.join(data_dir, 'major_categories.csv'))
+    category_index = {row[1]: k for k, row in enumerate(categories)}
+    member_rows = [row for row in read_rows(os.path.join(data_dir, 'category_courses.csv'))
+                   if len(row) >= 2 and row[0] in category_index]
+
+    # Required and category courses outside this catalog get IDs too, so the dictionary is
+    # updated under its lock and saved like every other writer's
+    with shared_course_ids(ids_path or os.path.join(data_dir, DEFAULT_IDS_FILE)) as ids:
+        course_ids = array('i', [ids.intern(code) for code in codes])
+        edges = {requirement_type: [(ids.intern(row[0]), ids.intern(row[1])) for row in rows]
+                 for requirement_type, rows in requirement_rows.items()}
+        members = [(category_index[row[0]], ids.intern(row[1])) for row in member_rows]
+
+    arrays = {}
+    heap = StringHeap()
+    arrays['course_id'] = course_ids
+    arrays['course_row'] = array('i', [-1] * len(ids))
+    for row, course_id in enumerate(arrays['course_id']):
+        if arrays['course_row'][course_id] < 0:
+            arrays['course_row'][course_id] = row
+    for i, field in enumerate(COURSE_FIELDS):
+        arrays[f'{field}_offsets'] = heap.column(row[i] for row in courses)
+    credit_values = []
+    for row in courses:
+        match = CREDIT_VALUE_PATTERN.search(row[3] or '')
+        credit_values.append(float(match.group()) if match else float('nan'))
+    arrays['credit_value'] = array('f', credit_values)
+
+    majors = list(dict.fromkeys(row[0] for row in categories))
+    major_index = {major: m for m, major in enumerate(majors)}
+    arrays['category_number'] = array('i', [int(row[1]) for row in categories])
+    arrays['category_major'] = array('i', [major_index[row[0]] for row in categories])
+    arrays['category_credits'] = array('f', [float(row[3]) if row[3] else float('nan') for row in categories])
+    arrays['category_name_offsets'] = heap.column(row[2] for row in categories)
+    arrays['major_name_offsets'] = heap.column(majors)
+    arrays['category_offsets'], arrays['category_courses'] = csr(len(categories), members)
+
+    arrays['code_offsets'] = heap.column(ids.codes)
+    for requirement_type in REQUIREMENT_TYPES:
+        arrays[f'{requirement_type}_offsets'], arrays[f'{requirement_type}_targets'] = \
+            csr(len(ids), edges[requirement_type])
+    arrays['heap'] = array('B', heap.data)
+
+    counts = {'ids': len(ids), 'courses': len(courses), 'categories': len(categories), 'majors': len(majors)}
+    return arrays, counts
+
+def write_snapshot(data_dir='data', ids_path=None, path=None):
+    path = path or os.path.join(data_dir, DEFAULT_SNAPSHOT_FILE)
+    arrays, counts = build_snapshot_arrays(data_dir, ids_path)
+
+    # Header offsets depend on the header's own length, so lay out the arrays from a fixed start
+    # past a generous estimate and pad the header up to it
+    entries = {name: [DTYPES[values.typecode], 0, len(values)] for name, values in arrays.items()}
+    estimate = len(json.dumps({'arrays': entries, 'counts': counts})) + 64 * len(entries)
+    offset = -(-(16 + estimate) // ALIGNMENT) * ALIGNMENT
+    start = offset
+    for name, values in arrays.items():
+        entries[name][1] = offset
+        offset += -(-(len(values) * values.itemsize) // ALIGNMENT) * ALIGNMENT
+    header = json.dumps({'arrays': entries, 'counts': counts}).encode('utf-8')
+
+    with atomic_write(path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(SNAPSHOT_VERSION.to_bytes(4, 'little'))
+        f.write(len(header).to_bytes(4, 'little'))
+        f.write(header)
+        f.write(bytes(start - f.tell()))
+        for name, values in arrays.items():
+            f.write(bytes(entries[name][1] - f.tell()))
+            if sys.byteorder == 'big' and values.itemsize > 1:
+                values = array(values.typecode, values)
+                values.byteswap()
+            f.write(values.tobytes())
+    return counts
+
+class CatalogSnapshot:
+    # Read-only view of a snapshot; every array is a NumPy view of the mapped file, and strings
+    # are decoded from the heap only when asked for
+
+    def __init__(self, path):
+        if np is None:
+            raise SystemExit("Reading catalog snapshots needs NumPy")
+        with open(path, 'rb') as f:
+            self.mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.mapping[:8] != MAGIC:
+            raise ValueError(f"{path} is not a catalog snapshot")
+        version = int.from_bytes(self.mapping[8:12], 'little')
+        if version != SNAPSHOT_VERSION:
+            raise ValueError(f"{path} has snapshot version {version}, expected {SNAPSHOT_VERSION}; rebuild it")
+        length = int.from_bytes(self.mapping[12:16], 'little')
+        header = json.loads(self.mapping[16:16 + length])
+        self.counts = header['counts']
+        self.arrays = {name: np.frombuffer(self.mapping, dtype=dtype, count=count, offset=offset)
+                       for name, (dtype, offset, count) in header['arrays'].items()}
+        self.heap_start = header['arrays']['heap'][1]
+        self._ids = None
+
+    def __getitem__(self, name):
+        return self.arrays[name]
+
+    def string(self, column, i):
+        offsets = self.arrays[f'{column}_offsets']
+        start = self.heap_start
+        return self.mapping[start + int(offsets[i]):start + int(offsets[i + 1])].decode('utf-8')
+
+    def code(self, course_id):
+        return self.string('code', course_id)
+
+    def id_of(self, code):
+        # The code -> ID index is built on first use
+        if self._ids is None:
+            self._ids = {self.code(i): i for i in range(self.counts['ids'])}
+        return self._ids.get(code, -1)
+
+    def course(self, code):
+        # {field: value} of a course row, or None if the catalog doesn't list it
+        course_id = self.id_of(code)
+        row = int(self.arrays['course_row'][course_id]) if course_id >= 0 else -1
+        if row < 0:
+            return None
+        return {field: self.string(field, row) for field in COURSE_FIELDS}
+
+    def requirements(self, code, requirement_type='prerequisite'):
+        # Zero-copy IDs of the courses `code` requires
+        course_id = self.id_of(code)
+        if course_id < 0:
+            return self.arrays[f'{requirement_type}_targets'][:0]
+        offsets = self.arrays[f'{requirement_type}_offsets']
+        return self.arrays[f'{requirement_type}_targets'][offsets[course_id]:offsets[course_id + 1]]
+
+    def category_courses(self, k):
+        offsets = self.arrays['category_offsets']
+        return self.arrays['category_courses'][offsets[k]:offsets[k + 1]]
+
+    def close(self):
+        # mmap refuses to close while a NumPy view of it is alive, and arrays returned by
+        # requirements() or category_courses() may still be held by the caller. The snapshot
+        # drops its own references either way; a mapping that is still in use is unmapped
+        # when the last view is collected.
+        self.arrays = {}
+        try:
+            self.mapping.close()
+        except BufferError:
+            pass
+        self.mapping = None
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write or inspect the binary catalog snapshot")
+    parser.add_argument('--data-dir', default='data')
+    parser.add_argument('--snapshot', help=f"snapshot file (default: <data dir>/{DEFAULT_SNAPSHOT_FILE})")
+    commands = parser.add_subparsers(dest='command', required=True)
+    build_parser = commands.add_parser('build', help="snapshot the CSVs of the data directory")
+    build_parser.add_argument('--ids', help=f"course ID dictionary (default: <data dir>/{DEFAULT_IDS_FILE})")
+    show_parser = commands.add_parser('show', help="print a course and its requirements from the snapshot")
+    show_parser.add_argument('code')
+    args = parser.parse_args()
+    path = args.snapshot or os.path.join(args.data_dir, DEFAULT_SNAPSHOT_FILE)
+
+    start = time.perf_counter()
+    if args.command == 'build':
+        counts = write_snapshot(args.data_dir, args.ids, path)
+        print(f"Wrote {path}: {counts['courses']} courses, {counts['ids']} course IDs, "
+              f"{counts['categories']} categories in {(time.perf_counter() - start) * 1000:.1f} ms")
+    else:
+        snapshot = CatalogSnapshot(path)
+        opened = time.perf_counter()
+        print(snapshot.course(args.code))
+        for requirement_type in REQUIREMENT_TYPES:
+            required = [snapshot.code(i) for i in snapshot.requirements(args.code, requirement_type)]
+            if required:
+                print(f"{requirement_type}: {', '.join(required)}")
+        print(f"Opened in {(opened - start) * 1000:.2f} ms")
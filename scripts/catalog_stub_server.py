@@ -0,0 +1,68 @@
+import argparse
+import email.utils
+import hashlib
+import os
+import re
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Local stand-in for catalog.charlotte.edu used to benchmark the scrapers.
+# Serves saved catalog pages from a directory as page_<n>.html, picked by the
+# filter[cpage] query parameter, with an optional artificial latency per request.
+# Saved pages without their pagination links need the page count passed to the scraper.
+#
+#   python scripts/catalog_stub_server.py --pages saved_pages --latency 0.3
+#   python scripts/scrape_courses.py --base-url http://localhost:8000 --workers 8 --pages 37
+
+def make_handler(pages_dir, latency):
+    class CatalogHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):
+            match = re.search(r'cpage%5D=(\d+)', self.path) or re.search(r'cpage\]=(\d+)', self.path)
+            page = match.group(1) if match else '1'
+            path = os.path.join(pages_dir, f'page_{page}.html')
+
+            if latency:
+                time.sleep(latency)
+
+            if not os.path.exists(path):
+                self.send_error(404)
+                return
+
+            with open(path, 'rb') as f:
+                body = f.read()
+            etag = '"' + hashlib.sha256(body).hexdigest()[:16] + '"'
+            last_modified = email.utils.formatdate(os.path.getmtime(path), usegmt=True)
+
+            # Answer conditional requests the way the real catalog does
+            if self.headers.get('If-None-Match') == etag:
+                self.send_response(304)
+                self.send_header('ETag', etag)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.send_header('ETag', etag)
+            self.send_header('Last-Modified', last_modified)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return CatalogHandler
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve saved catalog pages locally")
+    parser.add_argument('--pages', default='saved_pages', help="directory containing page_<n>.html files")
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--latency', type=float, default=0.0, help="seconds to sleep before each response")
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(('localhost', args.port), make_handler(args.pages, args.latency))
+    print(f"Serving {args.pages} on http://localhost:{args.port} ({args.latency}s latency)")
+    server.serve_forever()
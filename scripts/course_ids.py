@@ -0,0 +1,160 @@
+import argparse
+import contextlib
+import csv
+import hashlib
+import os
+import tempfile
+from array import array
+from collections import namedtuple
+from catalog_files import REQUIREMENT_FILES, atomic_write, course_code
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# Catalog-wide course ID dictionary: every course code ("ITSC 1212") gets a dense int32 ID.
+#
+# IDs are assigned in first-seen order and never change, so data/course_ids.csv can be shared by
+# several catalog years (catalog_pipeline.py keeps one at its output root) and an ID means the
+# same course in all of them. Updates happen under a file lock, so parallel scrapes of different
+# catalogs extend the same dictionary safely.
+#
+# Integer-ID outputs written next to the CSVs they mirror:
+#   course_ids.csv           ID,Course
+#   requirement_edges.csv    Course,Required,Type   (Type indexes catalog_files.REQUIREMENT_TYPES)
+#   category_course_ids.csv  Category ID,Course
+# prereq_closure.json also gets an ids array next to its course codes.
+#
+#   python scripts/course_ids.py --data-dir data
+
+DEFAULT_IDS_FILE = 'course_ids.csv'
+
+RequirementEdge = namedtuple('RequirementEdge', ['course', 'required', 'type'])
+
+class CourseIds:
+    __slots__ = ('codes', 'index')
+
+    def __init__(self, codes=()):
+        self.codes = []
+        self.index = {}
+        for code in codes:
+            self.intern(code)
+
+    def intern(self, code):
+        course_id = self.index.get(code)
+        if course_id is None:
+            course_id = self.index[code] = len(self.codes)
+            self.codes.append(code)
+        return course_id
+
+    def get(self, code, default=-1):
+        return self.index.get(code, default)
+
+    def code(self, course_id):
+        return self.codes[course_id]
+
+    def encode(self, codes):
+        # int32 IDs of known codes, -1 for the rest
+        return array('i', [self.index.get(code, -1) for code in codes])
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __contains__(self, code):
+        return code in self.index
+
+def load_course_ids(path):
+    ids = CourseIds()
+    if os.path.exists(path):
+        with open(path, newline='', encoding='utf-8') as f:
+            reader = csv.reader(f)
+            next(reader, None)
+            for course_id, code in reader:
+                if int(course_id) != ids.intern(code):
+                    raise ValueError(f"{path} is not a dense ID dictionary")
+    return ids
+
+def save_course_ids(ids, path):
+    with atomic_write(path, newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['ID', 'Course'])
+        writer.writerows(enumerate(ids.codes))
+
+def lock_path(path):
+    # Kept in the temp directory rather than next to the dictionary, so data/ holds only outputs.
+    # The file can't be removed after use: a process waiting on it would lock an unlinked file.
+    digest = hashlib.sha256(os.path.abspath(path).encode('utf-8')).hexdigest()[:16]
+    return os.path.join(tempfile.gettempdir(), f'course_ids.{digest}.lock')
+
+@contextlib.contextmanager
+def shared_course_ids(path):
+    # Loads the dictionary under an exclusive lock and saves it again if codes were added
+    with open(lock_path(path), 'w') as lock:
+        if fcntl is not None:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+        ids = load_course_ids(path)
+        known = len(ids)
+        yield ids
+        if len(ids) > known:
+            save_course_ids(ids, path)
+
+def read_rows(path):
+    with open(path, newline='', encoding='utf-8') as f:
+        reader = csv.reader(f)
+        next(reader, None)
+        yield from reader
+
+def requirement_edges(data_dir, ids):
+    # RequirementEdges of the three requirement CSVs, interning every code on the way
+    for type_id, filename in enumerate(REQUIREMENT_FILES):
+        path = os.path.join(data_dir, filename)
+        if not os.path.exists(path):
+            continue
+        for row in read_rows(path):
+            if len(row) >= 2:
+                yield RequirementEdge(ids.intern(row[0]), ids.intern(row[1]), type_id)
+
+def write_int_rows(path, header, columns):
+    with atomic_write(path, newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        writer.writerows(zip(*columns))
+
+def write_edge_ids(data_dir='data', ids_path=None):
+    # Interns the catalog's courses (in courses.csv order) and writes requirement_edges.csv
+    with shared_course_ids(ids_path or os.path.join(data_dir, DEFAULT_IDS_FILE)) as ids:
+        for row in read_rows(os.path.join(data_dir, 'courses.csv')):
+            ids.intern(course_code(row[1], row[2]))
+        courses, required, types = array('i'), array('i'), array('b')
+        for edge in requirement_edges(data_dir, ids):
+            courses.append(edge.course)
+            required.append(edge.required)
+            types.append(edge.type)
+
+    write_int_rows(os.path.join(data_dir, 'requirement_edges.csv'), ['Course', 'Required', 'Type'],
+                   [courses, required, types])
+    return ids
+
+def write_category_ids(data_dir='data', ids_path=None):
+    # Writes category_course_ids.csv, interning any category course the catalog doesn't list
+    with shared_course_ids(ids_path or os.path.join(data_dir, DEFAULT_IDS_FILE)) as ids:
+        categories, courses = array('i'), array('i')
+        for row in read_rows(os.path.join(data_dir, 'category_courses.csv')):
+            if len(row) >= 2:
+                categories.append(int(row[0]))
+                courses.append(ids.intern(row[1]))
+
+    write_int_rows(os.path.join(data_dir, 'category_course_ids.csv'), ['Category ID', 'Course'], [categories, courses])
+    return ids
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Intern course codes and write the integer-ID outputs")
+    parser.add_argument('--data-dir', default='data')
+    parser.add_argument('--ids', help=f"shared dictionary (default: <data dir>/{DEFAULT_IDS_FILE})")
+    args = parser.parse_args()
+
+    ids = write_edge_ids(args.data_dir, args.ids)
+    if os.path.exists(os.path.join(args.data_dir, 'category_courses.csv')):
+        ids = write_category_ids(args.data_dir, args.ids)
+    print(f"{len(ids)} course IDs")
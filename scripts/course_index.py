@@ -0,0 +1,232 @@
+import argparse
+import csv
+import json
+import os
+import time
+import numpy as np
+from catalog_files import atomic_write
+from text_utils import search_tokens
+
+try:
+    from scipy import sparse
+except ImportError:
+    sparse = None
+
+try:
+    from sentence_transformers import SentenceTransformer
+except ImportError:
+    SentenceTransformer = None
+
+# Local semantic search over course descriptions, without OpenAI or ChromaDB.
+#
+# Courses are embedded with a small sentence-transformers model when one is installed, and with
+# TF-IDF reduced by a truncated SVD (latent semantic analysis) otherwise. The vectors are
+# unit-length float16 rows of data/course_index/vectors.npy, opened memory-mapped, so a search is
+# one matrix product against the query vectors and an argpartition per query.
+#
+# data/course_index/ holds
+#   vectors.npy      courses x dims float16, L2-normalized
+#   ids.json         row -> course key ("ITSC_1212", the ids setup-embeddings.js gives ChromaDB)
+#   meta.json        backend, dimensions, model name
+#   vocabulary.json, idf.npy, components.npy   the TF-IDF/SVD model, to embed queries
+#
+#   python scripts/course_index.py build
+#   python scripts/course_index.py search "machine learning for robots" -k 10
+
+DEFAULT_INDEX_DIR = 'data/course_index'
+DEFAULT_MODEL = 'all-MiniLM-L6-v2'
+DEFAULT_DIMENSIONS = 256
+MIN_TEXT_LENGTH = 20
+SEARCH_BLOCK_ROWS = 4096
+
+def load_course_texts(path='data/courses.csv'):
+    # Same keys and text as setup-embeddings.js: "Subject_Number" and "Description Name"
+    ids = []
+    texts = []
+    with open(path, newline='', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            text = f"{row['Description'] or ''} {row['Name'] or ''}".strip()
+            if len(text) < MIN_TEXT_LENGTH:
+                continue
+            ids.append(f"{row['Subject']}_{row['Number']}")
+            texts.append(text)
+    return ids, texts
+
+def normalize_rows(matrix):
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1
+    return matrix / norms
+
+class TfidfSvd:
+    # TF-IDF (sublinear tf, smooth idf) reduced to `dimensions` with a randomized truncated SVD
+
+    def __init__(self, vocabulary, idf, components):
+        self.vocabulary = vocabulary
+        self.idf = idf
+        self.components = components
+
+    @classmethod
+    def fit(cls, texts, dimensions=DEFAULT_DIMENSIONS, min_df=2, seed=0):
+        documents = [search_tokens(text) for text in texts]
+        df = {}
+        for words in documents:
+            for word in set(words):
+                df[word] = df.get(word, 0) + 1
+        # Words in a single document can't relate two courses to each other
+        vocabulary = {word: i for i, word in enumerate(sorted(w for w, n in df.items() if n >= min_df))}
+        idf = np.array([np.log((1 + len(documents)) / (1 + df[word])) + 1 for word in vocabulary], dtype=np.float32)
+
+        model = cls(vocabulary, idf, None)
+        matrix = model.tfidf(documents)
+        dimensions = max(1, min(dimensions, matrix.shape[0] - 1, matrix.shape[1] - 1))
+
+        # Randomized range finder with two power iterations, then an exact SVD of the small projection
+        rng = np.random.default_rng(seed)
+        basis = np.asarray(matrix @ rng.standard_normal((matrix.shape[1], dimensions + 10)).astype(np.float32))
+        for _ in range(2):
+            basis, _ = np.linalg.qr(basis)
+            basis = np.asarray(matrix @ np.asarray(matrix.T @ basis))
+        basis, _ = np.linalg.qr(basis)
+        projected = np.asarray((matrix.T @ basis).T)
+        _, _, vt = np.linalg.svd(projected, full_matrices=False)
+        model.components = vt[:dimensions].astype(np.float32)
+        return model, matrix
+
+    def tfidf(self, documents):
+        # documents are token lists; returns an L2-normalized documents x vocabulary matrix
+        rows, cols, values = [], [], []
+        for row, words in enumerate(documents):
+            counts = {}
+            for word in words:
+                col = self.vocabulary.get(word)
+                if col is not None:
+                    counts[col] = counts.get(col, 0) + 1
+            weights = {col: (1 + np.log(count)) * self.idf[col] for col, count in counts.items()}
+            norm = np.sqrt(sum(w * w for w in weights.values())) or 1
+            for col, weight in weights.items():
+                rows.append(row)
+                cols.append(col)
+                values.append(weight / norm)
+
+        shape = (len(documents), len(self.vocabulary))
+        if sparse is not None:
+            return sparse.csr_matrix((np.array(values, dtype=np.float32), (rows, cols)), shape=shape)
+        matrix = np.zeros(shape, dtype=np.float32)
+        matrix[rows, cols] = values
+        return matrix
+
+    def embed(self, texts):
+        matrix = self.tfidf([search_tokens(text) for text in texts])
+        return normalize_rows(np.asarray(matrix @ self.components.T, dtype=np.float32))
+
+    def save(self, index_dir):
+        with open(os.path.join(index_dir, 'vocabulary.json'), 'w', encoding='utf-8') as f:
+            json.dump(list(self.vocabulary), f)
+        np.save(os.path.join(index_dir, 'idf.npy'), self.idf)
+        np.save(os.path.join(index_dir, 'components.npy'), self.components)
+
+    @classmethod
+    def load(cls, index_dir):
+        with open(os.path.join(index_dir, 'vocabulary.json'), encoding='utf-8') as f:
+            vocabulary = {word: i for i, word in enumerate(json.load(f))}
+        return cls(vocabulary, np.load(os.path.join(index_dir, 'idf.npy')),
+                   np.load(os.path.join(index_dir, 'components.npy')))
+
+class SentenceEncoder:
+    def __init__(self, model_name=DEFAULT_MODEL):
+        self.model = SentenceTransformer(model_name, device='cpu')
+
+    def embed(self, texts):
+        return np.asarray(self.model.encode(list(texts), batch_size=64, normalize_embeddings=True), dtype=np.float32)
+
+def build_index(courses_path='data/courses.csv', index_dir=DEFAULT_INDEX_DIR, backend=None,
+                dimensions=DEFAULT_DIMENSIONS, model_name=DEFAULT_MODEL):
+    # Embeds every course and writes the index; backend is 'sentence' or 'tfidf' (default: best available)
+    backend = backend or ('sentence' if SentenceTransformer is not None else 'tfidf')
+    ids, texts = load_course_texts(courses_path)
+    os.makedirs(index_dir, exist_ok=True)
+
+    if backend == 'sentence':
+        if SentenceTransformer is None:
+            raise SystemExit("The sentence backend needs the sentence-transformers package")
+        vectors = SentenceEncoder(model_name).embed(texts)
+    else:
+        model, matrix = TfidfSvd.fit(texts, dimensions)
+        vectors = normalize_rows(np.asarray(matrix @ model.components.T, dtype=np.float32))
+        model.save(index_dir)
+
+    # Written under a temporary name so open readers keep their mapping of the old file
+    with atomic_write(os.path.join(index_dir, 'vectors.npy'), 'wb') as f:
+        np.save(f, vectors.astype(np.float16))
+    with open(os.path.join(index_dir, 'ids.json'), 'w', encoding='utf-8') as f:
+        json.dump(ids, f)
+    with open(os.path.join(index_dir, 'meta.json'), 'w', encoding='utf-8') as f:
+        json.dump({'backend': backend, 'dimensions': int(vectors.shape[1]),
+                   'model': model_name if backend == 'sentence' else None}, f, indent=2)
+    return len(ids), int(vectors.shape[1])
+
+class CourseIndex:
+    def __init__(self, index_dir=DEFAULT_INDEX_DIR):
+        with open(os.path.join(index_dir, 'meta.json'), encoding='utf-8') as f:
+            self.meta = json.load(f)
+        with open(os.path.join(index_dir, 'ids.json'), encoding='utf-8') as f:
+            self.ids = json.load(f)
+        self.vectors = np.load(os.path.join(index_dir, 'vectors.npy'), mmap_mode='r')
+        if self.meta['backend'] == 'sentence':
+            self.encoder = SentenceEncoder(self.meta['model'])
+        else:
+            self.encoder = TfidfSvd.load(index_dir)
+
+    def search_vectors(self, queries, k=10):
+        # queries: n x dims unit vectors; returns [[(course key, cosine similarity)]] per query
+        k = min(k, len(self.ids))
+        scores = np.empty((len(queries), len(self.ids)), dtype=np.float32)
+        for start in range(0, len(self.ids), SEARCH_BLOCK_ROWS):
+            block = np.asarray(self.vectors[start:start + SEARCH_BLOCK_ROWS], dtype=np.float32)
+            scores[:, start:start + len(block)] = queries @ block.T
+
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        results = []
+        for row, candidates in enumerate(top):
+            ranked = candidates[np.argsort(-scores[row, candidates])]
+            results.append([(self.ids[i], float(scores[row, i])) for i in ranked])
+        return results
+
+    def search(self, queries, k=10):
+        # queries: a string or a list of strings
+        single = isinstance(queries, str)
+        results = self.search_vectors(self.encoder.embed([queries] if single else queries), k)
+        return results[0] if single else results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build or query the local course embedding index")
+    parser.add_argument('--index-dir', default=DEFAULT_INDEX_DIR)
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    build_parser = commands.add_parser('build', help="embed data/courses.csv")
+    build_parser.add_argument('--courses', default='data/courses.csv')
+    build_parser.add_argument('--backend', choices=['sentence', 'tfidf'],
+                              help="default: sentence-transformers when installed, else TF-IDF/SVD")
+    build_parser.add_argument('--dimensions', type=int, default=DEFAULT_DIMENSIONS, help="TF-IDF/SVD dimensions")
+    build_parser.add_argument('--model', default=DEFAULT_MODEL, help="sentence-transformers model name")
+
+    search_parser = commands.add_parser('search', help="print the closest courses to each query")
+    search_parser.add_argument('queries', nargs='+')
+    search_parser.add_argument('-k', type=int, default=10)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    if args.command == 'build':
+        count, dimensions = build_index(args.courses, args.index_dir, args.backend, args.dimensions, args.model)
+        print(f"Indexed {count} courses ({dimensions} dimensions) in {time.perf_counter() - start:.2f} s")
+    else:
+        index = CourseIndex(args.index_dir)
+        loaded = time.perf_counter()
+        results = index.search(args.queries, args.k)
+        elapsed = time.perf_counter() - loaded
+        for query, matches in zip(args.queries, results):
+            print(f'"{query}"')
+            for key, score in matches:
+                print(f"  {key.replace('_', ' ')}  {score:.3f}")
+        print(f"Searched {len(args.queries)} queries in {elapsed * 1000:.1f} ms "
+              f"(index loaded in {(loaded - start) * 1000:.1f} ms)")
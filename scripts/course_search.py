@@ -0,0 +1,222 @@
+import argparse
+import csv
+import heapq
+import json
+import math
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+from catalog_files import atomic_write, row_course_code
+from text_utils import search_tokens
+
+# Keyword search over courses.csv: an inverted index scored with BM25, plus a prefix trie for
+# course-code and title autocomplete. This is the server's fallback when the vector store is down.
+#
+# Each course is indexed in two fields, the name (with its subject and number) and the
+# description, scored separately with BM25 and summed with the name weighted NAME_BOOST times.
+# The per-term contributions are computed once when the index is built, so a query just adds up
+# the postings of its terms.
+#
+# The index is built after every course scrape into data/search_index.json, and served with
+#   python scripts/course_search.py serve
+#   curl 'http://localhost:8765/search?q=machine+learning&k=15'
+#   curl 'http://localhost:8765/autocomplete?q=itsc+12'
+
+DEFAULT_INDEX_PATH = 'data/search_index.json'
+DEFAULT_PORT = 8765
+INDEX_VERSION = 1
+
+K1 = 1.2
+B = 0.75
+NAME_BOOST = 3.0
+COMPLETION_LIMIT = 10
+MIN_COMPLETION_WORD = 3
+
+def completion_keys(row):
+    # "itsc 1212", "itsc1212", the full title and the title from each later word on,
+    # so "learn" completes "Machine Learning"
+    keys = [row_course_code(row).lower(), f"{row['Subject']}{row['Number']}".lower()]
+    words = (row['Name'] or '').lower().split()
+    keys.extend(' '.join(words[i:]) for i, word in enumerate(words) if i == 0 or len(word) >= MIN_COMPLETION_WORD)
+    return list(dict.fromkeys(key for key in keys if key))
+
+def build_search_index(courses_path='data/courses.csv', index_path=DEFAULT_INDEX_PATH):
+    with open(courses_path, newline='', encoding='utf-8') as f:
+        courses = list(csv.DictReader(f))
+
+    # Field token lists per course
+    fields = [(search_tokens(f"{row['Name'] or ''} {row['Subject']} {row['Number']}"),
+               search_tokens(row['Description'] or '')) for row in courses]
+    n = len(courses)
+    average_name = sum(len(name) for name, _ in fields) / n if n else 1
+    average_description = sum(len(description) for _, description in fields) / n if n else 1
+
+    term_frequencies = {}
+    for doc, (name, description) in enumerate(fields):
+        for field, tokens in ((0, name), (1, description)):
+            for token in tokens:
+                frequencies = term_frequencies.setdefault(token, {}).setdefault(doc, [0, 0])
+                frequencies[field] += 1
+
+    postings = {}
+    for term, docs in term_frequencies.items():
+        idf = math.log(1 + (n - len(docs) + 0.5) / (len(docs) + 0.5))
+        doc_ids = []
+        scores = []
+        for doc, (name_tf, description_tf) in sorted(docs.items()):
+            name_length = len(fields[doc][0]) / (average_name or 1)
+            description_length = len(fields[doc][1]) / (average_description or 1)
+            score = NAME_BOOST * name_tf * (K1 + 1) / (name_tf + K1 * (1 - B + B * name_length))
+            score += description_tf * (K1 + 1) / (description_tf + K1 * (1 - B + B * description_length))
+            doc_ids.append(doc)
+            scores.append(round(idf * score, 4))
+        postings[term] = [doc_ids, scores]
+
+    # Completions are stored as (key, course) pairs in course-code order; the trie is rebuilt on load
+    order = sorted(range(n), key=lambda doc: row_course_code(courses[doc]))
+    completions = [[key, doc] for doc in order for key in completion_keys(courses[doc])]
+
+    index = {'version': INDEX_VERSION, 'courses': courses, 'postings': postings, 'completions': completions}
+    with atomic_write(index_path) as f:
+        json.dump(index, f, separators=(',', ':'))
+    return n, len(postings)
+
+class PrefixTrie:
+    # Each node keeps up to `limit` courses whose keys pass through it, in insertion order,
+    # so a lookup costs one step per character of the prefix
+    def __init__(self, limit=COMPLETION_LIMIT):
+        self.limit = limit
+        self.root = ({}, [])
+
+    def insert(self, key, value):
+        node = self.root
+        for char in key:
+            children, values = node
+            if len(values) < self.limit and value not in values:
+                values.append(value)
+            node = children.get(char)
+            if node is None:
+                node = children[char] = ({}, [])
+        if len(node[1]) < self.limit and value not in node[1]:
+            node[1].append(value)
+
+    def complete(self, prefix):
+        node = self.root
+        for char in prefix:
+            node = node[0].get(char)
+            if node is None:
+                return []
+        return node[1]
+
+class CourseSearch:
+    def __init__(self, index_path=DEFAULT_INDEX_PATH):
+        with open(index_path, encoding='utf-8') as f:
+            index = json.load(f)
+        if index.get('version') != INDEX_VERSION:
+            raise ValueError(f"{index_path} was built by another version; rebuild it")
+
+        self.courses = index['courses']
+        self.postings = {term: dict(zip(docs, scores)) for term, (docs, scores) in index['postings'].items()}
+        self.trie = PrefixTrie()
+        for key, doc in index['completions']:
+            self.trie.insert(key, doc)
+
+    def search(self, query, k=15):
+        # Returns [(course row, score, matched terms)] for the k best matches
+        terms = [term for term in dict.fromkeys(search_tokens(query)) if term in self.postings]
+        scores = {}
+        for term in terms:
+            for doc, score in self.postings[term].items():
+                scores[doc] = scores.get(doc, 0.0) + score
+
+        best = heapq.nlargest(k, scores.items(), key=lambda item: (item[1], -item[0]))
+        return [(self.courses[doc], score, [term for term in terms if doc in self.postings[term]])
+                for doc, score in best]
+
+    def autocomplete(self, prefix, k=COMPLETION_LIMIT):
+        prefix = ' '.join(prefix.lower().split())
+        return [self.courses[doc] for doc in self.trie.complete(prefix)[:k]]
+
+def search_results(search, query, k):
+    # Same shape as performKeywordSearch in server.js, so the server can pass results straight through
+    matches = search.search(query, k)
+    top = matches[0][1] if matches else 1
+    return [{
+        'course': {**course, 'course_id': row_course_code(course)},
+        'score': round(score, 4),
+        'similarity': round(score / top, 4),
+        'matchedKeywords': matched,
+        'relevancePercentage': round(100 * score / top),
+    } for course, score, matched in matches]
+
+def make_handler(search):
+    class SearchHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            params = parse_qs(url.query)
+            query = params.get('q', [''])[0]
+            try:
+                k = int(params.get('k', ['15'])[0])
+            except ValueError:
+                k = 15
+
+            if url.path == '/search':
+                payload = {'results': search_results(search, query, k), 'method': 'bm25'}
+            elif url.path == '/autocomplete':
+                payload = {'results': [{'course_id': row_course_code(course), 'name': course['Name']}
+                                       for course in search.autocomplete(query, k)]}
+            else:
+                self.send_error(404)
+                return
+
+            body = json.dumps(payload).encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return SearchHandler
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="BM25 keyword search and autocomplete over courses.csv")
+    parser.add_argument('--index', default=DEFAULT_INDEX_PATH)
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    build_parser = commands.add_parser('build', help="index data/courses.csv")
+    build_parser.add_argument('--courses', default='data/courses.csv')
+
+    search_parser = commands.add_parser('search', help="print the best matches for a query")
+    search_parser.add_argument('query')
+    search_parser.add_argument('-k', type=int, default=15)
+
+    complete_parser = commands.add_parser('complete', help="print autocomplete suggestions for a prefix")
+    complete_parser.add_argument('prefix')
+
+    serve_parser = commands.add_parser('serve', help="answer /search and /autocomplete over HTTP")
+    serve_parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        start = time.perf_counter()
+        courses, terms = build_search_index(args.courses, args.index)
+        print(f"Indexed {courses} courses, {terms} terms in {(time.perf_counter() - start) * 1000:.1f} ms")
+    elif args.command == 'serve':
+        server = ThreadingHTTPServer(('localhost', args.port), make_handler(CourseSearch(args.index)))
+        print(f"Serving {args.index} on http://localhost:{args.port}")
+        server.serve_forever()
+    else:
+        search = CourseSearch(args.index)
+        start = time.perf_counter()
+        if args.command == 'search':
+            for course, score, matched in search.search(args.query, args.k):
+                print(f"{row_course_code(course):<10} {score:7.3f}  {course['Name']}  [{', '.join(matched)}]")
+        else:
+            for course in search.autocomplete(args.prefix):
+                print(f"{row_course_code(course):<10} {course['Name']}")
+        print(f"{(time.perf_counter() - start) * 1000:.3f} ms")
@@ -0,0 +1,61 @@
+import csv
+import os
+from catalog_files import temp_path
+
+DEFAULT_BATCH_SIZE = 500
+
+class CsvSink:
+    # Writes one CSV output through a single open file handle.
+    # Rows are buffered and written in batches to a temporary file next to the target,
+    # which only replaces the target on commit(), so readers such as server.js and the
+    # frontend d3.csv loaders never see a half-written file mid-scrape.
+
+    def __init__(self, path, header, batch_size=DEFAULT_BATCH_SIZE):
+        self.path = path
+        self.tmp_path = temp_path(path)
+        self.batch_size = batch_size
+        self.rows = []
+        self.count = 0
+
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.file = open(self.tmp_path, mode='w', newline='', encoding='utf-8')
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(header)
+
+    def writerow(self, row):
+        self.rows.append(row)
+        if len(self.rows) >= self.batch_size:
+            self.flush()
+
+    def writerows(self, rows):
+        for row in rows:
+            self.writerow(row)
+
+    def flush(self):
+        if self.rows:
+            self.writer.writerows(self.rows)
+            self.count += len(self.rows)
+            self.rows = []
+
+    def commit(self):
+        self.flush()
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.file.close()
+        os.replace(self.tmp_path, self.path)
+
+    def abort(self):
+        self.rows = []
+        self.file.close()
+        if os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.abort()
+        return False
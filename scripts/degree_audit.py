@@ -0,0 +1,262 @@
+import argparse
+import csv
+import os
+import time
+import numpy as np
+from catalog_files import row_course_code
+from csv_sink import CsvSink
+from degree_planner import DEFAULT_CREDITS, parse_credits
+from requirements_parser import GRADE_POINTS
+
+try:
+    from scipy import sparse
+except ImportError:
+    sparse = None
+
+# Audits a whole population of student transcripts against their majors' categories.
+#
+# Category membership is a sparse course x category matrix (CSR) and the transcripts a sparse
+# student x course matrix of earned credits. One product of the two gives the credits every
+# student has earned towards every category; the rest of the audit is elementwise work on
+# those arrays. SciPy runs the product when it is installed, plain NumPy otherwise.
+#
+# Categories can use either layout in data/:
+#   sample_data.py  major_categories.csv: major_id,category_id,category_name,credits
+#                   category_courses.csv: category_id,course_id
+#   scrape_majors   major_categories.csv: Major,Category ID,Category Name,Credit Hours
+#                   category_courses.csv: Category ID,Course
+#
+# Transcripts are CSV (or Parquet, with pyarrow) rows of Student ID, Course and optionally
+# Major, Credits and Grade. Failing or missing grades (F, W, I, ...) earn nothing; rows without
+# a grade count as passed.
+#
+#   python scripts/degree_audit.py transcripts.csv --major 1
+
+def load_categories(data_dir='data'):
+    # Returns ([(category id, major, name, credits)], [(category id, course code)])
+    categories = []
+    with open(os.path.join(data_dir, 'major_categories.csv'), newline='', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            if 'category_id' in row:
+                categories.append((row['category_id'], row['major_id'], row['category_name'],
+                                   float(row['credits'] or 0)))
+            else:
+                categories.append((row['Category ID'], row['Major'], row['Category Name'],
+                                   float(row['Credit Hours'] or 0)))
+
+    members = []
+    with open(os.path.join(data_dir, 'category_courses.csv'), newline='', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            if 'category_id' in row:
+                members.append((row['category_id'], row['course_id']))
+            else:
+                members.append((row['Category ID'], row['Course']))
+    return categories, members
+
+def load_major_aliases(data_dir='data'):
+    # majors.csv from sample_data.py lets transcripts name a major instead of its id
+    aliases = {}
+    path = os.path.join(data_dir, 'majors.csv')
+    if os.path.exists(path):
+        with open(path, newline='', encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                if 'major_id' in row:
+                    aliases[row['major_name']] = row['major_id']
+    return aliases
+
+def load_course_credits(data_dir='data'):
+    credits = {}
+    path = os.path.join(data_dir, 'courses.csv')
+    if os.path.exists(path):
+        with open(path, newline='', encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                code = row_course_code(row)
+                credits.setdefault(code, parse_credits(row['Credits']))
+    return credits
+
+def load_transcripts(path):
+    # Returns {column: list of values}
+    if path.endswith('.parquet'):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise SystemExit("Reading Parquet transcripts needs pyarrow; convert the file to CSV instead")
+        return {name: [None if value is None else str(value) for value in values]
+                for name, values in pq.read_table(path).to_pydict().items()}
+
+    with open(path, newline='', encoding='utf-8') as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        columns = list(zip(*reader)) or [()] * len(header)
+    return {name: list(values) for name, values in zip(header, columns)}
+
+class DegreeAudit:
+    def __init__(self, categories, members, course_credits=None, major_aliases=None):
+        self.categories = categories
+        self.category_index = {category[0]: j for j, category in enumerate(categories)}
+        self.required = np.array([category[3] for category in categories], dtype=np.float32)
+
+        self.majors = list(dict.fromkeys(category[1] for category in categories))
+        self.major_index = {major: m for m, major in enumerate(self.majors)}
+        for name, major in (major_aliases or {}).items():
+            if major in self.major_index:
+                self.major_index.setdefault(name, self.major_index[major])
+
+        pairs = list(dict.fromkeys((course, category) for category, course in members
+                                   if category in self.category_index))
+        self.course_credits = dict(course_credits or {})
+        self.courses = list(dict.fromkeys(list(self.course_credits) + [course for course, _ in pairs]))
+        self.course_index = {code: i for i, code in enumerate(self.courses)}
+
+        # course x category membership in CSR form: the categories of course i are
+        # member_categories[member_offsets[i]:member_offsets[i + 1]]
+        pairs.sort(key=lambda pair: self.course_index[pair[0]])
+        self.member_categories = np.array([self.category_index[category] for _, category in pairs], dtype=np.int64)
+        counts = np.bincount([self.course_index[course] for course, _ in pairs], minlength=len(self.courses))
+        self.member_offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+        if sparse is not None:
+            self.membership = sparse.csr_matrix((np.ones(len(pairs), dtype=np.float32), self.member_categories,
+                                                 self.member_offsets), shape=(len(self.courses), len(categories)))
+
+        self.major_categories = np.zeros((len(self.majors), len(categories)), dtype=bool)
+        category_majors = np.array([self.major_index[category[1]] for category in categories], dtype=np.int64)
+        self.major_categories[category_majors, np.arange(len(categories))] = True
+
+        # How many categories of each major list each course: courses x majors
+        self.listings = np.zeros((len(self.courses), len(self.majors)), dtype=np.int32)
+        member_courses = np.repeat(np.arange(len(self.courses)), counts)
+        np.add.at(self.listings, (member_courses, category_majors[self.member_categories]), 1)
+
+    @classmethod
+    def from_data_dir(cls, data_dir='data'):
+        categories, members = load_categories(data_dir)
+        return cls(categories, members, load_course_credits(data_dir), load_major_aliases(data_dir))
+
+    def category_credits(self, student_rows, course_cols, credits, n_students):
+        # (students x courses credits) @ (courses x categories membership)
+        if sparse is not None:
+            transcript = sparse.csr_matrix((credits, (student_rows, course_cols)),
+                                           shape=(n_students, len(self.courses)), dtype=np.float32)
+            return (transcript @ self.membership).toarray()
+
+        # Without SciPy the same product runs over the CSR arrays: every transcript entry is
+        # repeated once per category of its course and scattered into the result
+        starts = self.member_offsets[course_cols]
+        counts = self.member_offsets[course_cols + 1] - starts
+        total = int(counts.sum())
+        entry_starts = np.repeat(np.cumsum(counts) - counts, counts)
+        member = np.repeat(starts, counts) + np.arange(total) - entry_starts
+        earned = np.zeros((n_students, len(self.categories)), dtype=np.float32)
+        np.add.at(earned, (np.repeat(student_rows, counts), self.member_categories[member]), np.repeat(credits, counts))
+        return earned
+
+    def audit(self, transcripts, default_major=None):
+        # transcripts: {column: values} with Student ID and Course, optionally Major, Credits, Grade.
+        # Returns students, each student's major row (-1 if unknown), and per-category arrays.
+        course_column = transcripts['Course']
+        student_column = transcripts['Student ID']
+        students = list(dict.fromkeys(student_column))
+        student_index = {student: s for s, student in enumerate(students)}
+
+        # Courses neither the catalog nor any category knows can't count towards anything
+        keep = np.array([course in self.course_index for course in course_column], dtype=bool)
+        if 'Grade' in transcripts:
+            keep &= np.array([not grade or grade.upper() in GRADE_POINTS for grade in transcripts['Grade']], dtype=bool)
+        student_rows = np.array([student_index[student] for student in student_column], dtype=np.int64)[keep]
+        course_cols = np.array([self.course_index.get(course, 0) for course in course_column], dtype=np.int64)[keep]
+        if 'Credits' in transcripts:
+            credits = np.array([parse_credits(value) for value in transcripts['Credits']], dtype=np.float32)[keep]
+        else:
+            catalog = np.array([self.course_credits.get(code, DEFAULT_CREDITS) for code in self.courses],
+                               dtype=np.float32)
+            credits = catalog[course_cols]
+
+        # A repeated course counts once, with its highest credits
+        flat = student_rows * len(self.courses) + course_cols
+        order = np.lexsort((-credits, flat))
+        first = np.ones(len(order), dtype=bool)
+        first[1:] = flat[order][1:] != flat[order][:-1]
+        taken = order[first]
+        student_rows, course_cols, credits = student_rows[taken], course_cols[taken], credits[taken]
+
+        if 'Major' in transcripts:
+            major_of = {}
+            for student, major in zip(student_column, transcripts['Major']):
+                major_of.setdefault(student, major or default_major)
+        else:
+            major_of = dict.fromkeys(students, default_major)
+        student_majors = np.array([self.major_index.get(major_of[student], -1) for student in students],
+                                  dtype=np.int64)
+
+        earned = self.category_credits(student_rows, course_cols, credits, len(students))
+
+        in_major = np.zeros((len(students), len(self.categories)), dtype=bool)
+        known = student_majors >= 0
+        in_major[known] = self.major_categories[student_majors[known]]
+        earned = np.where(in_major, earned, 0)
+        satisfied = np.minimum(earned, self.required)
+        outstanding = np.where(in_major, np.maximum(self.required - earned, 0), 0)
+
+        # A course double counts when two or more categories of the student's own major list it
+        pair_majors = student_majors[student_rows]
+        counts = np.zeros(len(student_rows), dtype=np.float32)
+        mask = pair_majors >= 0
+        counts[mask] = self.listings[course_cols[mask], pair_majors[mask]]
+        double = counts > 1
+
+        return {
+            'students': students,
+            'majors': student_majors,
+            'in_major': in_major,
+            'earned': earned,
+            'satisfied': satisfied,
+            'outstanding': outstanding,
+            'double_counted': (student_rows[double], course_cols[double]),
+        }
+
+    def write(self, result, output_dir='data'):
+        students = result['students']
+        rows, cols = np.nonzero(result['in_major'])
+        with CsvSink(os.path.join(output_dir, 'audit_categories.csv'),
+                     ['Student ID', 'Category ID', 'Category Name', 'Required', 'Earned', 'Satisfied',
+                      'Outstanding']) as sink:
+            for s, j in zip(rows.tolist(), cols.tolist()):
+                category_id, _, name, required = self.categories[j]
+                sink.writerow([students[s], category_id, name, format_credits(required),
+                               format_credits(result['earned'][s, j]), format_credits(result['satisfied'][s, j]),
+                               format_credits(result['outstanding'][s, j])])
+
+        student_rows, course_cols = result['double_counted']
+        with CsvSink(os.path.join(output_dir, 'audit_double_counted.csv'),
+                     ['Student ID', 'Course', 'Category IDs']) as sink:
+            for s, c in zip(student_rows.tolist(), course_cols.tolist()):
+                categories = self.member_categories[self.member_offsets[c]:self.member_offsets[c + 1]]
+                category_ids = [self.categories[j][0] for j in categories.tolist() if result['in_major'][s, j]]
+                sink.writerow([students[s], self.courses[c], ';'.join(category_ids)])
+
+def format_credits(value):
+    value = float(value)
+    return str(int(value)) if value.is_integer() else f'{value:g}'
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Audit student transcripts against major categories")
+    parser.add_argument('transcripts', help="CSV or Parquet of Student ID,Course[,Major,Credits,Grade] rows")
+    parser.add_argument('--major', help="major id or name for students whose rows carry no Major")
+    parser.add_argument('--data-dir', default='data')
+    parser.add_argument('--output-dir', default='data')
+    args = parser.parse_args()
+
+    audit = DegreeAudit.from_data_dir(args.data_dir)
+    transcripts = load_transcripts(args.transcripts)
+
+    start = time.perf_counter()
+    result = audit.audit(transcripts, args.major)
+    elapsed = time.perf_counter() - start
+    audit.write(result, args.output_dir)
+
+    unknown = int((result['majors'] < 0).sum())
+    complete = int(((result['outstanding'].sum(axis=1) == 0) & (result['majors'] >= 0)).sum())
+    print(f"Audited {len(result['students'])} students in {elapsed * 1000:.1f} ms "
+          f"({'SciPy' if sparse is not None else 'NumPy'}); {complete} have no outstanding credits")
+    if unknown:
+        print(f"{unknown} students had no known major and were skipped")
@@ -0,0 +1,367 @@
+import argparse
+import csv
+import heapq
+import os
+import time
+from catalog_files import REQUIREMENT_CSVS, row_course_code
+from requirements_parser import is_satisfied, load_requirements, parse_requirement, requirement_courses
+from text_utils import CREDIT_VALUE_PATTERN
+
+# Plans the fewest semesters needed to finish a major from the scraped catalog.
+#
+# A course can be taken in a term once its prerequisites were completed in earlier terms and
+# its corequisites (and pre-or-corequisites) are completed earlier or taken in the same term.
+# Requirements come from the AND/OR trees in requirements.csv, so "MATH 1241 or MATH 1120" only
+# pulls one of the two into the plan. Each term holds at most max_credits credit hours.
+# As in the eligibility API, "or permission of the instructor" only counts with --allow-permission.
+#
+# Plans are built with list scheduling, always picking the available course that heads the
+# longest remaining prerequisite chain. When few enough courses are left, an exact
+# branch-and-bound search over maximal term loads replaces the heuristic result if it is shorter.
+#
+#   python scripts/degree_planner.py --major "Computer Science, B.S." --completed "MATH 1241" --max-credits 15
+
+DEFAULT_MAX_CREDITS = 18
+DEFAULT_CREDITS = 3
+DEFAULT_EXACT_LIMIT = 14
+
+def parse_credits(text):
+    # "3", "(3)", "1-4" or "3 or 4" all plan with the smallest listed value
+    match = CREDIT_VALUE_PATTERN.search(text or '')
+    if not match:
+        return DEFAULT_CREDITS
+    value = float(match.group())
+    return int(value) if value.is_integer() else value
+
+def load_catalog(data_dir='data'):
+    # Returns ({code: credits}, {(code, type): tree}) from the scraper's CSVs
+    credits = {}
+    with open(os.path.join(data_dir, 'courses.csv'), newline='', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            code = row_course_code(row)
+            credits.setdefault(code, parse_credits(row['Credits']))
+
+    requirements_path = os.path.join(data_dir, 'requirements.csv')
+    if os.path.exists(requirements_path):
+        return credits, load_requirements(requirements_path)
+
+    # Older scrapes only have the flat CSVs; every listed course is then required
+    listed = {}
+    for requirement_type, filename in REQUIREMENT_CSVS:
+        path = os.path.join(data_dir, filename)
+        if not os.path.exists(path):
+            continue
+        with open(path, newline='', encoding='utf-8') as f:
+            reader = csv.reader(f)
+            next(reader, None)
+            for row in reader:
+                if len(row) >= 2:
+                    listed.setdefault((row[0], requirement_type), []).append(row[1])
+    requirements = {key: parse_requirement(' and '.join(codes)) for key, codes in listed.items()}
+    return credits, requirements
+
+def load_major_categories(major, data_dir='data'):
+    # Returns [(category name, credit hours, [course codes])] for a major
+    categories = {}
+    with open(os.path.join(data_dir, 'major_categories.csv'), newline='', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            if row['Major'] == major:
+                hours = int(row['Credit Hours']) if row['Credit Hours'].isdigit() else 0
+                categories[row['Category ID']] = (row['Category Name'], hours, [])
+
+    if not categories:
+        raise ValueError(f"Unknown major: {major}")
+
+    with open(os.path.join(data_dir, 'category_courses.csv'), newline='', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            if row['Category ID'] in categories and row['Course'] not in categories[row['Category ID']][2]:
+                categories[row['Category ID']][2].append(row['Course'])
+    return list(categories.values())
+
+class DegreePlanner:
+    def __init__(self, credits, requirements, max_credits=DEFAULT_MAX_CREDITS, exact_limit=DEFAULT_EXACT_LIMIT,
+                 allow_permission=False):
+        self.credits = credits
+        self.requirements = requirements
+        self.max_credits = max_credits
+        self.exact_limit = exact_limit
+        self.allow_permission = allow_permission
+        self.concurrent = {}
+
+    @classmethod
+    def from_data_dir(cls, data_dir='data', **kwargs):
+        credits, requirements = load_catalog(data_dir)
+        return cls(credits, requirements, **kwargs)
+
+    def course_credits(self, code):
+        return self.credits.get(code, DEFAULT_CREDITS)
+
+    def satisfied(self, node, done):
+        # Same rule as the eligibility index: "or permission" alternatives only count with allow_permission
+        return is_satisfied(node, done, allow_permission=self.allow_permission)
+
+    def prerequisite_tree(self, code):
+        return self.requirements.get((code, 'prerequisite'))
+
+    def concurrent_tree(self, code):
+        # Corequisites and pre-or-corequisites both allow the same term
+        if code in self.concurrent:
+            return self.concurrent[code]
+        trees = [tree for tree in (self.requirements.get((code, 'corequisite')),
+                                   self.requirements.get((code, 'pre_or_corequisite'))) if tree]
+        tree = None if not trees else trees[0] if len(trees) == 1 else ('and', tuple(trees))
+        self.concurrent[code] = tree
+        return tree
+
+    # Choosing courses
+
+    def depth(self, code, memo, visiting=frozenset()):
+        # Longest prerequisite chain below a course, taking the shortest alternative of each OR
+        if code in memo:
+            return memo[code]
+        if code in visiting:
+            return 0
+        visiting = visiting | {code}
+
+        def tree_depth(node):
+            if node is None or node[0] == 'permission':
+                return 0
+            if node[0] == 'course':
+                return 1 + self.depth(node[1], memo, visiting)
+            depths = [tree_depth(child) for child in node[1]]
+            return max(depths) if node[0] == 'and' else min(depths)
+
+        memo[code] = max(tree_depth(self.prerequisite_tree(code)), tree_depth(self.concurrent_tree(code)) - 1, 0)
+        return memo[code]
+
+    def close_requirements(self, targets, completed):
+        # Adds every course the targets need, picking one branch of each OR:
+        # a branch already in the plan or completed if there is one, otherwise the shallowest
+        planned = dict.fromkeys(code for code in targets if code not in completed)
+        memo = {}
+
+        def choose(node):
+            if node is None or node[0] == 'permission':
+                return []
+            if node[0] == 'course':
+                return [] if node[1] in completed else [node[1]]
+            if node[0] == 'and':
+                return [code for child in node[1] for code in choose(child)]
+
+            def cost(child):
+                if child[0] == 'permission':
+                    return (2, 0)
+                needed = [code for code in choose(child) if code not in planned]
+                return (1 if needed else 0, sum(self.depth(code, memo) + 1 for code in needed))
+
+            return choose(min(node[1], key=cost))
+
+        queue = list(planned)
+        while queue:
+            code = queue.pop()
+            for tree in (self.prerequisite_tree(code), self.concurrent_tree(code)):
+                for required in choose(tree):
+                    if required not in planned:
+                        planned[required] = None
+                        queue.append(required)
+        return list(planned)
+
+    def major_targets(self, categories, completed):
+        # Categories whose listed courses fit their credit hours are required in full;
+        # otherwise completed courses count first, then the courses with the shortest chains
+        memo = {}
+        targets = {}
+        for name, hours, courses in categories:
+            total = sum(self.course_credits(code) for code in courses)
+            if not hours or total <= hours:
+                targets.update(dict.fromkeys(courses))
+                continue
+            earned = 0
+            for code in sorted(courses, key=lambda c: (c not in completed, self.depth(c, memo), c)):
+                if earned >= hours:
+                    break
+                if code not in targets:
+                    targets[code] = None
+                earned += self.course_credits(code)
+        return list(targets)
+
+    # Scheduling
+
+    def term_is_valid(self, term, done):
+        taking = done | term
+        return all(self.satisfied(self.concurrent_tree(code), taking) for code in term)
+
+    def list_schedule(self, courses, completed):
+        # Greedy term-by-term fill ordered by the longest remaining chain through the plan
+        remaining = set(courses)
+        successors = {code: [] for code in remaining}
+        for code in remaining:
+            for tree in (self.prerequisite_tree(code), self.concurrent_tree(code)):
+                for required in requirement_courses(tree):
+                    if required in successors and required != code:
+                        successors[required].append(code)
+
+        height = {}
+        def chain_height(code, visiting=frozenset()):
+            if code not in height:
+                if code in visiting:
+                    return 0
+                visiting = visiting | {code}
+                height[code] = 1 + max((chain_height(nxt, visiting) for nxt in successors[code]), default=0)
+            return height[code]
+        for code in remaining:
+            chain_height(code)
+
+        # Courses whose prerequisites are met wait in a heap ordered by chain height, then credits;
+        # finishing a course only rechecks the courses that name it as a prerequisite
+        dependents = {code: [] for code in remaining}
+        for code in remaining:
+            for required in requirement_courses(self.prerequisite_tree(code)):
+                if required in dependents:
+                    dependents[required].append(code)
+
+        done = set(completed)
+        ready = set()
+        heap = []
+        def make_ready(code):
+            if code not in ready and self.satisfied(self.prerequisite_tree(code), done):
+                ready.add(code)
+                heapq.heappush(heap, (-height[code], -self.course_credits(code), code))
+        for code in remaining:
+            make_ready(code)
+
+        terms = []
+        while remaining:
+            term = []
+            load = 0
+            deferred = []
+            while heap and load < self.max_credits:
+                entry = heapq.heappop(heap)
+                code = entry[2]
+                if code not in remaining or code in term:
+                    continue
+                bundle = self.bundle_with_corequisites(code, ready, done, term)
+                bundle_credits = sum(self.course_credits(c) for c in bundle) if bundle else 0
+                if bundle is None or (load + bundle_credits > self.max_credits and term):
+                    deferred.append(entry)
+                    continue
+                term.extend(bundle)
+                load += bundle_credits
+
+            if not term:
+                blocked = ', '.join(sorted(remaining))
+                raise ValueError(f"No schedulable course left; requirements cannot be met for: {blocked}")
+            for entry in deferred:
+                heapq.heappush(heap, entry)
+            terms.append(term)
+            done.update(term)
+            remaining.difference_update(term)
+            for code in term:
+                for dependent in dependents[code]:
+                    if dependent in remaining:
+                        make_ready(dependent)
+        return terms
+
+    def bundle_with_corequisites(self, code, available, done, term):
+        # The course plus whichever available courses its same-term requirements still need
+        bundle = [code]
+        changed = True
+        while changed:
+            changed = False
+            taking = done | set(term) | set(bundle)
+            for member in list(bundle):
+                tree = self.concurrent_tree(member)
+                if self.satisfied(tree, taking):
+                    continue
+                for required in requirement_courses(tree):
+                    if required in available and required not in taking:
+                        bundle.append(required)
+                        changed = True
+                        break
+                else:
+                    return None
+        return bundle if self.term_is_valid(set(term) | set(bundle), done) else None
+
+    def exact_schedule(self, courses, completed, upper_bound):
+        # Branch and bound over terms; each term takes a maximal set of available courses, since
+        # taking a course earlier never delays anything else
+        courses = sorted(courses)
+        if not courses:
+            return []
+        # Only plans shorter than the heuristic one are of interest
+        best = [upper_bound, None]
+        seen = {}
+
+        def maximal_terms(available, done):
+            valid = []
+            def extend(index, term, load):
+                if index == len(available):
+                    if term and self.term_is_valid(set(term), done):
+                        valid.append(frozenset(term))
+                    return
+                code = available[index]
+                credits = self.course_credits(code)
+                if load + credits <= self.max_credits or not term:
+                    extend(index + 1, term + [code], load + credits)
+                extend(index + 1, term, load)
+            extend(0, [], 0)
+            # Keep only loads that no other valid load contains
+            return [sorted(term) for term in valid if not any(term < other for other in valid)]
+
+        def search(done, remaining, terms):
+            if not remaining:
+                if len(terms) < best[0]:
+                    best[0], best[1] = len(terms), [list(term) for term in terms]
+                return
+            credits_left = sum(self.course_credits(code) for code in remaining)
+            lower = len(terms) + max(1, -(-credits_left // self.max_credits))
+            if lower >= best[0]:
+                return
+            key = frozenset(remaining)
+            if seen.get(key, float('inf')) <= len(terms):
+                return
+            seen[key] = len(terms)
+
+            available = [code for code in remaining if self.satisfied(self.prerequisite_tree(code), done)]
+            for term in maximal_terms(available, done):
+                search(done | set(term), remaining - set(term), terms + [term])
+
+        search(frozenset(completed), frozenset(courses), [])
+        return best[1]
+
+    def plan(self, targets, completed=()):
+        # Returns a list of terms, each a list of course codes
+        completed = set(completed)
+        courses = self.close_requirements(targets, completed)
+        terms = self.list_schedule(courses, completed)
+        if len(courses) <= self.exact_limit:
+            exact = self.exact_schedule(courses, completed, len(terms))
+            if exact is not None:
+                terms = exact
+        return terms
+
+    def plan_major(self, categories, completed=()):
+        return self.plan(self.major_targets(categories, set(completed)), completed)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Plan the fewest semesters to finish a major")
+    parser.add_argument('--major', required=True, help="major name as written in major_categories.csv")
+    parser.add_argument('--completed', nargs='*', default=[], help="course codes already completed")
+    parser.add_argument('--max-credits', type=float, default=DEFAULT_MAX_CREDITS, help="credit hours allowed per term")
+    parser.add_argument('--exact-limit', type=int, default=DEFAULT_EXACT_LIMIT,
+                        help="search for an optimal plan when at most this many courses remain (0 disables)")
+    parser.add_argument('--allow-permission', action='store_true',
+                        help="count \"or permission of the instructor\" alternatives as met")
+    parser.add_argument('--data-dir', default='data')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    planner = DegreePlanner.from_data_dir(args.data_dir, max_credits=args.max_credits, exact_limit=args.exact_limit,
+                                          allow_permission=args.allow_permission)
+    terms = planner.plan_major(load_major_categories(args.major, args.data_dir), args.completed)
+    elapsed = time.perf_counter() - start
+
+    for number, term in enumerate(terms, 1):
+        credits = sum(planner.course_credits(code) for code in term)
+        print(f"Term {number} ({credits} credits): {', '.join(term)}")
+    print(f"{len(terms)} terms, planned in {elapsed * 1000:.1f} ms")
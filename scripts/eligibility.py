@@ -0,0 +1,248 @@
+import argparse
+import csv
+import time
+from csv_sink import CsvSink
+from degree_planner import load_catalog
+from requirements_parser import is_satisfied, requirement_courses
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    from scipy import sparse
+except ImportError:
+    sparse = None
+
+# Answers "which courses can I take next?" for one student or a whole batch of them.
+#
+# Every requirement tree is compiled once into clauses (an AND of ORs). Each clause is a bitmask
+# over the catalog's courses and is met when the completed-courses mask shares a bit with it, so
+# "ITSC 1213 & (MATH 1241 | MATH 1120)" becomes two masks. A course is eligible when all clauses
+# of its prerequisites are met by completed courses and all clauses of its corequisites and
+# pre-or-corequisites are met by completed courses or courses eligible in the same term.
+# Completed courses are taken to meet any minimum grade.
+#
+# Batches run through NumPy when it is installed: students x courses times courses x clauses
+# gives every clause for every student in one matrix product. The clause matrices are sparse
+# (SciPy CSR) when SciPy is installed, and dense otherwise.
+#
+# A tree whose ORs multiply out into more than MAX_CLAUSES clauses is not compiled; its course
+# is checked against the tree itself (requirements_parser.is_satisfied) after the masks have run.
+#
+#   python scripts/eligibility.py --completed "ITSC 1212" "MATH 1241"
+#   python scripts/eligibility.py --students students.csv --output eligible.csv
+
+# ORs of ANDs multiply out into clauses; trees that would need more are evaluated directly
+MAX_CLAUSES = 256
+BATCH_ROWS = 1024
+
+class TooManyClauses(Exception):
+    pass
+
+def to_clauses(node):
+    # Returns a list of frozensets of course codes ('PERMISSION' for permission), ANDed together;
+    # raises TooManyClauses if that takes more than MAX_CLAUSES clauses
+    if node is None:
+        return []
+    if node[0] == 'course':
+        return [frozenset([node[1]])]
+    if node[0] == 'permission':
+        return [frozenset(['PERMISSION'])]
+    if node[0] == 'and':
+        return [clause for child in node[1] for clause in to_clauses(child)]
+
+    clauses = [frozenset()]
+    for child in node[1]:
+        child_clauses = to_clauses(child)
+        if len(clauses) * len(child_clauses) > MAX_CLAUSES:
+            raise TooManyClauses()
+        clauses = [a | b for a in clauses for b in child_clauses]
+    # A clause that contains another one is implied by it
+    return [c for c in clauses if not any(other < c for other in clauses)]
+
+class RequirementIndex:
+    def __init__(self, courses, requirements, allow_permission=False):
+        # Courses only named inside requirements still get a bit so they can be completed
+        codes = dict.fromkeys(courses)
+        for (course_id, _), tree in requirements.items():
+            codes.setdefault(course_id, None)
+            codes.update(dict.fromkeys(requirement_courses(tree)))
+        self.courses = list(codes)
+        self.index = {code: i for i, code in enumerate(self.courses)}
+        self.allow_permission = allow_permission
+        self.matrices = None
+
+        self.prereq_offsets, self.prereq_masks, self.prereq_trees = self.compile(requirements, ('prerequisite',))
+        self.concurrent_offsets, self.concurrent_masks, self.concurrent_trees = \
+            self.compile(requirements, ('corequisite', 'pre_or_corequisite'))
+        overflowing = sorted(set(self.prereq_trees) | set(self.concurrent_trees))
+        if overflowing:
+            print(f"Warning: requirements of {len(overflowing)} courses need more than {MAX_CLAUSES} clauses and are "
+                  f"checked against their trees instead: {', '.join(self.courses[i] for i in overflowing[:10])}")
+
+    @classmethod
+    def from_data_dir(cls, data_dir='data', allow_permission=False):
+        credits, requirements = load_catalog(data_dir)
+        return cls(credits, requirements, allow_permission)
+
+    def compile(self, requirements, types):
+        # Clause masks of every course in CSR form: masks[offsets[i]:offsets[i + 1]] belong to courses[i].
+        # Trees too large for clauses go into {course index: [trees]} instead.
+        offsets = [0]
+        masks = []
+        trees = {}
+        for i, code in enumerate(self.courses):
+            for requirement_type in types:
+                tree = requirements.get((code, requirement_type))
+                try:
+                    clauses = to_clauses(tree)
+                except TooManyClauses:
+                    trees.setdefault(i, []).append(tree)
+                    continue
+                for clause in clauses:
+                    if 'PERMISSION' in clause and self.allow_permission:
+                        continue
+                    # Without permission a clause of nothing but permission can't be met: mask 0
+                    masks.append(self.mask(c for c in clause if c != 'PERMISSION'))
+            offsets.append(len(masks))
+        return offsets, masks, trees
+
+    def trees_met(self, trees, satisfied):
+        return all(is_satisfied(tree, satisfied, allow_permission=self.allow_permission) for tree in trees)
+
+    def mask(self, codes):
+        # Codes outside the catalog are ignored; no requirement can refer to them
+        bits = 0
+        for code in codes:
+            if code in self.index:
+                bits |= 1 << self.index[code]
+        return bits
+
+    def met(self, offsets, masks, trees, taken):
+        # Bitmask of the courses whose clauses (or uncompiled trees) are all met by `taken`
+        bits = 0
+        satisfied = None
+        for i in range(len(offsets) - 1):
+            if not all(taken & masks[j] for j in range(offsets[i], offsets[i + 1])):
+                continue
+            if i in trees:
+                if satisfied is None:
+                    satisfied = {code for j, code in enumerate(self.courses) if taken >> j & 1}
+                if not self.trees_met(trees[i], satisfied):
+                    continue
+            bits |= 1 << i
+        return bits
+
+    def eligible(self, completed):
+        # Course codes a student who completed `completed` can take next, in catalog order
+        done = self.mask(completed)
+        ready = self.met(self.prereq_offsets, self.prereq_masks, self.prereq_trees, done) & ~done
+        ready &= self.met(self.concurrent_offsets, self.concurrent_masks, self.concurrent_trees, done | ready)
+        return [code for i, code in enumerate(self.courses) if ready >> i & 1]
+
+    # Batches
+
+    def clause_matrices(self, offsets, masks):
+        # courses x clauses membership and clauses x courses ownership, as float32 for BLAS
+        n = len(self.courses)
+        member_courses = []
+        member_clauses = []
+        for j, bits in enumerate(masks):
+            while bits:
+                low = bits & -bits
+                member_courses.append(low.bit_length() - 1)
+                member_clauses.append(j)
+                bits ^= low
+        owner_courses = np.repeat(np.arange(n), np.diff(offsets))
+
+        if sparse is not None:
+            members = sparse.csr_matrix((np.ones(len(member_courses), dtype=np.float32), (member_courses, member_clauses)),
+                                        shape=(n, len(masks)))
+            owners = sparse.csr_matrix((np.ones(len(masks), dtype=np.float32), owner_courses,
+                                        np.arange(len(masks) + 1)), shape=(len(masks), n))
+            return members, owners
+
+        members = np.zeros((n, len(masks)), dtype=np.float32)
+        owners = np.zeros((len(masks), n), dtype=np.float32)
+        members[member_courses, member_clauses] = 1
+        owners[np.arange(len(masks)), owner_courses] = 1
+        return members, owners
+
+    def check_trees(self, result, taken, trees):
+        # Clears result[row, i] where student row doesn't meet the uncompiled trees of course i
+        for i, course_trees in trees.items():
+            for row in np.flatnonzero(result[:, i]):
+                satisfied = {self.courses[j] for j in np.flatnonzero(taken[row])}
+                if not self.trees_met(course_trees, satisfied):
+                    result[row, i] = False
+
+    def eligible_matrix(self, taken):
+        # taken: students x courses 0/1 matrix; returns the students x courses eligibility matrix
+        if self.matrices is None:
+            self.matrices = (self.clause_matrices(self.prereq_offsets, self.prereq_masks),
+                             self.clause_matrices(self.concurrent_offsets, self.concurrent_masks))
+        (prereq_members, prereq_owners), (concurrent_members, concurrent_owners) = self.matrices
+
+        unmet = ((taken @ prereq_members) == 0).astype(np.float32) @ prereq_owners
+        ready = (unmet == 0) & (taken == 0)
+        self.check_trees(ready, taken, self.prereq_trees)
+        with_ready = np.maximum(taken, ready.astype(np.float32))
+        unmet = ((with_ready @ concurrent_members) == 0).astype(np.float32) @ concurrent_owners
+        eligible = ready & (unmet == 0)
+        self.check_trees(eligible, with_ready, self.concurrent_trees)
+        return eligible
+
+    def eligible_batch(self, students):
+        # students: {student id: iterable of completed codes}; returns {student id: [eligible codes]}
+        if np is None:
+            return {student: self.eligible(completed) for student, completed in students.items()}
+
+        results = {}
+        ids = list(students)
+        for start in range(0, len(ids), BATCH_ROWS):
+            chunk = ids[start:start + BATCH_ROWS]
+            taken = np.zeros((len(chunk), len(self.courses)), dtype=np.float32)
+            for row, student in enumerate(chunk):
+                taken[row, [self.index[code] for code in students[student] if code in self.index]] = 1
+            eligible = self.eligible_matrix(taken)
+            for row, student in enumerate(chunk):
+                results[student] = [self.courses[i] for i in np.flatnonzero(eligible[row])]
+        return results
+
+def load_students(path):
+    # Student records in long form: one "Student ID,Course" row per completed course
+    students = {}
+    with open(path, newline='', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            students.setdefault(row['Student ID'], []).append(row['Course'])
+    return students
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="List the courses students can take next")
+    parser.add_argument('--completed', nargs='*', help="course codes one student has completed")
+    parser.add_argument('--students', help="CSV of Student ID,Course rows for a batch of students")
+    parser.add_argument('--output', default='data/eligible_courses.csv', help="where the batch results go")
+    parser.add_argument('--allow-permission', action='store_true',
+                        help="count \"or permission of the instructor\" alternatives as met")
+    parser.add_argument('--data-dir', default='data')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    index = RequirementIndex.from_data_dir(args.data_dir, args.allow_permission)
+    print(f"Compiled {len(index.prereq_masks) + len(index.concurrent_masks)} requirement clauses "
+          f"for {len(index.courses)} courses in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    if args.students:
+        students = load_students(args.students)
+        start = time.perf_counter()
+        results = index.eligible_batch(students)
+        elapsed = time.perf_counter() - start
+        with CsvSink(args.output, ['Student ID', 'Course']) as sink:
+            for student, courses in results.items():
+                sink.writerows([student, code] for code in courses)
+        print(f"Checked {len(students)} students in {elapsed * 1000:.1f} ms; wrote {args.output}")
+    else:
+        for code in index.eligible(args.completed or []):
+            print(code)
@@ -0,0 +1,209 @@
+import argparse
+import csv
+import hashlib
+import json
+import os
+import sqlite3
+import time
+import numpy as np
+import requests
+from catalog_files import atomic_write
+from text_utils import search_tokens
+
+# Keeps course embeddings up to date without re-embedding the whole catalog.
+#
+# Every course's text ("Description Name", as setup-embeddings.js builds it) is hashed together
+# with the embedding model's name. Vectors live in data/embeddings.db keyed by that hash, so only
+# texts never seen before are sent to the embedder, in large batches. The store also remembers
+# which hash each course had when it was last handed to the vector database; a sync writes only
+# the courses whose hash moved, and the ones that disappeared, to data/embedding_delta.json.
+# `node scripts/setup-embeddings.js --from-delta` applies that file to ChromaDB and removes it.
+#
+#   python scripts/embedding_manager.py                      # OpenAI text-embedding-3-small
+#   python scripts/embedding_manager.py --embedder stand-in  # deterministic, offline, for tests
+
+DEFAULT_STORE_PATH = 'data/embeddings.db'
+DEFAULT_DELTA_PATH = 'data/embedding_delta.json'
+OPENAI_MODEL = 'text-embedding-3-small'
+OPENAI_URL = 'https://api.openai.com/v1/embeddings'
+OPENAI_BATCH_SIZE = 512
+STAND_IN_DIMENSIONS = 64
+MIN_TEXT_LENGTH = 20
+
+def course_text(row):
+    # Whitespace differences alone don't count as a change
+    return ' '.join(f"{row['Description'] or ''} {row['Name'] or ''}".split())
+
+def content_hash(model, text):
+    return hashlib.sha256(f'{model}\n{text}'.encode('utf-8')).hexdigest()
+
+class OpenAIEmbedder:
+    def __init__(self, model=OPENAI_MODEL, api_key=None, batch_size=OPENAI_BATCH_SIZE):
+        self.name = model
+        self.api_key = api_key or os.environ.get('OPENAI_API_KEY')
+        if not self.api_key:
+            raise SystemExit("OPENAI_API_KEY is not set; use --embedder stand-in to run offline")
+        self.batch_size = batch_size
+        self.session = requests.Session()
+
+    def embed(self, texts):
+        response = self.session.post(OPENAI_URL, timeout=120, json={
+            'model': self.name, 'input': list(texts), 'encoding_format': 'float',
+        }, headers={'Authorization': f'Bearer {self.api_key}'})
+        response.raise_for_status()
+        data = sorted(response.json()['data'], key=lambda item: item['index'])
+        return np.array([item['embedding'] for item in data], dtype=np.float32)
+
+class StandInEmbedder:
+    # Feature-hashed bag of words: deterministic, free and offline, but only lexical
+    def __init__(self, dimensions=STAND_IN_DIMENSIONS, batch_size=OPENAI_BATCH_SIZE):
+        self.name = f'stand-in-{dimensions}'
+        self.dimensions = dimensions
+        self.batch_size = batch_size
+        self.calls = 0
+
+    def embed(self, texts):
+        self.calls += 1
+        vectors = np.zeros((len(texts), self.dimensions), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in search_tokens(text):
+                digest = hashlib.blake2b(word.encode('utf-8'), digest_size=8).digest()
+                value = int.from_bytes(digest, 'little')
+                vectors[row, value % self.dimensions] += 1 if value >> 63 else -1
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1
+        return vectors / norms
+
+class EmbeddingStore:
+    def __init__(self, path=DEFAULT_STORE_PATH):
+        self.conn = sqlite3.connect(path)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.executescript('''
+            CREATE TABLE IF NOT EXISTS vectors (
+                hash TEXT PRIMARY KEY,
+                dimensions INTEGER NOT NULL,
+                vector BLOB NOT NULL
+            );
+            -- The hash each course had when it was last written to a delta
+            CREATE TABLE IF NOT EXISTS synced (
+                course_key TEXT PRIMARY KEY,
+                hash TEXT NOT NULL
+            );
+        ''')
+
+    def missing(self, hashes):
+        known = set()
+        hashes = list(hashes)
+        for start in range(0, len(hashes), 500):
+            chunk = hashes[start:start + 500]
+            rows = self.conn.execute(f'SELECT hash FROM vectors WHERE hash IN ({",".join("?" * len(chunk))})', chunk)
+            known.update(row[0] for row in rows)
+        return [h for h in hashes if h not in known]
+
+    def put(self, hashes, vectors):
+        with self.conn:
+            self.conn.executemany('INSERT OR REPLACE INTO vectors VALUES (?, ?, ?)',
+                                  [(h, len(vector), vector.astype(np.float32).tobytes())
+                                   for h, vector in zip(hashes, vectors)])
+
+    def get(self, hashes):
+        vectors = {}
+        hashes = list(hashes)
+        for start in range(0, len(hashes), 500):
+            chunk = hashes[start:start + 500]
+            rows = self.conn.execute(f'SELECT hash, vector FROM vectors WHERE hash IN ({",".join("?" * len(chunk))})',
+                                     chunk)
+            vectors.update((h, np.frombuffer(blob, dtype=np.float32)) for h, blob in rows)
+        return vectors
+
+    def synced(self):
+        return dict(self.conn.execute('SELECT course_key, hash FROM synced'))
+
+    def record_sync(self, upserted, deleted):
+        with self.conn:
+            self.conn.executemany('INSERT OR REPLACE INTO synced VALUES (?, ?)', upserted.items())
+            self.conn.executemany('DELETE FROM synced WHERE course_key = ?', [(key,) for key in deleted])
+
+    def close(self):
+        self.conn.close()
+
+class EmbeddingManager:
+    def __init__(self, store, embedder):
+        self.store = store
+        self.embedder = embedder
+
+    def embed_missing(self, texts_by_hash):
+        # Embeds, in batches, only the texts whose hash isn't in the store yet
+        missing = self.store.missing(texts_by_hash)
+        for start in range(0, len(missing), self.embedder.batch_size):
+            batch = missing[start:start + self.embedder.batch_size]
+            self.store.put(batch, self.embedder.embed([texts_by_hash[h] for h in batch]))
+        return len(missing)
+
+    def sync(self, courses_path='data/courses.csv', delta_path=DEFAULT_DELTA_PATH):
+        rows = {}
+        with open(courses_path, newline='', encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                if len(course_text(row)) >= MIN_TEXT_LENGTH:
+                    rows.setdefault(f"{row['Subject']}_{row['Number']}", row)
+
+        hashes = {key: content_hash(self.embedder.name, course_text(row)) for key, row in rows.items()}
+        embedded = self.embed_missing({h: course_text(rows[key]) for key, h in hashes.items()})
+
+        previous = self.store.synced()
+        upserted = {key: h for key, h in hashes.items() if previous.get(key) != h}
+        deleted = [key for key in previous if key not in hashes]
+
+        vectors = self.store.get(set(upserted.values()))
+        upserts = [{
+            'id': key,
+            'embedding': vectors[h].tolist(),
+            'document': course_text(rows[key]),
+            'metadata': {
+                'subject': rows[key]['Subject'],
+                'number': rows[key]['Number'],
+                'name': rows[key]['Name'] or '',
+                'description': rows[key]['Description'] or '',
+                'credits': rows[key]['Credits'] or '',
+                'restrictions': rows[key]['Restrictions'] or '',
+            },
+        } for key, h in upserted.items()]
+
+        write_delta(delta_path, self.embedder.name, upserts, deleted)
+        self.store.record_sync(upserted, deleted)
+        return {'courses': len(rows), 'embedded': embedded, 'upserted': len(upserts), 'deleted': len(deleted)}
+
+def write_delta(path, model, upserts, deleted):
+    # A delta that hasn't been applied yet is merged into, never overwritten
+    pending = {'model': model, 'upsert': [], 'delete': []}
+    if os.path.exists(path):
+        with open(path, encoding='utf-8') as f:
+            pending = json.load(f)
+        if pending['model'] != model:
+            raise SystemExit(f"{path} holds unapplied {pending['model']} vectors; apply it before switching models")
+
+    gone = set(deleted)
+    updated = {item['id']: item for item in pending['upsert'] if item['id'] not in gone}
+    updated.update((item['id'], item) for item in upserts)
+    removed = dict.fromkeys(key for key in pending['delete'] + deleted if key not in updated)
+
+    with atomic_write(path) as f:
+        json.dump({'model': model, 'upsert': list(updated.values()), 'delete': list(removed)}, f)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Embed new or changed courses and write the vector database delta")
+    parser.add_argument('--courses', default='data/courses.csv')
+    parser.add_argument('--store', default=DEFAULT_STORE_PATH)
+    parser.add_argument('--delta', default=DEFAULT_DELTA_PATH)
+    parser.add_argument('--embedder', choices=['openai', 'stand-in'], default='openai')
+    parser.add_argument('--model', default=OPENAI_MODEL, help="OpenAI embedding model")
+    args = parser.parse_args()
+
+    embedder = StandInEmbedder() if args.embedder == 'stand-in' else OpenAIEmbedder(args.model)
+    store = EmbeddingStore(args.store)
+    start = time.perf_counter()
+    stats = EmbeddingManager(store, embedder).sync(args.courses, args.delta)
+    store.close()
+    print(f"{stats['courses']} courses: embedded {stats['embedded']} new texts, "
+          f"{stats['upserted']} to upsert, {stats['deleted']} to delete "
+          f"({time.perf_counter() - start:.2f} s); wrote {args.delta}")
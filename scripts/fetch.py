@@ -0,0 +1,317 @@
+import collections
+import json
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+import requests
+from catalog_files import atomic_write
+from http_cache import CacheMiss
+
+# Shared fetch layer of the scrapers.
+#
+# Every request goes through a per-host token bucket and a per-host cap on requests in flight.
+# The bucket's rate adapts the way TCP congestion control does: each success raises it a little
+# (up to MAX_RATE), and each 429/503 or timeout halves it and honours Retry-After, so a run
+# settles near what the server tolerates without hand-tuned sleeps. Failed requests are retried
+# with exponential backoff and full jitter; a page that still fails raises FetchError, and
+# fetch_pages can instead record it in a DeadLetters file to be replayed later.
+#
+# The limiter is per process. When several processes scrape one host (catalog_pipeline.py),
+# each calls share_hosts first and takes its share of the host's rate and concurrency.
+
+DEFAULT_WORKERS = 8
+DEFAULT_TIMEOUT = (10, 60)
+DEFAULT_RETRIES = 4
+
+INITIAL_RATE = 8.0
+MIN_RATE = 0.5
+MAX_RATE = 100.0
+RATE_STEP = 0.5
+BACKOFF_BASE = 0.5
+BACKOFF_CAP = 30.0
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+THROTTLE_STATUSES = {429, 503}
+
+class FetchError(Exception):
+    def __init__(self, url, reason):
+        super().__init__(url, reason)
+        self.url = url
+        self.reason = reason
+
+    def __str__(self):
+        return f"{self.url}: {self.reason}"
+
+class DeadLetterError(Exception):
+    # Raised by a scrape that finished with dead pages, before its outputs are committed
+    pass
+
+class HostLimiter:
+    # Token bucket plus a cap on requests in flight for one host; the rate adapts to the host's
+    # responses. With share=n this process is one of n scraping the host and gets 1/n of the budget.
+
+    def __init__(self, rate=INITIAL_RATE, concurrency=DEFAULT_WORKERS, share=1):
+        self.share = share
+        self.rate = rate / share
+        self.min_rate = MIN_RATE / share
+        self.max_rate = MAX_RATE / share
+        self.rate_step = RATE_STEP / share
+        self.tokens = 1.0
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.lock = threading.Lock()
+        self.slots = threading.Condition(threading.Lock())
+        self.in_flight = 0
+        self.set_concurrency(concurrency)
+
+    def set_concurrency(self, concurrency):
+        with self.slots:
+            self.concurrency = max(1, concurrency // self.share)
+            self.slots.notify_all()
+
+    def _wait_time(self):
+        # Refills the bucket and takes a token if one is ready; otherwise returns the wait
+        now = time.monotonic()
+        if now < self.paused_until:
+            return self.paused_until - now
+        # Burst of at most one second's worth of requests
+        self.tokens = min(max(1.0, self.rate), self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0
+        return (1 - self.tokens) / self.rate
+
+    def acquire(self):
+        with self.slots:
+            while self.in_flight >= self.concurrency:
+                self.slots.wait()
+            self.in_flight += 1
+        while True:
+            with self.lock:
+                wait = self._wait_time()
+            if not wait:
+                return
+            time.sleep(wait)
+
+    def release(self):
+        with self.slots:
+            self.in_flight -= 1
+            self.slots.notify()
+
+    def succeeded(self):
+        with self.lock:
+            self.rate = min(self.max_rate, self.rate + self.rate_step)
+
+    def throttled(self, retry_after=None):
+        with self.lock:
+            self.rate = max(self.min_rate, self.rate / 2)
+            self.tokens = min(self.tokens, 0.0)
+            if retry_after:
+                self.paused_until = max(self.paused_until, time.monotonic() + retry_after)
+
+class RateLimiter:
+    def __init__(self, rate=INITIAL_RATE, concurrency=DEFAULT_WORKERS, shares=None):
+        self.rate = rate
+        self.concurrency = concurrency
+        # {host: number of processes scraping it at once}
+        self.shares = dict(shares or {})
+        self.hosts = {}
+        self.lock = threading.Lock()
+
+    def host(self, url):
+        host = urlsplit(url).netloc
+        with self.lock:
+            limiter = self.hosts.get(host)
+            if limiter is None:
+                limiter = self.hosts[host] = HostLimiter(self.rate, self.concurrency, self.shares.get(host, 1))
+            return limiter
+
+    def ensure_concurrency(self, concurrency):
+        # Raises the per-host cap to at least `concurrency` requests in flight (before shares)
+        with self.lock:
+            if concurrency <= self.concurrency:
+                return
+            self.concurrency = concurrency
+            for limiter in self.hosts.values():
+                limiter.set_concurrency(concurrency)
+
+    def set_shares(self, shares):
+        with self.lock:
+            self.shares = dict(shares)
+            self.hosts = {}
+
+# Shared by every session of a process, so two scrapers in one process can't double the load on a host
+DEFAULT_LIMITER = RateLimiter()
+
+def share_hosts(shares):
+    # For worker processes: {host: n} makes this process take 1/n of each host's rate and concurrency
+    DEFAULT_LIMITER.set_shares(shares)
+
+def backoff_delay(attempt):
+    # Full jitter: uniform in [0, min(cap, base * 2^attempt)]
+    return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt))
+
+def retry_after_seconds(response):
+    value = response.headers.get('Retry-After') if response is not None else None
+    try:
+        return min(BACKOFF_CAP, max(0.0, float(value)))
+    except (TypeError, ValueError):
+        # HTTP-date values are rare enough to fall back to the backoff delay
+        return None
+
+class PoliteSession(requests.Session):
+    # requests.Session whose requests are rate limited, time out and are retried.
+    # Responses that are still failures after the retries raise FetchError, so no caller
+    # mistakes an error page for an empty catalog page.
+
+    def __init__(self, limiter=None, timeout=DEFAULT_TIMEOUT, retries=DEFAULT_RETRIES):
+        super().__init__()
+        self.limiter = limiter or DEFAULT_LIMITER
+        self.timeout = timeout
+        self.retries = retries
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault('timeout', self.timeout)
+        host = self.limiter.host(url)
+
+        for attempt in range(self.retries + 1):
+            response = None
+            host.acquire()
+            try:
+                response = super().request(method, url, **kwargs)
+                reason = f"HTTP {response.status_code}"
+            except requests.RequestException as e:
+                # Connection errors and timeouts, but also bodies cut short or undecodable
+                reason = f"{type(e).__name__}: {e}"
+            finally:
+                host.release()
+
+            if response is not None and response.status_code not in RETRY_STATUSES:
+                host.succeeded()
+                if response.status_code >= 400:
+                    raise FetchError(url, reason)
+                return response
+
+            retry_after = retry_after_seconds(response)
+            if response is None or response.status_code in THROTTLE_STATUSES:
+                host.throttled(retry_after)
+            if attempt < self.retries:
+                time.sleep(retry_after if retry_after is not None else backoff_delay(attempt))
+
+        raise FetchError(url, f"{reason} after {self.retries + 1} attempts")
+
+def make_session(pool_size=DEFAULT_WORKERS, limiter=None, timeout=DEFAULT_TIMEOUT, retries=DEFAULT_RETRIES):
+    # One session shared by every worker so connections to the catalog host are kept alive;
+    # the host limiter lets all `pool_size` workers have a request in flight
+    session = PoliteSession(limiter, timeout, retries)
+    session.limiter.ensure_concurrency(pool_size)
+    adapter = requests.adapters.HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+def fetch_page(session, url, cache=None):
+    if cache is not None:
+        try:
+            return cache.get(session, url)
+        except CacheMiss:
+            # Offline runs report a missing page like any other failed fetch
+            raise FetchError(url, "no cached copy (offline)") from None
+    response = session.get(url)
+    return response.text
+
+class DeadLetters:
+    # Pages that failed after every retry, saved as JSON so a later run can replay just those
+
+    def __init__(self, path):
+        self.path = path
+        self.failures = {}
+        self.lock = threading.Lock()
+        if os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                self.failures = {item['url']: item for item in json.load(f)}
+
+    def add(self, error):
+        with self.lock:
+            previous = self.failures.get(error.url, {})
+            self.failures[error.url] = {'url': error.url, 'reason': error.reason, 'failed_at': time.time(),
+                                        'attempts': previous.get('attempts', 0) + 1}
+
+    def remove(self, url):
+        with self.lock:
+            self.failures.pop(url, None)
+
+    def urls(self):
+        return list(self.failures)
+
+    def __len__(self):
+        return len(self.failures)
+
+    def save(self):
+        if not self.failures:
+            if os.path.exists(self.path):
+                os.remove(self.path)
+            return
+        with atomic_write(self.path) as f:
+            json.dump(list(self.failures.values()), f, indent=2)
+
+    def replay(self, session, cache=None):
+        # Fetches every dead page again; the ones that now succeed leave the list (and land in
+        # the cache, so the scrape that follows reuses them). Returns how many still fail.
+        for url in self.urls():
+            try:
+                fetch_page(session, url, cache)
+                self.remove(url)
+            except FetchError as e:
+                self.add(e)
+        self.save()
+        return len(self)
+
+def replay_dead_letters(path, cache=None, session=None):
+    # Retries the pages a previous run gave up on; raises DeadLetterError if some still fail
+    dead_letters = DeadLetters(path)
+    if not dead_letters:
+        return
+    total = len(dead_letters)
+    remaining = dead_letters.replay(session or make_session(), cache)
+    print(f"Replayed {total} dead pages; {total - remaining} recovered")
+    if remaining:
+        raise DeadLetterError(f"{remaining} pages in {path} still fail")
+
+def fetch_pages(urls, workers=DEFAULT_WORKERS, session=None, cache=None, dead_letters=None):
+    # Yields page HTML in the same order as urls while up to `workers` requests are in flight.
+    # With dead_letters, pages that fail are recorded there and yielded as None instead of raising,
+    # and pages that succeed leave it.
+    urls = list(urls)
+    workers = max(1, workers)
+    session = session or make_session(workers)
+
+    def fetch(url):
+        try:
+            html = fetch_page(session, url, cache)
+        except FetchError as e:
+            if dead_letters is None:
+                raise
+            dead_letters.add(e)
+            return None
+        if dead_letters is not None:
+            dead_letters.remove(url)
+        return html
+
+    if workers == 1:
+        for url in urls:
+            yield fetch(url)
+        return
+
+    # At most two pages per worker run ahead of the consumer, so memory stays bounded however many pages there are
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = collections.deque()
+        for url in urls:
+            pending.append(executor.submit(fetch, url))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
@@ -0,0 +1,171 @@
+import argparse
+import csv
+import json
+import os
+import sqlite3
+from xml.sax.saxutils import escape
+from catalog_files import COURSE_CODE_SQL, REQUIREMENT_CSVS, row_course_code
+from course_ids import DEFAULT_IDS_FILE, load_course_ids
+
+# Exports the prerequisite graph for a major, a list of courses or the whole catalog as
+# Graphviz DOT, JSON (d3-style nodes/links) or GraphML.
+# All edges are loaded with one query against the SQLite store, or one scan of the CSVs.
+#
+#   python scripts/graph_export.py --major "Computer Science, B.S." --format dot > cs.dot
+#   python scripts/graph_export.py --format graphml --output catalog.graphml
+
+FORMATS = ['dot', 'json', 'graphml']
+
+def load_edges_from_csv(data_dir='data', courses=None):
+    # Returns [(course, required course, type)] in file order, optionally only for target courses in `courses`
+    edges = []
+    for requirement_type, filename in REQUIREMENT_CSVS:
+        path = os.path.join(data_dir, filename)
+        if not os.path.exists(path):
+            continue
+        with open(path, newline='', encoding='utf-8') as f:
+            reader = csv.reader(f)
+            next(reader, None)
+            for row in reader:
+                if len(row) >= 2 and (courses is None or row[0] in courses):
+                    edges.append((row[0], row[1], requirement_type))
+    return edges
+
+def load_edges_from_db(db_path, courses=None):
+    conn = sqlite3.connect(db_path)
+    query = f'''
+        SELECT {COURSE_CODE_SQL} AS code, relationships.related_code, relationships.type
+        FROM relationships JOIN courses ON relationships.target_course_id = courses.id
+    '''
+    if courses is None:
+        rows = conn.execute(query + ' ORDER BY relationships.id').fetchall()
+    else:
+        # One query for the whole set: the course codes go into a temp table joined on the (subject, number) index
+        conn.execute('CREATE TEMP TABLE wanted (subject TEXT, number TEXT, PRIMARY KEY (subject, number))')
+        conn.executemany('INSERT OR IGNORE INTO wanted VALUES (?, ?)',
+                         [tuple(code.split(' ', 1)) if ' ' in code else (code, '') for code in courses])
+        rows = conn.execute(query + ' JOIN wanted ON wanted.subject = courses.subject AND wanted.number = courses.number'
+                                    ' ORDER BY relationships.id').fetchall()
+    conn.close()
+    return rows
+
+def load_course_names(data_dir='data'):
+    names = {}
+    path = os.path.join(data_dir, 'courses.csv')
+    if os.path.exists(path):
+        with open(path, newline='', encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                code = row_course_code(row)
+                names.setdefault(code, row['Name'])
+    return names
+
+def load_major_courses(major, data_dir='data'):
+    # Course codes in every category of a major, from major_categories.csv and category_courses.csv
+    category_ids = set()
+    with open(os.path.join(data_dir, 'major_categories.csv'), newline='', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            if row['Major'] == major:
+                category_ids.add(row['Category ID'])
+
+    courses = {}
+    with open(os.path.join(data_dir, 'category_courses.csv'), newline='', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            if row['Category ID'] in category_ids:
+                courses.setdefault(row['Course'], None)
+    return list(courses)
+
+def build_graph(edges, courses=None, types=('prerequisite',)):
+    # Nodes are the requested courses plus anything they require; dicts keep first-seen order
+    nodes = dict.fromkeys(courses or [])
+    links = {}
+    for course, required, requirement_type in edges:
+        if requirement_type not in types:
+            continue
+        nodes.setdefault(course, None)
+        nodes.setdefault(required, None)
+        links.setdefault((required, course, requirement_type), None)
+    return list(nodes), list(links)
+
+def to_dot(nodes, links, names, title='prerequisites'):
+    title = title.replace('"', '\\"')
+    lines = [f'digraph "{title}" {{', '    rankdir=LR;']
+    for node in nodes:
+        label = node.replace('"', '\\"')
+        tooltip = names.get(node, '').replace('"', '\\"')
+        lines.append(f'    "{label}" [tooltip="{tooltip}"];')
+    for source, target, requirement_type in links:
+        style = '' if requirement_type == 'prerequisite' else ' [style=dashed]'
+        lines.append(f'    "{source}" -> "{target}"{style};')
+    lines.append('}')
+    return '\n'.join(lines) + '\n'
+
+def to_json(nodes, links, names, course_ids=None):
+    # With course_ids, nodes and link ends are the integer IDs of course_ids.py and nodes carry their code
+    if course_ids is not None:
+        return json.dumps({
+            'nodes': [{'id': course_ids.get(node), 'code': node, 'name': names.get(node, '')} for node in nodes],
+            'links': [{'source': course_ids.get(source), 'target': course_ids.get(target), 'type': requirement_type}
+                      for source, target, requirement_type in links],
+        }, indent=1) + '\n'
+    return json.dumps({
+        'nodes': [{'id': node, 'name': names.get(node, '')} for node in nodes],
+        'links': [{'source': source, 'target': target, 'type': requirement_type}
+                  for source, target, requirement_type in links],
+    }, indent=1) + '\n'
+
+def to_graphml(nodes, links, names):
+    lines = [
+        '<?xml version="1.0" encoding="UTF-8"?>',
+        '<graphml xmlns="http://graphml.graphdrawing.org/xmlns">',
+        '  <key id="name" for="node" attr.name="name" attr.type="string"/>',
+        '  <key id="type" for="edge" attr.name="type" attr.type="string"/>',
+        '  <graph id="prerequisites" edgedefault="directed">',
+    ]
+    for node in nodes:
+        lines.append(f'    <node id="{escape(node)}"><data key="name">{escape(names.get(node, ""))}</data></node>')
+    for source, target, requirement_type in links:
+        lines.append(f'    <edge source="{escape(source)}" target="{escape(target)}">'
+                     f'<data key="type">{requirement_type}</data></edge>')
+    lines.extend(['  </graph>', '</graphml>'])
+    return '\n'.join(lines) + '\n'
+
+def export_graph(fmt='dot', major=None, courses=None, data_dir='data', db_path=None, types=('prerequisite',),
+                 ids_path=None):
+    if major:
+        courses = load_major_courses(major, data_dir)
+    wanted = set(courses) if courses else None
+
+    if db_path:
+        edges = load_edges_from_db(db_path, wanted)
+    else:
+        edges = load_edges_from_csv(data_dir, wanted)
+
+    nodes, links = build_graph(edges, courses, types)
+    names = load_course_names(data_dir)
+    if fmt == 'json':
+        return to_json(nodes, links, names, load_course_ids(ids_path) if ids_path else None)
+    if fmt == 'graphml':
+        return to_graphml(nodes, links, names)
+    return to_dot(nodes, links, names, major or 'prerequisites')
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export the prerequisite graph")
+    parser.add_argument('--major', help="major name as written in major_categories.csv (default: whole catalog)")
+    parser.add_argument('--courses', nargs='*', help="explicit course codes instead of a major")
+    parser.add_argument('--format', choices=FORMATS, default='dot')
+    parser.add_argument('--data-dir', default='data')
+    parser.add_argument('--db', help="read edges from the SQLite store instead of the CSVs")
+    parser.add_argument('--all-types', action='store_true', help="include corequisite and pre-or-corequisite edges")
+    parser.add_argument('--output', help="write to a file instead of stdout")
+    parser.add_argument('--ids', nargs='?', const='', metavar='PATH',
+                        help=f"integer course IDs in JSON output (default dictionary: <data dir>/{DEFAULT_IDS_FILE})")
+    args = parser.parse_args()
+
+    types = ('prerequisite', 'corequisite', 'pre_or_corequisite') if args.all_types else ('prerequisite',)
+    ids_path = None if args.ids is None else args.ids or os.path.join(args.data_dir, DEFAULT_IDS_FILE)
+    output = export_graph(args.format, args.major, args.courses, args.data_dir, args.db, types, ids_path)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output)
+    else:
+        print(output, end='')
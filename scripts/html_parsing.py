@@ -0,0 +1,47 @@
+import functools
+import re
+from urllib.parse import urlsplit
+from bs4 import BeautifulSoup, SoupStrainer
+
+try:
+    import lxml  # noqa: F401
+    DEFAULT_PARSER = 'lxml'
+except ImportError:
+    DEFAULT_PARSER = 'html.parser'
+
+PARSERS = ['lxml', 'html.parser']
+
+# Pagination links of a course listing: filter[cpage]=N, URL-encoded or not
+PAGE_LINK_PATTERN = re.compile(r'filter(?:%5B|\[)cpage(?:%5D|\])=(\d+)')
+
+# Only the subtrees the extractors touch are built; everything else on the page is skipped
+COURSE_CELLS = SoupStrainer('td', class_='width')
+CONTENT_AREA = SoupStrainer('div', id='content-wrapper')
+
+def parse_course_cells(html, parser=DEFAULT_PARSER):
+    # Returns the td.width cells of a catalog course page
+    soup = BeautifulSoup(html, parser, parse_only=COURSE_CELLS)
+    return soup.find_all('td', class_='width')
+
+def parse_content_area(html, parser=DEFAULT_PARSER):
+    # Returns the div#content-wrapper of a program page, or None if the page has none
+    soup = BeautifulSoup(html, parser, parse_only=CONTENT_AREA)
+    return soup.find('div', {'id': 'content-wrapper'})
+
+@functools.lru_cache(maxsize=None)
+def major_link_pattern(catalog_url=None, catalog_id=None):
+    # Links to the program pages of an Acalog catalog: on catalog_url's host if given, on any
+    # host otherwise, or relative to the listing page; only into catalog year catalog_id if given
+    host = re.escape(urlsplit(catalog_url).netloc) if catalog_url else r'[^/?#]+'
+    catalog = rf'\?(?:[^#]*&)?catoid={int(catalog_id)}(?![0-9])' if catalog_id is not None else ''
+    return re.compile(rf'^(?:(?:https?:)?//{host})?/?preview_program\.php{catalog}')
+
+def parse_major_links(html, parser=DEFAULT_PARSER, catalog_url=None, catalog_id=None):
+    # Returns the program links on a programs listing page
+    pattern = major_link_pattern(catalog_url, catalog_id)
+    soup = BeautifulSoup(html, parser, parse_only=SoupStrainer('a', href=pattern))
+    return soup.find_all('a', href=pattern)
+
+def discover_page_count(html):
+    # Highest page number linked from a course listing page; 1 when it has no pagination
+    return max((int(page) for page in PAGE_LINK_PATTERN.findall(html)), default=1)
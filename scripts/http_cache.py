@@ -0,0 +1,102 @@
+import hashlib
+import json
+import os
+import time
+from catalog_files import atomic_write
+
+DEFAULT_CACHE_DIR = '.cache/http'
+
+class CacheMiss(Exception):
+    pass
+
+class HttpCache:
+    # On-disk response cache shared by the scrapers.
+    # Bodies are stored once under bodies/<sha256 of content>, and every URL gets a small
+    # entries/<sha256 of url>.json record pointing at its body along with the ETag and
+    # Last-Modified validators used to revalidate it on the next run.
+    # In offline mode nothing touches the network and missing pages raise CacheMiss.
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, offline=False):
+        self.cache_dir = cache_dir
+        self.offline = offline
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(os.path.join(cache_dir, 'entries'), exist_ok=True)
+        os.makedirs(os.path.join(cache_dir, 'bodies'), exist_ok=True)
+
+    @staticmethod
+    def cache_key(url):
+        # The fragment is never sent to the server, so it must not split the cache
+        return url.split('#', 1)[0]
+
+    def _entry_path(self, url):
+        digest = hashlib.sha256(self.cache_key(url).encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, 'entries', f'{digest}.json')
+
+    def _body_path(self, content_hash):
+        return os.path.join(self.cache_dir, 'bodies', content_hash)
+
+    def _write_atomic(self, path, data):
+        # Fetch threads may store the same URL or body at once; atomic_write gives each its own temp file
+        with atomic_write(path, 'wb') as f:
+            f.write(data)
+
+    def load(self, url):
+        entry_path = self._entry_path(url)
+        if not os.path.exists(entry_path):
+            return None, None
+        with open(entry_path, encoding='utf-8') as f:
+            entry = json.load(f)
+        body_path = self._body_path(entry['content_hash'])
+        if not os.path.exists(body_path):
+            return None, None
+        with open(body_path, encoding='utf-8') as f:
+            return entry, f.read()
+
+    def store(self, url, text, etag=None, last_modified=None):
+        data = text.encode('utf-8')
+        content_hash = hashlib.sha256(data).hexdigest()
+        body_path = self._body_path(content_hash)
+        # Bodies are content-addressed: if another thread or process wrote this one first, the
+        # file already has these bytes, and two concurrent writes replace it with the same bytes
+        if not os.path.exists(body_path):
+            self._write_atomic(body_path, data)
+
+        entry = {
+            'url': self.cache_key(url),
+            'content_hash': content_hash,
+            'etag': etag,
+            'last_modified': last_modified,
+            'fetched_at': time.time(),
+        }
+        self._write_atomic(self._entry_path(url), json.dumps(entry).encode('utf-8'))
+        return content_hash
+
+    def get(self, session, url, **kwargs):
+        entry, cached_text = self.load(url)
+
+        if self.offline:
+            if cached_text is None:
+                raise CacheMiss(f"No cached copy of {url}")
+            self.hits += 1
+            return cached_text
+
+        headers = dict(kwargs.pop('headers', None) or {})
+        if cached_text is not None:
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+
+        response = session.get(url, headers=headers, **kwargs)
+
+        if response.status_code == 304 and cached_text is not None:
+            self.hits += 1
+            return cached_text
+
+        self.misses += 1
+        if not response.ok:
+            # Error pages are passed through but never cached
+            return response.text
+        self.store(url, response.text, response.headers.get('ETag'), response.headers.get('Last-Modified'))
+        return response.text
@@ -0,0 +1,146 @@
+import glob
+import hashlib
+import json
+import os
+import uuid
+import weakref
+from catalog_files import atomic_write
+
+def remove_file(path):
+    if os.path.exists(path):
+        os.remove(path)
+
+def merge_changes(pending, changes):
+    # Net effect of two deltas on a consumer that has seen neither: a record is added if it didn't
+    # exist before the first, removed if it doesn't exist after the second, changed otherwise
+    first = {}
+    last = {}
+    for delta in (pending, changes):
+        for status in ('added', 'changed', 'removed'):
+            for record_id in delta[status]:
+                first.setdefault(record_id, status)
+                last[record_id] = status
+    merged = {'added': [], 'changed': [], 'removed': []}
+    for record_id, status in first.items():
+        existed = status != 'added'
+        exists = last[record_id] != 'removed'
+        if existed or exists:
+            merged['changed' if existed and exists else 'removed' if existed else 'added'].append(record_id)
+    return merged
+
+class Manifest:
+    # Remembers a hash of every source block (a course's td.width cell, a major's
+    # content-wrapper) together with the rows extracted from it on the last run.
+    # In incremental mode, blocks whose hash is unchanged reuse their stored rows instead
+    # of being re-extracted. Every run reports which blocks were added, changed or removed
+    # since the previous one, so downstream steps can process just the delta. The changes file
+    # is pending until its consumer deletes it (setup-embeddings.js --changed-only does once the
+    # delta is applied); runs in between merge their changes into it, so none are lost.
+    #
+    # Only keys, hashes and IDs stay in memory. Rows are streamed to a JSON-lines file next to
+    # the manifest, once per distinct hash, and the manifest stores each hash's byte offset in
+    # it; rows reused from the previous run are read back from the previous file by offset.
+    # Every run writes a new rows file, and the manifest names the one that belongs to it; saving
+    # removes every other rows file, including those of a previous manifest version.
+
+    def __init__(self, path, incremental=False, version=1):
+        self.path = path
+        self.incremental = incremental
+        self.version = version
+        self.previous = {}
+        self.previous_offsets = {}
+        self.previous_rows_path = None
+        self.previous_rows = None
+        self.current = {}
+        self.offsets = {}
+        self.rows_file = None
+        self.reused = 0
+
+        if os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                stored = json.load(f)
+            # Keys still give the change report when the rows can't be reused
+            self.previous = {key: {'hash': entry['hash'], 'id': entry['id']} for key, entry in stored['blocks'].items()}
+            rows_path = stored.get('rows_file') and os.path.join(os.path.dirname(path), stored['rows_file'])
+            if stored.get('version', 1) == version and rows_path and os.path.exists(rows_path):
+                # Rows depend only on the block's content, so a block that moved to another key can reuse them too
+                self.previous_offsets = stored['offsets']
+                self.previous_rows_path = rows_path
+
+        base = os.path.splitext(path)[0]
+        self.rows_path = f'{base}.rows.{uuid.uuid4().hex}.jsonl'
+        self.rows_pattern = f'{glob.escape(base)}.rows.*.jsonl'
+        # Rows of a run that never saves are removed with the manifest
+        self.discard = weakref.finalize(self, remove_file, self.rows_path)
+
+    @staticmethod
+    def hash_block(source):
+        return hashlib.sha256(source.encode('utf-8')).hexdigest()
+
+    def unique_key(self, key):
+        # The same header can appear twice in a catalog; keep both blocks apart
+        candidate = key
+        n = 2
+        while candidate in self.current:
+            candidate = f'{key}#{n}'
+            n += 1
+        return candidate
+
+    def lookup(self, key, block_hash):
+        if not self.incremental:
+            return None
+        offset = self.previous_offsets.get(block_hash)
+        if offset is None:
+            return None
+        if self.previous_rows is None:
+            self.previous_rows = open(self.previous_rows_path, 'rb')
+        self.previous_rows.seek(offset)
+        self.reused += 1
+        return json.loads(self.previous_rows.readline())
+
+    def known_hashes(self):
+        # Hashes whose rows lookup() can return, so workers can skip extracting those blocks
+        return frozenset(self.previous_offsets) if self.incremental else frozenset()
+
+    def record(self, key, block_hash, record_id, rows):
+        self.current[key] = {'hash': block_hash, 'id': record_id}
+        if block_hash in self.offsets:
+            return
+        if self.rows_file is None:
+            self.rows_file = open(self.rows_path, 'wb')
+        self.offsets[block_hash] = self.rows_file.tell()
+        self.rows_file.write(json.dumps(rows, ensure_ascii=False).encode('utf-8'))
+        self.rows_file.write(b'\n')
+
+    def changes(self):
+        added = [entry['id'] for key, entry in self.current.items() if key not in self.previous]
+        changed = [entry['id'] for key, entry in self.current.items()
+                   if key in self.previous and self.previous[key]['hash'] != entry['hash']]
+        removed = [entry['id'] for key, entry in self.previous.items() if key not in self.current]
+        return {'added': added, 'changed': changed, 'removed': removed}
+
+    def save(self, changes_path=None):
+        if self.rows_file is None:
+            self.rows_file = open(self.rows_path, 'wb')
+        self.rows_file.close()
+        with atomic_write(self.path) as f:
+            json.dump({'version': self.version, 'rows_file': os.path.basename(self.rows_path),
+                       'blocks': self.current, 'offsets': self.offsets}, f)
+        self.discard.detach()
+
+        # The manifest now points at the new rows file; no other one is needed
+        if self.previous_rows is not None:
+            self.previous_rows.close()
+        for rows_path in glob.glob(self.rows_pattern):
+            if rows_path != self.rows_path:
+                remove_file(rows_path)
+
+        changes = self.changes()
+        if changes_path:
+            pending = None
+            if os.path.exists(changes_path):
+                with open(changes_path, encoding='utf-8') as f:
+                    pending = json.load(f)
+            with atomic_write(changes_path) as f:
+                json.dump(merge_changes(pending, changes) if pending else changes, f, indent=2)
+        return changes
@@ -0,0 +1,197 @@
+import argparse
+import csv
+import json
+import os
+from catalog_files import atomic_write, row_course_code
+
+# Precomputes, once per catalog build, what the frontend otherwise works out per view:
+# the transitive prerequisite closure, the topological level and the longest prerequisite
+# chain of every course, plus any prerequisite cycles in the catalog.
+#
+# data/prereq_closure.json holds
+#   courses        course codes; every other array is indexed by position in this list
+#   ids            the course_ids.py ID of each course, when the dictionary was given
+#   offsets/prereqs  direct prerequisites in CSR form: prereqs[offsets[i]:offsets[i + 1]]
+#   closure        every transitive prerequisite of course i as a hex bitset (bit j = courses[j])
+#   levels         0 for courses without prerequisites, otherwise 1 + the highest prerequisite level
+#   chain_length   number of courses on the longest prerequisite chain ending at course i
+#   longest_chain  one longest chain in the catalog, first course first
+#   cycles         groups of courses that (transitively) require each other
+
+def load_prerequisite_edges(data_dir='data'):
+    courses = {}
+    courses_path = os.path.join(data_dir, 'courses.csv')
+    if os.path.exists(courses_path):
+        with open(courses_path, newline='', encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                courses.setdefault(row_course_code(row), None)
+
+    edges = []
+    with open(os.path.join(data_dir, 'prerequisites.csv'), newline='', encoding='utf-8') as f:
+        reader = csv.reader(f)
+        next(reader, None)
+        for row in reader:
+            if len(row) >= 2:
+                courses.setdefault(row[0], None)
+                courses.setdefault(row[1], None)
+                edges.append((row[0], row[1]))
+    return list(courses), edges
+
+def build_csr(courses, edges):
+    # Direct prerequisites of each course as offsets/targets arrays, duplicates removed
+    index = {course: i for i, course in enumerate(courses)}
+    adjacency = [[] for _ in courses]
+    seen = set()
+    for course, prereq in edges:
+        pair = (index[course], index[prereq])
+        if pair not in seen:
+            seen.add(pair)
+            adjacency[pair[0]].append(pair[1])
+
+    offsets = [0]
+    targets = []
+    for prereqs in adjacency:
+        targets.extend(prereqs)
+        offsets.append(len(targets))
+    return offsets, targets
+
+def strongly_connected_components(n, offsets, targets):
+    # Iterative Tarjan; components come out in reverse topological order of the
+    # condensed graph, i.e. every component after all components it depends on
+    index_of = [-1] * n
+    lowlink = [0] * n
+    on_stack = [False] * n
+    stack = []
+    components = []
+    counter = 0
+
+    for root in range(n):
+        if index_of[root] != -1:
+            continue
+        work = [(root, offsets[root])]
+        index_of[root] = lowlink[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack[root] = True
+
+        while work:
+            node, edge = work[-1]
+            if edge < offsets[node + 1]:
+                work[-1] = (node, edge + 1)
+                child = targets[edge]
+                if index_of[child] == -1:
+                    index_of[child] = lowlink[child] = counter
+                    counter += 1
+                    stack.append(child)
+                    on_stack[child] = True
+                    work.append((child, offsets[child]))
+                elif on_stack[child]:
+                    lowlink[node] = min(lowlink[node], index_of[child])
+                continue
+
+            work.pop()
+            if work:
+                parent = work[-1][0]
+                lowlink[parent] = min(lowlink[parent], lowlink[node])
+            if lowlink[node] == index_of[node]:
+                component = []
+                while True:
+                    member = stack.pop()
+                    on_stack[member] = False
+                    component.append(member)
+                    if member == node:
+                        break
+                components.append(component)
+    return components
+
+def compute_closure(courses, edges):
+    n = len(courses)
+    offsets, targets = build_csr(courses, edges)
+    components = strongly_connected_components(n, offsets, targets)
+
+    closure = [0] * n
+    levels = [0] * n
+    chain_length = [1] * n
+    chain_prev = [-1] * n
+    cycles = []
+
+    # Components arrive prerequisites-first, so each one only reads finished results
+    for component in components:
+        members = set(component)
+        is_cycle = len(component) > 1 or any(targets[e] == component[0]
+                                             for e in range(offsets[component[0]], offsets[component[0] + 1]))
+        if is_cycle:
+            cycles.append(sorted(courses[i] for i in component))
+
+        bits = 0
+        level = 0
+        length = 0
+        prev = -1
+        for node in component:
+            for e in range(offsets[node], offsets[node + 1]):
+                prereq = targets[e]
+                if prereq in members:
+                    continue
+                bits |= closure[prereq] | (1 << prereq)
+                level = max(level, levels[prereq] + 1)
+                if chain_length[prereq] > length:
+                    length = chain_length[prereq]
+                    prev = prereq
+
+        if is_cycle:
+            # Courses in a cycle all require each other, themselves included
+            for node in component:
+                bits |= 1 << node
+        for node in component:
+            closure[node] = bits
+            levels[node] = level
+            chain_length[node] = length + 1
+            chain_prev[node] = prev
+
+    longest_chain = []
+    if n:
+        node = max(range(n), key=lambda i: chain_length[i])
+        while node != -1:
+            longest_chain.append(courses[node])
+            node = chain_prev[node]
+        longest_chain.reverse()
+
+    return {
+        'courses': courses,
+        'offsets': offsets,
+        'prereqs': targets,
+        'closure': [format(bits, 'x') for bits in closure],
+        'levels': levels,
+        'chain_length': chain_length,
+        'longest_chain': longest_chain,
+        'cycles': cycles,
+    }
+
+def write_closure(data_dir='data', course_ids=None):
+    courses, edges = load_prerequisite_edges(data_dir)
+    artifact = compute_closure(courses, edges)
+    if course_ids is not None:
+        artifact['ids'] = course_ids.encode(courses).tolist()
+
+    with atomic_write(os.path.join(data_dir, 'prereq_closure.json')) as f:
+        json.dump(artifact, f, separators=(',', ':'))
+
+    for cycle in artifact['cycles']:
+        print(f"Prerequisite cycle: {', '.join(cycle)}")
+    return artifact
+
+def load_closure(data_dir='data'):
+    with open(os.path.join(data_dir, 'prereq_closure.json'), encoding='utf-8') as f:
+        artifact = json.load(f)
+    artifact['closure'] = [int(bits, 16) for bits in artifact['closure']]
+    return artifact
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Precompute prerequisite closure, levels and chains")
+    parser.add_argument('--data-dir', default='data')
+    args = parser.parse_args()
+
+    artifact = write_closure(args.data_dir)
+    print(f"{len(artifact['courses'])} courses, {len(artifact['prereqs'])} prerequisite edges, "
+          f"{len(artifact['cycles'])} cycles")
+    print(f"Longest prerequisite chain ({len(artifact['longest_chain'])} courses): {' -> '.join(artifact['longest_chain'])}")
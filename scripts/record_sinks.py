@@ -0,0 +1,89 @@
+import contextlib
+import json
+import os
+from catalog_files import temp_path
+from csv_sink import CsvSink
+
+# Sinks that consume the record streams of the scrapers.
+#
+# The scrapers are chains of generators (pages -> blocks -> typed records), so records reach
+# the sinks while later pages are still being fetched and only a bounded window of pages is
+# ever in memory. Every sink is a context manager with a write(record) method; like CsvSink,
+# it only replaces its previous output when the stream ends without an exception.
+#
+#   TableCsvSink   one CSV per table, the files server.js and the frontend read
+#   JsonlSink      one JSON object per record
+#   NullSink       counts records; for benchmarking the stages without output cost
+#   catalog_db.CourseStoreSink / MajorStoreSink   the SQLite store
+
+class TableCsvSink:
+    # tables: {file name: header}; to_rows(record) yields (file name, rows) pairs
+
+    def __init__(self, output_dir, tables, to_rows):
+        self.output_dir = output_dir
+        self.tables = tables
+        self.to_rows = to_rows
+        self.sinks = {}
+        self.count = 0
+
+    def __enter__(self):
+        self.stack = contextlib.ExitStack()
+        for name, header in self.tables.items():
+            self.sinks[name] = self.stack.enter_context(CsvSink(os.path.join(self.output_dir, name), header))
+        return self
+
+    def write(self, record):
+        self.count += 1
+        for name, rows in self.to_rows(record):
+            self.sinks[name].writerows(rows)
+
+    def __exit__(self, exc_type, exc, tb):
+        return self.stack.__exit__(exc_type, exc, tb)
+
+class JsonlSink:
+    def __init__(self, path):
+        self.path = path
+        self.tmp_path = temp_path(path)
+        self.count = 0
+
+    def __enter__(self):
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        self.file = open(self.tmp_path, 'w', encoding='utf-8')
+        return self
+
+    def write(self, record):
+        self.count += 1
+        self.file.write(json.dumps(record._asdict(), ensure_ascii=False))
+        self.file.write('\n')
+
+    def __exit__(self, exc_type, exc, tb):
+        self.file.close()
+        if exc_type is None:
+            os.replace(self.tmp_path, self.path)
+        elif os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
+        return False
+
+class NullSink:
+    def __init__(self):
+        self.count = 0
+
+    def __enter__(self):
+        return self
+
+    def write(self, record):
+        self.count += 1
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+def write_records(records, sinks):
+    # Feeds one stream to every sink; if the stream fails, every sink keeps its previous output
+    with contextlib.ExitStack() as stack:
+        sinks = [stack.enter_context(sink) for sink in sinks]
+        count = 0
+        for record in records:
+            for sink in sinks:
+                sink.write(record)
+            count += 1
+    return count
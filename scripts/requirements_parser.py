@@ -0,0 +1,283 @@
+import argparse
+import csv
+import re
+import time
+
+# Parses catalog requirement text such as
+#   "ITSC 1213 with a grade of C or above, and (MATH 1241 or MATH 1120)"
+# into an AND/OR tree, and writes it in a compact normalized form:
+#   "ITSC 1213:C & (MATH 1241 | MATH 1120)"
+# Grades may also lead ("C or better in ITSC 1213"). The compact form is accepted by the same
+# parser, so stored expressions can be read back.
+#
+# Tree nodes are tuples:
+#   ('course', 'MATH 1241', 'C')   grade is None when the text gives no minimum grade
+#   ('permission',)                "or permission of the department/instructor"
+#   ('and', (children,)), ('or', (children,))
+
+TOKEN_PATTERN = re.compile(r'''
+    (?P<pregrade>(?:an?\s+)?(?:minimum\s+)?grade\s+of\s+(?:at\s+least\s+)?["']?(?P<letter4>[A-D][+-]?|P)(?!\w)["']?
+                 (?:\s+or\s+(?:better|above|higher))?\s+in\b
+      | (?<!\w)(?:an?\s+)?["']?(?P<letter5>[A-D][+-]?)["']?\s+or\s+(?:better|above|higher)\s+in\b)
+  | (?P<grade>(?:with\s+)?(?:an?\s+)?(?:minimum\s+)?(?:grade\s+of\s+)(?:at\s+least\s+)?["']?(?P<letter>[A-D][+-]?|P)(?!\w)["']?
+              (?:\s+or\s+(?:better|above|higher))?
+      | with\s+(?:an?\s+)?["']?(?P<letter2>[A-D][+-]?)["']?\s+or\s+(?:better|above|higher)
+      | :(?P<letter3>[A-D][+-]?|P)(?![\w+-]))
+  | (?P<course>[A-Z]{4}\s+\d{4}L?)
+  | (?P<permission>\b(?:permission|consent)\b)
+  | (?P<lparen>[(\[])
+  | (?P<rparen>[)\]])
+  | (?P<semi>;)
+  | (?P<and>\band\b|&)
+  | (?P<or>\bor\b|\|)
+  | (?P<comma>,)
+''', re.VERBOSE | re.IGNORECASE)
+
+def tokenize(text):
+    tokens = []
+    for match in TOKEN_PATTERN.finditer(text):
+        kind = match.lastgroup
+        if match.group('pregrade'):
+            # "C or better in ITSC 1213": the grade comes first and applies to the next operand
+            tokens.append(('pregrade', (match.group('letter4') or match.group('letter5')).upper()))
+        elif match.group('grade'):
+            letter = match.group('letter') or match.group('letter2') or match.group('letter3')
+            tokens.append(('grade', letter.upper()))
+        elif kind == 'course':
+            # Course codes are case sensitive; "and" or "or" must not match the subject pattern
+            code = match.group('course')
+            if code[:4].isupper():
+                tokens.append(('course', ' '.join(code.split())))
+        else:
+            tokens.append((kind, None))
+    return tokens
+
+def apply_grade(node, grade):
+    # A grade after a group applies to every course in it that has no grade of its own
+    if node[0] == 'course':
+        return node if node[2] else ('course', node[1], grade)
+    if node[0] in ('and', 'or'):
+        return (node[0], tuple(apply_grade(child, grade) for child in node[1]))
+    return node
+
+def make_node(op, children):
+    # Flattens nested nodes of the same operator, drops duplicates and unwraps single children
+    flat = []
+    for child in children:
+        if child is None:
+            continue
+        if child[0] == op:
+            flat.extend(child[1])
+        else:
+            flat.append(child)
+    unique = tuple(dict.fromkeys(flat))
+    if not unique:
+        return None
+    if len(unique) == 1:
+        return unique[0]
+    return (op, unique)
+
+def join_operands(operands, operators):
+    # AND binds tighter than OR
+    chunks = [[operands[0]]]
+    for op, operand in zip(operators, operands[1:]):
+        if op == 'or':
+            chunks.append([operand])
+        else:
+            chunks[-1].append(operand)
+    return make_node('or', [make_node('and', chunk) for chunk in chunks])
+
+def resolve_commas(operators):
+    # A bare comma takes the meaning of the next explicit conjunction in the list ("A, B, or C"),
+    # falling back to the previous one and then to AND
+    resolved = []
+    for i, op in enumerate(operators):
+        if op == 'comma':
+            following = next((o for o in operators[i + 1:] if o != 'comma'), None)
+            preceding = next((o for o in reversed(resolved) if o != 'comma'), None)
+            op = following or preceding or 'and'
+        resolved.append(op)
+    return resolved
+
+def build_group(items):
+    # items alternate operand, operator, operand, ... where the operator is 'and', 'or', a bare
+    # 'comma', or ', and' / ', or' for a comma followed by a conjunction.
+    operands = items[0::2]
+    operators = items[1::2]
+
+    # Split at the commas into clauses
+    clauses = [([operands[0]], [])]
+    separators = []
+    for op, operand in zip(operators, operands[1:]):
+        if op in ('comma', ', and', ', or'):
+            separators.append(op)
+            clauses.append(([operand], []))
+        else:
+            clauses[-1][0].append(operand)
+            clauses[-1][1].append(op)
+
+    if any(op != 'comma' for op in separators) and any(ops for _, ops in clauses):
+        # ", and" / ", or" between clauses that have conjunctions of their own separate those
+        # clauses: "A or B, and C" is (A | B) & C, and "A or B, and C or D" is (A | B) & (C | D)
+        separators = resolve_commas([op if op == 'comma' else op[2:] for op in separators])
+        return join_operands([join_operands(*clause) for clause in clauses], separators)
+
+    # Otherwise the commas only separate list items ("A, B, or C", "A, B or C")
+    return join_operands(operands, resolve_commas([op[2:] if op.startswith(', ') else op for op in operators]))
+
+class _Parser:
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.pos = 0
+
+    def peek(self):
+        return self.tokens[self.pos][0] if self.pos < len(self.tokens) else None
+
+    def parse_level(self, depth=0):
+        # Semicolons separate independent requirements, all of which must be met,
+        # unless the next one opens with a conjunction ("...; or permission of instructor")
+        groups = []
+        joiner = 'and'
+        items = []
+        pending_grade = None
+        while self.pos < len(self.tokens):
+            kind, value = self.tokens[self.pos]
+            if kind == 'rparen' and depth:
+                break
+            self.pos += 1
+            if kind == 'rparen':
+                # Unmatched at the top level; skip it rather than drop the rest of the text
+                continue
+
+            if kind == 'semi':
+                groups.append((joiner, items))
+                joiner = 'and'
+                items = []
+                continue
+
+            operand = None
+            if kind == 'course':
+                operand = ('course', value, None)
+            elif kind == 'permission':
+                operand = ('permission',)
+            elif kind == 'lparen':
+                operand = self.parse_level(depth + 1)
+                if self.peek() == 'rparen':
+                    self.pos += 1
+            elif kind == 'pregrade':
+                pending_grade = value
+                continue
+            elif kind == 'grade':
+                # Applies to the operand just before it, even across a trailing comma
+                if items:
+                    last = len(items) - 1 if len(items) % 2 == 1 else len(items) - 2
+                    items[last] = apply_grade(items[last], value)
+                continue
+
+            if kind in ('and', 'or', 'comma'):
+                # Operators only count between two operands; stray or repeated ones are ignored
+                if len(items) % 2 == 1:
+                    items.append(kind)
+                elif items and kind != 'comma' and items[-1] == 'comma':
+                    items[-1] = f', {kind}'
+                elif not items and groups and kind != 'comma':
+                    joiner = kind
+                continue
+
+            if operand is None:
+                continue
+            if pending_grade:
+                operand = apply_grade(operand, pending_grade)
+                pending_grade = None
+            if len(items) % 2 == 1:
+                # Two operands in a row ("MATH 1241 MATH 1242") read as a list
+                items.append('comma')
+            items.append(operand)
+
+        groups.append((joiner, items))
+
+        node = None
+        for joiner, group in groups:
+            if len(group) % 2 == 0:
+                group = group[:-1]
+            if group:
+                node = make_node(joiner, [node, build_group(group)])
+        return node
+
+def parse_requirement(text):
+    # Returns the requirement tree for text, or None if it names no courses
+    if not text:
+        return None
+    return _Parser(tokenize(text)).parse_level()
+
+def format_requirement(node, parent=None):
+    if node is None:
+        return ''
+    if node[0] == 'course':
+        return f'{node[1]}:{node[2]}' if node[2] else node[1]
+    if node[0] == 'permission':
+        return 'PERMISSION'
+    separator = ' & ' if node[0] == 'and' else ' | '
+    text = separator.join(format_requirement(child, node[0]) for child in node[1])
+    return f'({text})' if parent else text
+
+def requirement_courses(node):
+    # Every course code mentioned anywhere in the tree
+    if node is None:
+        return []
+    if node[0] == 'course':
+        return [node[1]]
+    if node[0] == 'permission':
+        return []
+    courses = []
+    for child in node[1]:
+        courses.extend(requirement_courses(child))
+    return list(dict.fromkeys(courses))
+
+def is_satisfied(node, satisfied, grades=None, allow_permission=False):
+    # satisfied: set of course codes already met; grades optionally maps codes to letter grades
+    if node is None:
+        return True
+    kind = node[0]
+    if kind == 'course':
+        if node[1] not in satisfied:
+            return False
+        if node[2] and grades is not None and node[1] in grades:
+            return grade_at_least(grades[node[1]], node[2])
+        return True
+    if kind == 'permission':
+        return allow_permission
+    if kind == 'and':
+        return all(is_satisfied(child, satisfied, grades, allow_permission) for child in node[1])
+    return any(is_satisfied(child, satisfied, grades, allow_permission) for child in node[1])
+
+GRADE_POINTS = {'A+': 4.0, 'A': 4.0, 'A-': 3.7, 'B+': 3.3, 'B': 3.0, 'B-': 2.7, 'C+': 2.3, 'C': 2.0,
+                'C-': 1.7, 'D+': 1.3, 'D': 1.0, 'D-': 0.7, 'P': 2.0}
+
+def grade_at_least(grade, minimum):
+    return GRADE_POINTS.get(grade.upper(), 0.0) >= GRADE_POINTS.get(minimum.upper(), 0.0)
+
+def load_requirements(path='data/requirements.csv'):
+    # Returns {(course_id, type): tree} from the scraper's requirements.csv
+    requirements = {}
+    with open(path, newline='', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            requirements[(row['Course ID'], row['Type'])] = parse_requirement(row['Expression'])
+    return requirements
+
+if __name__ == "__main__":
+    # Re-parses the raw requirement text in requirements.csv and reports the throughput
+    parser = argparse.ArgumentParser(description="Parse prerequisite text into AND/OR expressions")
+    parser.add_argument('path', nargs='?', default='data/requirements.csv')
+    args = parser.parse_args()
+
+    with open(args.path, newline='', encoding='utf-8') as f:
+        texts = [row['Text'] for row in csv.DictReader(f)]
+
+    start = time.perf_counter()
+    expressions = [format_requirement(parse_requirement(text)) for text in texts]
+    elapsed = time.perf_counter() - start
+
+    print(f"Parsed {len(texts)} requirement texts in {elapsed * 1000:.1f} ms")
+    or_count = sum(1 for expression in expressions if '|' in expression)
+    print(f"{or_count} contain alternatives (OR)")
@@ -1,21 +1,55 @@
-import requests
-from bs4 import BeautifulSoup
-import csv
+import argparse
+import collections
+import itertools
 import os
-import re
-
-def clean_text(text):
-    # Remove HTML tags and decode HTML entities
-    text = re.sub(r'<[^>]+>', '', text)
-    text = text.replace('&amp;', '&')
-    text = text.replace('&nbsp;', ' ')
-    # Remove "Schedule of Classes" and clean up
-    text = re.sub(r'\s*Schedule of Classes\s*', '', text)
-    # Remove note text in parentheses
-    text = re.sub(r'\([^)]*\)', '', text)
-    return text.strip()
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from catalog_db import DEFAULT_DB_PATH, CourseStoreSink, DatabaseManager
+from catalog_files import REQUIREMENT_TYPES
+from catalog_snapshot import DEFAULT_SNAPSHOT_FILE, write_snapshot
+from fetch import (DEFAULT_WORKERS, DeadLetterError, DeadLetters, FetchError, fetch_page, fetch_pages, make_session,
+                   replay_dead_letters)
+from html_parsing import DEFAULT_PARSER, PARSERS, discover_page_count, parse_course_cells
+from http_cache import DEFAULT_CACHE_DIR, HttpCache
+from course_ids import write_edge_ids
+from course_search import DEFAULT_INDEX_PATH, build_search_index
+from manifest import Manifest
+from prereq_closure import write_closure
+from record_sinks import JsonlSink, NullSink, TableCsvSink, write_records
+from requirements_parser import format_requirement, parse_requirement
+from text_utils import clean_course_text, extract_course_codes, normalize_text
 
-def extract_text_until_next_section(element):
+CATALOG_BASE_URL = "https://catalog.charlotte.edu"
+DEFAULT_CATALOG_ID = 38
+DEFAULT_NAVOID = 4596
+# Bump when the shape of the rows stored in the manifest, or of its keys, changes
+COURSE_ROWS_VERSION = 4
+
+COURSES_PATH = "/content.php?filter%5B27%5D=-1&filter%5B29%5D=&filter%5Bkeyword%5D=&filter%5B32%5D=1&filter%5Bcpage%5D={page}&cur_cat_oid={catalog_id}&expand=1&navoid={navoid}&print=1#acalog_template_course_filter"
+
+OUTPUT_FORMATS = ['csv', 'jsonl', 'null']
+
+# Everything extracted from one course block; the requirement fields hold [course, required course] rows
+# and requirements holds [course, type, text, expression] rows
+CourseRecord = namedtuple('CourseRecord', ['course_id', 'course', 'prerequisites', 'corequisites',
+                                           'pre_or_corequisites', 'requirements'])
+
+COURSE_TABLES = {
+    'courses.csv': ['Name', 'Subject', 'Number', 'Credits', 'Description', 'Restrictions'],
+    'prerequisites.csv': ['Course ID', 'Required Course'],
+    'corequisites.csv': ['Course ID', 'Required Course'],
+    'pre_or_corequisites.csv': ['Course ID', 'Required Course'],
+    'requirements.csv': ['Course ID', 'Type', 'Text', 'Expression'],
+}
+
+# Catalog heading of each of catalog_files.REQUIREMENT_TYPES
+REQUIREMENT_LABELS = {
+    'prerequisite': "Prerequisite(s):",
+    'corequisite': "Corequisite(s):",
+    'pre_or_corequisite': "Pre- or Corequisite(s):",
+}
+
+def raw_text_until_next_section(element):
     text_parts = []
     current = element.next_sibling
     
@@ -26,19 +60,17 @@ def extract_text_until_next_section(element):
             text_parts.append(current.get_text().strip())
         current = current.next_sibling
     
-    return clean_text(' '.join(filter(None, text_parts)))
+    return ' '.join(filter(None, text_parts))
 
-def extract_course_codes(text):
-    # Regular expression to match course codes (e.g., "ACCT 2121" or "ACCT 2121L")
-    course_pattern = r'[A-Z]{4}\s+\d{4}L?'
-    return re.findall(course_pattern, text)
+def extract_text_until_next_section(element):
+    return clean_course_text(raw_text_until_next_section(element))
 
 def split_requirements(text):
     if not text:
         return []
     
     # Clean the text first
-    text = clean_text(text)
+    text = clean_course_text(text)
     
     # Find all course codes
     courses = extract_course_codes(text)
@@ -54,115 +86,284 @@ def split_requirements(text):
     
     return relationships
 
-def scrape_courses_to_csv():
-    # Create data directory if it doesn't exist
-    os.makedirs('data', exist_ok=True)
+def extract_requirement_rows(course, course_id, requirement_type, label):
+    # Returns the flat [course, required course] rows and the structured expression row for one requirement
+    rows = []
+    expression_row = None
+    requirements_text = course.find('strong', string=label)
+    if requirements_text:
+        raw_requirements = raw_text_until_next_section(requirements_text)
+        requirements = clean_course_text(raw_requirements)
+        if requirements:
+            for req_course in split_requirements(requirements):
+                rows.append([course_id, req_course])
+
+        # Parenthesised groups matter here, so the tree is parsed from the text before notes are stripped
+        raw_requirements = normalize_text(raw_requirements).strip()
+        expression = format_requirement(parse_requirement(raw_requirements))
+        if expression:
+            expression_row = [course_id, requirement_type, raw_requirements, expression]
+    return rows, expression_row
+
+def split_course_header(course_text):
+    # "ITSC 1212 - Introduction to Computer Science I" -> (name, subject, number, course ID)
+    if ' - ' in course_text:
+        course_parts = course_text.split(' - ')
+        course_name = course_parts[1]
+        course_code = course_parts[0]
+    else:
+        course_name = course_text
+        course_code = course_text
 
-    # Initialize CSV files
-    with open('data/courses.csv', mode='w', newline='', encoding='utf-8') as courses_file:
-        courses_writer = csv.writer(courses_file)
-        courses_writer.writerow(['Name', 'Subject', 'Number', 'Credits', 'Description', 'Restrictions'])
+    # Split course code into subject and number
+    code_parts = course_code.split()
+    if len(code_parts) >= 2:
+        return course_name, code_parts[0], code_parts[1], f"{code_parts[0]} {code_parts[1]}"
+    return course_name, course_code, '', course_code
 
-    with open('data/prerequisites.csv', mode='w', newline='', encoding='utf-8') as prereqs_file:
-        prereqs_writer = csv.writer(prereqs_file)
-        prereqs_writer.writerow(['Course ID', 'Required Course'])
+def course_block_key(course):
+    # Blocks are keyed by course code, so a retitled course is reported as changed, not removed and added
+    course_header = course.find('h3')
+    course_text = course_header.get_text(strip=True) if course_header else None
+    return split_course_header(course_text)[3] if course_text else None
 
-    with open('data/corequisites.csv', mode='w', newline='', encoding='utf-8') as coreqs_file:
-        coreqs_writer = csv.writer(coreqs_file)
-        coreqs_writer.writerow(['Course ID', 'Required Course'])
+def extract_course(course):
+    # Returns the CourseRecord of one td.width course block
+    course_name, course_subject, course_number, course_id = split_course_header(course.find('h3').get_text(strip=True))
 
-    with open('data/pre_or_corequisites.csv', mode='w', newline='', encoding='utf-8') as pre_or_coreqs_file:
-        pre_or_coreqs_writer = csv.writer(pre_or_coreqs_file)
-        pre_or_coreqs_writer.writerow(['Course ID', 'Required Course'])
+    # Extract description
+    description_text = course.find('hr')
+    description = extract_text_until_next_section(description_text) if description_text else None
 
-    # Process all 37 pages
-    for page in range(1, 38):
+    # Extract credits
+    credits_text = course.find('strong', string="Credit Hours:")
+    credits = extract_text_until_next_section(credits_text) if credits_text else None
+
+    # Extract restrictions
+    restrictions_text = course.find('strong', string="Restriction(s):")
+    restrictions = extract_text_until_next_section(restrictions_text) if restrictions_text else None
+
+    course_row = [course_name, course_subject, course_number, credits, description, restrictions]
+
+    # Extract prerequisites, corequisites and pre-or corequisites
+    requirement_rows = []
+    expression_rows = []
+    for requirement_type in REQUIREMENT_TYPES:
+        rows, expression_row = extract_requirement_rows(course, course_id, requirement_type,
+                                                        REQUIREMENT_LABELS[requirement_type])
+        requirement_rows.append(rows)
+        if expression_row:
+            expression_rows.append(expression_row)
+    prereq_rows, coreq_rows, pre_or_coreq_rows = requirement_rows
+
+    return CourseRecord(course_id, course_row, prereq_rows, coreq_rows, pre_or_coreq_rows, expression_rows)
+
+def course_table_rows(record):
+    return [
+        ('courses.csv', [record.course]),
+        ('prerequisites.csv', record.prerequisites),
+        ('corequisites.csv', record.corequisites),
+        ('pre_or_corequisites.csv', record.pre_or_corequisites),
+        ('requirements.csv', record.requirements),
+    ]
+
+def fetched_pages(pages, dead_letters=None):
+    # (page number, html) pairs, without the pages that could not be fetched (None). The stream
+    # fails at its end if there were any, so the sinks keep their previous outputs.
+    for page, html in pages:
+        if html is None:
+            print(f"Could not fetch page {page}")
+            continue
+        yield page, html
+
+    if dead_letters:
+        dead_letters.save()
+        raise DeadLetterError(f"{len(dead_letters)} pages failed; kept the previous outputs and listed the pages in "
+                              f"{dead_letters.path} (rerun with --replay)")
+
+def course_blocks(pages, parser=DEFAULT_PARSER):
+    # (page number, html) pairs -> td.width course blocks, one page at a time
+    for page, html in pages:
         print(f"Processing page {page}...")
-        url = f"https://catalog.charlotte.edu/content.php?filter%5B27%5D=-1&filter%5B29%5D=&filter%5Bkeyword%5D=&filter%5B32%5D=1&filter%5Bcpage%5D={page}&cur_cat_oid=38&expand=1&navoid=4596&print=1#acalog_template_course_filter"
-        response = requests.get(url)
-        soup = BeautifulSoup(response.text, 'html.parser')
-        course_data = soup.findAll('td', class_='width')
-
-        for course in course_data:
-            try:
-                # Extract course details
-                course_header = course.find('h3')
-                if not course_header:
-                    continue
-                    
-                course_text = course_header.get_text(strip=True)
-                if ' - ' in course_text:
-                    course_parts = course_text.split(' - ')
-                    course_name = course_parts[1]
-                    course_code = course_parts[0]
-                else:
-                    course_name = course_text
-                    course_code = course_text
-                
-                # Split course code into subject and number
-                code_parts = course_code.split()
-                if len(code_parts) >= 2:
-                    course_subject = code_parts[0]
-                    course_number = code_parts[1]
-                    course_id = f"{course_subject} {course_number}"
-                else:
-                    course_subject = course_code
-                    course_number = ''
-                    course_id = course_code
-
-                # Extract description
-                description_text = course.find('hr')
-                description = extract_text_until_next_section(description_text) if description_text else None
-
-                # Extract credits
-                credits_text = course.find('strong', string="Credit Hours:")
-                credits = extract_text_until_next_section(credits_text) if credits_text else None
-
-                # Extract restrictions
-                restrictions_text = course.find('strong', string="Restriction(s):")
-                restrictions = extract_text_until_next_section(restrictions_text) if restrictions_text else None
-
-                # Write course details
-                with open('data/courses.csv', mode='a', newline='', encoding='utf-8') as courses_file:
-                    courses_writer = csv.writer(courses_file)
-                    courses_writer.writerow([course_name, course_subject, course_number, credits, description, restrictions])
-
-                # Extract and write prerequisites
-                prerequisites_text = course.find('strong', string="Prerequisite(s):")
-                if prerequisites_text:
-                    prerequisites = extract_text_until_next_section(prerequisites_text)
-                    if prerequisites:
-                        prereq_relationships = split_requirements(prerequisites)
-                        with open('data/prerequisites.csv', mode='a', newline='', encoding='utf-8') as prereqs_file:
-                            prereqs_writer = csv.writer(prereqs_file)
-                            for req_course in prereq_relationships:
-                                prereqs_writer.writerow([course_id, req_course])
-
-                # Extract and write corequisites
-                corequisites_text = course.find('strong', string="Corequisite(s):")
-                if corequisites_text:
-                    corequisites = extract_text_until_next_section(corequisites_text)
-                    if corequisites:
-                        coreq_relationships = split_requirements(corequisites)
-                        with open('data/corequisites.csv', mode='a', newline='', encoding='utf-8') as coreqs_file:
-                            coreqs_writer = csv.writer(coreqs_file)
-                            for req_course in coreq_relationships:
-                                coreqs_writer.writerow([course_id, req_course])
-
-                # Extract and write pre-or corequisites
-                pre_or_corequisites_text = course.find('strong', string="Pre- or Corequisite(s):")
-                if pre_or_corequisites_text:
-                    pre_or_corequisites = extract_text_until_next_section(pre_or_corequisites_text)
-                    if pre_or_corequisites:
-                        pre_or_coreq_relationships = split_requirements(pre_or_corequisites)
-                        with open('data/pre_or_corequisites.csv', mode='a', newline='', encoding='utf-8') as pre_or_coreqs_file:
-                            pre_or_coreqs_writer = csv.writer(pre_or_coreqs_file)
-                            for req_course in pre_or_coreq_relationships:
-                                pre_or_coreqs_writer.writerow([course_id, req_course])
-
-            except Exception as e:
-                print(f"Error processing course: {e}")
+        yield from parse_course_cells(html, parser)
+
+def course_records(blocks, manifest):
+    # Course blocks -> CourseRecords; in incremental mode unchanged blocks reuse their stored record
+    for course in blocks:
+        try:
+            key = course_block_key(course)
+            if not key:
+                continue
+            key = manifest.unique_key(key)
+            block_hash = Manifest.hash_block(str(course))
+
+            stored = manifest.lookup(key, block_hash)
+            record = extract_course(course) if stored is None else CourseRecord(*stored)
+            manifest.record(key, block_hash, record.course_id, record)
+        except Exception as e:
+            print(f"Error processing course: {e}")
+            continue
+        yield record
+
+# Hashes the parent already has records for, set once per worker process by init_parse_worker
+known_block_hashes = frozenset()
+
+def init_parse_worker(known_hashes):
+    global known_block_hashes
+    known_block_hashes = known_hashes
+
+def parse_page(html, parser=DEFAULT_PARSER):
+    # Worker side of the process-pool mode: page html -> [(block key, block hash, record tuple)].
+    # Only strings, lists and tuples cross back to the parent; the record is None for blocks
+    # the parent's manifest already holds.
+    results = []
+    for course in parse_course_cells(html, parser):
+        try:
+            key = course_block_key(course)
+            if not key:
+                continue
+            block_hash = Manifest.hash_block(str(course))
+            record = None if block_hash in known_block_hashes else tuple(extract_course(course))
+        except Exception as e:
+            print(f"Error processing course: {e}")
+            continue
+        results.append((key, block_hash, record))
+    return results
+
+def parallel_course_records(pages, manifest, parser=DEFAULT_PARSER, processes=None):
+    # Same records as course_records(course_blocks(pages)), with the parsing and extraction spread
+    # over worker processes. Pages are handed out as they arrive and merged back in page order,
+    # with at most two pages per process in flight.
+    processes = processes or os.cpu_count()
+    with ProcessPoolExecutor(processes, initializer=init_parse_worker, initargs=(manifest.known_hashes(),)) as pool:
+        pending = collections.deque()
+
+        def merged(page, future):
+            print(f"Processing page {page}...")
+            for key, block_hash, record in future.result():
+                key = manifest.unique_key(key)
+                stored = manifest.lookup(key, block_hash) if record is None else None
+                record = CourseRecord(*(record if stored is None else stored))
+                manifest.record(key, block_hash, record.course_id, record)
+                yield record
+
+        for page, html in pages:
+            pending.append((page, pool.submit(parse_page, html, parser)))
+            if len(pending) >= 2 * processes:
+                yield from merged(*pending.popleft())
+        while pending:
+            yield from merged(*pending.popleft())
+
+def course_sinks(output_dir, formats=('csv',), db_path=None):
+    sinks = []
+    if 'csv' in formats:
+        sinks.append(TableCsvSink(output_dir, COURSE_TABLES, course_table_rows))
+    if 'jsonl' in formats:
+        sinks.append(JsonlSink(os.path.join(output_dir, 'courses.jsonl')))
+    if 'null' in formats:
+        sinks.append(NullSink())
+    if db_path:
+        sinks.append(CourseStoreSink(DatabaseManager(db_path)))
+    return sinks
+
+def scrape_courses_to_csv(workers=DEFAULT_WORKERS, base_url=CATALOG_BASE_URL, cache=None, parser=DEFAULT_PARSER,
+                          incremental=False, db_path=None, catalog_id=DEFAULT_CATALOG_ID, navoid=DEFAULT_NAVOID,
+                          pages=None, output_dir='data', formats=('csv',), processes=0, course_ids_path=None):
+    def output_path(name):
+        return os.path.join(output_dir, name)
+
+    def page_url(page):
+        return base_url + COURSES_PATH.format(page=page, catalog_id=catalog_id, navoid=navoid)
+
+    # Create the output directory if it doesn't exist
+    os.makedirs(output_dir, exist_ok=True)
+
+    # Hashes of every course block from the previous run; unchanged blocks reuse their rows in incremental mode
+    manifest = Manifest(output_path('courses_manifest.json'), incremental, version=COURSE_ROWS_VERSION)
+    # Pages that fail after every retry; the run then keeps the previous outputs
+    dead_letters = DeadLetters(output_path('courses_dead_letters.json'))
+
+    # Page 1 comes first and tells how many pages the catalog has, unless given;
+    # the rest are fetched concurrently but parsed in page order
+    session = make_session(workers)
+    first_page = fetch_page(session, page_url(1), cache)
+    pages = range(1, (pages or discover_page_count(first_page)) + 1)
+    print(f"Catalog {catalog_id} has {len(pages)} pages")
+    htmls = itertools.chain([first_page], fetch_pages([page_url(page) for page in pages[1:]], workers, session,
+                                                      cache, dead_letters))
+
+    pages = fetched_pages(zip(pages, htmls), dead_letters)
+    if processes:
+        records = parallel_course_records(pages, manifest, parser, processes)
+    else:
+        records = course_records(course_blocks(pages, parser), manifest)
+    sinks = course_sinks(output_dir, formats, db_path)
+    count = write_records(records, sinks)
+    dead_letters.save()
+    if db_path:
+        print(f"Loaded {count} courses into {db_path}")
+
+    changes = manifest.save(output_path('courses_changes.json'))
+    print(f"Reused {manifest.reused} unchanged courses; {len(changes['added'])} added, "
+          f"{len(changes['changed'])} changed, {len(changes['removed'])} removed")
+
+    if 'csv' not in formats:
+        return
+
+    # Integer course IDs for the requirement edges, from the (possibly shared) ID dictionary
+    course_ids = write_edge_ids(output_dir, course_ids_path)
+    print(f"Wrote requirement_edges.csv; the dictionary has {len(course_ids)} course IDs")
+
+    # Closure, levels and longest chains for the frontend, next to prerequisites.csv
+    closure = write_closure(output_dir, course_ids)
+    print(f"Wrote prerequisite closure for {len(closure['courses'])} courses "
+          f"({len(closure['cycles'])} cycles)")
+
+    # Keyword search index for the server's fallback path
+    index_path = output_path(os.path.basename(DEFAULT_INDEX_PATH))
+    courses, terms = build_search_index(output_path('courses.csv'), index_path)
+    print(f"Indexed {courses} courses and {terms} search terms in {index_path}")
+
+    # Binary snapshot for readers that mmap the catalog; picks up the majors' CSVs if they are here too
+    counts = write_snapshot(output_dir, course_ids_path)
+    print(f"Wrote {DEFAULT_SNAPSHOT_FILE} with {counts['courses']} courses and {counts['categories']} categories")
 
 if __name__ == "__main__":
-    scrape_courses_to_csv()
+    parser = argparse.ArgumentParser(description="Scrape the course catalog into data/*.csv")
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help="number of pages fetched concurrently")
+    parser.add_argument('--base-url', default=CATALOG_BASE_URL, help="catalog host, e.g. a local stand-in server")
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR, help="on-disk HTTP cache directory")
+    parser.add_argument('--no-cache', action='store_true', help="always download pages from scratch")
+    parser.add_argument('--offline', action='store_true', help="replay cached pages without touching the network")
+    parser.add_argument('--parser', choices=PARSERS, default=DEFAULT_PARSER, help="BeautifulSoup parser backend")
+    parser.add_argument('--incremental', action='store_true', help="only re-extract courses whose catalog block changed")
+    parser.add_argument('--db', nargs='?', const=DEFAULT_DB_PATH, help="also load the catalog into a SQLite store")
+    parser.add_argument('--index', action='store_true', help="rebuild the local semantic search index afterwards")
+    parser.add_argument('--catalog-id', type=int, default=DEFAULT_CATALOG_ID, help="Acalog catalog id (cur_cat_oid)")
+    parser.add_argument('--navoid', type=int, default=DEFAULT_NAVOID, help="Acalog navigation id of the course listing")
+    parser.add_argument('--pages', type=int, help="number of listing pages (default: read from page 1)")
+    parser.add_argument('--output-dir', default='data')
+    parser.add_argument('--replay', action='store_true', help="retry the pages the last run failed on before scraping")
+    parser.add_argument('--format', dest='formats', nargs='+', choices=OUTPUT_FORMATS, default=['csv'],
+                        help="record sinks; the closure and search index are built from the csv output")
+    parser.add_argument('--course-ids', help="shared course ID dictionary (default: <output dir>/course_ids.csv)")
+    parser.add_argument('--processes', type=int, default=0,
+                        help="parse pages in this many worker processes (default: in the main process)")
+    args = parser.parse_args()
+    cache = None if args.no_cache else HttpCache(args.cache_dir, offline=args.offline)
+    try:
+        if args.replay:
+            replay_dead_letters(os.path.join(args.output_dir, 'courses_dead_letters.json'), cache)
+        scrape_courses_to_csv(args.workers, args.base_url, cache, args.parser, args.incremental, args.db,
+                              args.catalog_id, args.navoid, args.pages, args.output_dir, args.formats,
+                              args.processes, args.course_ids)
+    except (FetchError, DeadLetterError) as e:
+        raise SystemExit(str(e))
+
+    if args.index:
+        # NumPy is only needed for the index, so it is imported here
+        from course_index import build_index
+        index_dir = os.path.join(args.output_dir, 'course_index')
+        count, dimensions = build_index(os.path.join(args.output_dir, 'courses.csv'), index_dir)
+        print(f"Indexed {count} courses ({dimensions} dimensions) in {index_dir}")
 
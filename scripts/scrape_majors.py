@@ -1,136 +1,231 @@
-import requests
-from bs4 import BeautifulSoup
-import csv
+import argparse
 import os
 import re
+from collections import namedtuple
+from urllib.parse import urljoin
+from bs4 import Tag
+from catalog_db import DEFAULT_DB_PATH, DatabaseManager, MajorStoreSink
+from catalog_snapshot import DEFAULT_SNAPSHOT_FILE, write_snapshot
+from course_ids import write_category_ids
+from csv_sink import CsvSink
+from fetch import (DEFAULT_WORKERS, DeadLetterError, DeadLetters, FetchError, fetch_page, fetch_pages, make_session,
+                   replay_dead_letters)
+from html_parsing import DEFAULT_PARSER, PARSERS, parse_content_area, parse_major_links
+from http_cache import DEFAULT_CACHE_DIR, HttpCache
+from manifest import Manifest
+from record_sinks import JsonlSink, NullSink, TableCsvSink, write_records
+from text_utils import clean_text, extract_course_codes, extract_credits
 
-def clean_text(text):
-    # Remove HTML tags and decode HTML entities
-    text = re.sub(r'<[^>]+>', '', text)
-    text = text.replace('&amp;', '&')
-    text = text.replace('&nbsp;', ' ')
-    return text.strip()
-
-def extract_credits(text):
-    # Extract credit hours from text like "Major Courses (22 Credit Hours)"
-    match = re.search(r'\((\d+)\s*Credit\s*Hours?\)', text)
-    if match:
-        return int(match.group(1))
-    return 0
-
-def extract_course_codes(text):
-    # Regular expression to match course codes (e.g., "ACCT 2121" or "ACCT 2121L")
-    course_pattern = r'[A-Z]{4}\s+\d{4}L?'
-    return re.findall(course_pattern, text)
-
-def scrape_majors():
-    # Create data directory if it doesn't exist
-    os.makedirs('data', exist_ok=True)
-
-    # Initialize CSV files
-    with open('data/major_categories.csv', mode='w', newline='', encoding='utf-8') as categories_file:
-        categories_writer = csv.writer(categories_file)
-        categories_writer.writerow(['Major', 'Category ID', 'Category Name', 'Credit Hours'])
-
-    with open('data/category_courses.csv', mode='w', newline='', encoding='utf-8') as courses_file:
-        courses_writer = csv.writer(courses_file)
-        courses_writer.writerow(['Category ID', 'Course'])
-
-    # Get the list of majors
-    majors_url = "https://academics.charlotte.edu/programs/undergraduate/bachelors"
-    response = requests.get(majors_url)
-    soup = BeautifulSoup(response.text, 'html.parser')
-    
-    # Find all major links in the table
-    major_links = soup.find_all('a', href=re.compile(r'catalog\.charlotte\.edu/preview_program\.php'))
-    category_id = 1
+MAJORS_URL = "https://academics.charlotte.edu/programs/undergraduate/bachelors"
+
+SECTION_KEYWORD_PATTERN = re.compile('requirement|core|major|concentration|elective|degree|curriculum|foundation')
+SKIP_PATTERN = re.compile('back to top|print-friendly|facebook|tweet')
+
+OUTPUT_FORMATS = ['csv', 'jsonl', 'null']
+
+# One requirement section of a major, with the course codes listed under it
+CategoryRecord = namedtuple('CategoryRecord', ['major', 'category_id', 'name', 'credits', 'courses'])
+
+MAJOR_TABLES = {
+    'major_categories.csv': ['Major', 'Category ID', 'Category Name', 'Credit Hours'],
+    'category_courses.csv': ['Category ID', 'Course'],
+}
+
+HEADER_TAGS = ('h2', 'h3', 'h4')
+
+def is_section_header(text):
+    return SECTION_KEYWORD_PATTERN.search(text.lower()) is not None
+
+def is_course_list_class(value):
+    return value and ('courselistcomment' in value or 'courselist' in value)
+
+def element_courses(element):
+    # Course codes listed in one element: from its course lists if it has any, else from its text
+    course_lists = element.find_all('div', class_=is_course_list_class)
+    if course_lists:
+        return [code for course_list in course_lists for code in extract_course_codes(course_list.text)]
+    return extract_course_codes(clean_text(element.text))
+
+class SiblingRun:
+    # The element children of one parent, each cleaned and scanned at most once. A section
+    # runs from its header to the next h2-h4 section header among the same siblings.
+
+    def __init__(self, parent):
+        self.children = [child for child in parent.children if isinstance(child, Tag)]
+        self.position = {id(child): i for i, child in enumerate(self.children)}
+        # next_stop[i]: index of the first section-ending header at or after i
+        self.next_stop = [len(self.children)] * (len(self.children) + 1)
+        for i in range(len(self.children) - 1, -1, -1):
+            child = self.children[i]
+            stops = child.name in HEADER_TAGS and is_section_header(clean_text(child.text))
+            self.next_stop[i] = i if stops else self.next_stop[i + 1]
+        self.courses = {}
+
+    def section_courses(self, header):
+        i = self.position[id(header)]
+        codes = []
+        for k in range(i + 1, self.next_stop[i + 1]):
+            if k not in self.courses:
+                self.courses[k] = element_courses(self.children[k])
+            codes.extend(self.courses[k])
+        return codes
+
+def extract_major_sections(content_area):
+    # Returns [section name, credits, course codes] for every requirement section of a major's page.
+    # Sections are courseblock divs, or else any h2-h4/p whose text names a requirement; each one
+    # takes the courses of the siblings that follow it up to the next h2-h4 section header.
+    major_sections = []
+    runs = {}
+
+    sections = content_area.find_all('div', {'class': 'courseblock'}) or content_area.find_all(['h2', 'h3', 'h4', 'p'])
+    for section in sections:
+        section_text = clean_text(section.text)
+
+        # Skip empty sections, navigation elements and anything that isn't a section header
+        if not section_text or SKIP_PATTERN.search(section_text.lower()) or not is_section_header(section_text):
+            continue
+
+        run = runs.get(id(section.parent))
+        if run is None:
+            run = runs[id(section.parent)] = SiblingRun(section.parent)
+        credits = extract_credits(section_text)
+        section_courses = run.section_courses(section)
 
-    print(f"Found {len(major_links)} major links")
+        print(f"Found section: {section_text} ({credits} credits)")
+        if section_courses:
+            print(f"Found courses in {section_text}: {section_courses}")
+        major_sections.append([section_text, credits, section_courses])
 
-    for link in major_links:
+    return major_sections
+
+def category_table_rows(record):
+    return [
+        ('major_categories.csv', [[record.major, record.category_id, record.name, record.credits]]),
+        ('category_courses.csv', [[record.category_id, course] for course in record.courses]),
+    ]
+
+def major_pages(majors, session, cache=None, dead_letters=None, workers=DEFAULT_WORKERS):
+    # (major name, url) pairs -> (major name, url, html), fetched concurrently but in listing order.
+    # Pages that could not be fetched go to dead_letters, and the stream fails at its end if there
+    # were any, so the sinks keep their previous outputs.
+    htmls = fetch_pages([major_url for _, major_url in majors], workers, session, cache, dead_letters)
+    for (major_name, major_url), html in zip(majors, htmls):
+        print(f"Processing major: {major_name}")
+        print(f"URL: {major_url}")
+        if html is None:
+            print(f"Could not fetch {major_name}")
+            continue
+        yield major_name, major_url, html
+
+    if dead_letters:
+        dead_letters.save()
+        raise DeadLetterError(f"{len(dead_letters)} major pages failed; kept the previous outputs and listed them "
+                              f"in {dead_letters.path} (rerun with --replay)")
+
+def major_sections(pages, manifest, parser=DEFAULT_PARSER):
+    # (major name, url, html) -> (major name, sections); unchanged majors reuse their sections in incremental mode
+    for major_name, major_url, html in pages:
         try:
-            major_name = clean_text(link.text)
-            major_url = link['href']
-            
-            print(f"Processing major: {major_name}")
-            print(f"URL: {major_url}")
-
-            # Visit the major's page
-            major_response = requests.get(major_url)
-            major_soup = BeautifulSoup(major_response.text, 'html.parser')
-            
-            # Find the program content area - it's in the content-wrapper div
-            content_area = major_soup.find('div', {'id': 'content-wrapper'})
+            # The program content area is in the content-wrapper div
+            content_area = parse_content_area(html, parser)
             if not content_area:
                 print(f"Could not find content area for {major_name}")
                 continue
 
-            # Look for courseblock sections which contain requirements
-            courseblocks = content_area.find_all('div', {'class': 'courseblock'})
-            if not courseblocks:
-                # If no courseblocks, look for any headers and content
-                sections = content_area.find_all(['h2', 'h3', 'h4', 'p'])
-            else:
-                sections = courseblocks
-
-            current_section = None
-            for section in sections:
-                section_text = clean_text(section.text)
-                
-                # Skip empty sections or navigation elements
-                if not section_text or any(skip in section_text.lower() for skip in 
-                                         ['back to top', 'print-friendly', 'facebook', 'tweet']):
-                    continue
-                
-                # Check if this is a main section header
-                if any(keyword in section_text.lower() for keyword in 
-                      ['requirement', 'core', 'major', 'concentration', 'elective', 'degree', 'curriculum', 'foundation']):
-                    credits = extract_credits(section_text)
-                    current_section = section_text
-                    
-                    print(f"Found section: {section_text} ({credits} credits)")
-                    
-                    # Write to major_categories.csv
-                    with open('data/major_categories.csv', mode='a', newline='', encoding='utf-8') as categories_file:
-                        categories_writer = csv.writer(categories_file)
-                        categories_writer.writerow([major_name, category_id, section_text, credits])
-                    
-                    # Look for courses in this section and following content
-                    next_elem = section.find_next_sibling()
-                    while next_elem and not (next_elem.name in ['h2', 'h3', 'h4'] and 
-                          any(keyword in clean_text(next_elem.text).lower() for keyword in 
-                              ['requirement', 'core', 'major', 'concentration', 'elective', 'degree', 'curriculum', 'foundation'])):
-                        
-                        # Check for course lists in courselistcomment or courselist classes
-                        course_lists = next_elem.find_all('div', class_=lambda x: x and 
-                                                        ('courselistcomment' in x or 'courselist' in x))
-                        
-                        if course_lists:
-                            for course_list in course_lists:
-                                courses = extract_course_codes(course_list.text)
-                                if courses:
-                                    print(f"Found courses in {current_section}: {courses}")
-                                    with open('data/category_courses.csv', mode='a', newline='', encoding='utf-8') as courses_file:
-                                        courses_writer = csv.writer(courses_file)
-                                        for course in courses:
-                                            courses_writer.writerow([category_id, course])
-                        else:
-                            # Check for courses in the element text
-                            elem_text = clean_text(next_elem.text)
-                            courses = extract_course_codes(elem_text)
-                            if courses:
-                                print(f"Found courses in {current_section}: {courses}")
-                                with open('data/category_courses.csv', mode='a', newline='', encoding='utf-8') as courses_file:
-                                    courses_writer = csv.writer(courses_file)
-                                    for course in courses:
-                                        courses_writer.writerow([category_id, course])
-                        
-                        next_elem = next_elem.find_next_sibling()
-                    
-                    category_id += 1
-
+            key = manifest.unique_key(major_url)
+            block_hash = Manifest.hash_block(str(content_area))
+            sections = manifest.lookup(key, block_hash)
+            if sections is None:
+                sections = extract_major_sections(content_area)
+            manifest.record(key, block_hash, major_name, sections)
         except Exception as e:
             print(f"Error processing major {major_name}: {e}")
+            continue
+        yield major_name, sections
+
+def category_records(majors):
+    # Category IDs are assigned as the stream is written so they match a full rebuild
+    category_id = 1
+    for major_name, sections in majors:
+        for section_text, credits, section_courses in sections:
+            yield CategoryRecord(major_name, category_id, section_text, credits, section_courses)
+            category_id += 1
+
+def major_sinks(output_dir, formats=('csv',), db_path=None):
+    sinks = []
+    if 'csv' in formats:
+        sinks.append(TableCsvSink(output_dir, MAJOR_TABLES, category_table_rows))
+    if 'jsonl' in formats:
+        sinks.append(JsonlSink(os.path.join(output_dir, 'major_categories.jsonl')))
+    if 'null' in formats:
+        sinks.append(NullSink())
+    if db_path:
+        sinks.append(MajorStoreSink(DatabaseManager(db_path)))
+    return sinks
+
+def scrape_majors(cache=None, parser=DEFAULT_PARSER, incremental=False, db_path=None, majors_url=MAJORS_URL,
+                  output_dir='data', formats=('csv',), workers=DEFAULT_WORKERS, course_ids_path=None, catalog_url=None,
+                  catalog_id=None):
+    def output_path(name):
+        return os.path.join(output_dir, name)
+
+    # Create the output directory if it doesn't exist
+    os.makedirs(output_dir, exist_ok=True)
+
+    # Hashes of every major's content area from the previous run; unchanged majors reuse their sections
+    manifest = Manifest(output_path('majors_manifest.json'), incremental)
+    # Major pages that fail after every retry; the run then keeps the previous outputs
+    dead_letters = DeadLetters(output_path('majors_dead_letters.json'))
+
+    # Get the list of majors and find all major links in the table
+    session = make_session(workers)
+    majors = [(clean_text(link.text), urljoin(majors_url, link['href']))
+              for link in parse_major_links(fetch_page(session, majors_url, cache), parser, catalog_url, catalog_id)]
+    print(f"Found {len(majors)} major links")
+
+    pages = major_pages(majors, session, cache, dead_letters, workers)
+    count = write_records(category_records(major_sections(pages, manifest, parser)),
+                          major_sinks(output_dir, formats, db_path))
+    dead_letters.save()
+
+    # Majors are numbered in listing order; major_name matches the Major column of major_categories.csv
+    if 'csv' in formats:
+        with CsvSink(output_path('majors.csv'), ['major_id', 'major_name', 'url']) as sink:
+            sink.writerows([major_id, major_name, major_url] for major_id, (major_name, major_url) in enumerate(majors, 1))
+        course_ids = write_category_ids(output_dir, course_ids_path)
+        print(f"Wrote category_course_ids.csv; the dictionary has {len(course_ids)} course IDs")
+        counts = write_snapshot(output_dir, course_ids_path)
+        print(f"Wrote {DEFAULT_SNAPSHOT_FILE} with {counts['courses']} courses and {counts['categories']} categories")
+    if db_path:
+        print(f"Loaded {count} categories into {db_path}")
+
+    changes = manifest.save(output_path('majors_changes.json'))
+    print(f"Reused {manifest.reused} unchanged majors; {len(changes['added'])} added, "
+          f"{len(changes['changed'])} changed, {len(changes['removed'])} removed")
 
 if __name__ == "__main__":
-    scrape_majors() 
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Scrape major requirements into data/*.csv")
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help="number of major pages fetched concurrently")
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR, help="on-disk HTTP cache directory")
+    parser.add_argument('--no-cache', action='store_true', help="always download pages from scratch")
+    parser.add_argument('--offline', action='store_true', help="replay cached pages without touching the network")
+    parser.add_argument('--parser', choices=PARSERS, default=DEFAULT_PARSER, help="BeautifulSoup parser backend")
+    parser.add_argument('--incremental', action='store_true', help="only re-extract majors whose page content changed")
+    parser.add_argument('--db', nargs='?', const=DEFAULT_DB_PATH, help="also load the categories into a SQLite store")
+    parser.add_argument('--majors-url', default=MAJORS_URL, help="page listing the programs to scrape")
+    parser.add_argument('--catalog-url', help="only follow program links to this catalog host (default: any host)")
+    parser.add_argument('--catalog-id', type=int, help="only follow program links into this catalog year (catoid; default: any)")
+    parser.add_argument('--output-dir', default='data')
+    parser.add_argument('--replay', action='store_true', help="retry the pages the last run failed on before scraping")
+    parser.add_argument('--format', dest='formats', nargs='+', choices=OUTPUT_FORMATS, default=['csv'],
+                        help="record sinks")
+    parser.add_argument('--course-ids', help="shared course ID dictionary (default: <output dir>/course_ids.csv)")
+    args = parser.parse_args()
+    cache = None if args.no_cache else HttpCache(args.cache_dir, offline=args.offline)
+    try:
+        if args.replay:
+            replay_dead_letters(os.path.join(args.output_dir, 'majors_dead_letters.json'), cache)
+        scrape_majors(cache, args.parser, args.incremental, args.db, args.majors_url, args.output_dir, args.formats,
+                      args.workers, args.course_ids, args.catalog_url, args.catalog_id)
+    except (FetchError, DeadLetterError) as e:
+        raise SystemExit(str(e))
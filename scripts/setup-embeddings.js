@@ -50,32 +50,104 @@ async function loadCourseData() {
     });
 }
 
+// The delta written by `scrape_courses.py` (added/changed/removed course IDs). Scrapes keep
+// merging into it until a --changed-only run has applied it and deletes it.
+const changesPath = path.join(__dirname, '../data', 'courses_changes.json');
+
+function loadCourseChanges() {
+    if (!fs.existsSync(changesPath)) {
+        return { updated: new Set(), removed: [] };
+    }
+    const changes = JSON.parse(fs.readFileSync(changesPath, 'utf-8'));
+    const toKey = (courseId) => courseId.replace(' ', '_');
+    return {
+        updated: new Set([...changes.added, ...changes.changed].map(toKey)),
+        removed: changes.removed.map(toKey)
+    };
+}
+
+// Apply the delta written by `scripts/embedding_manager.py`: vectors are already computed,
+// so nothing is sent to OpenAI and unchanged courses are left alone
+async function applyEmbeddingDelta() {
+    const deltaPath = path.join(__dirname, '../data', 'embedding_delta.json');
+    if (!fs.existsSync(deltaPath)) {
+        console.log('No pending embedding delta; run: python scripts/embedding_manager.py');
+        return;
+    }
+    const delta = JSON.parse(fs.readFileSync(deltaPath, 'utf-8'));
+
+    try {
+        const collection = await client.getOrCreateCollection({
+            name: "course_embeddings",
+            metadata: { "hnsw:space": "cosine" }
+        });
+        if (delta.delete.length > 0) {
+            await collection.delete({ ids: delta.delete });
+            console.log(`🗑️  Removed ${delta.delete.length} deleted courses`);
+        }
+
+        const batchSize = 500;
+        for (let start = 0; start < delta.upsert.length; start += batchSize) {
+            const batch = delta.upsert.slice(start, start + batchSize);
+            await collection.upsert({
+                ids: batch.map(item => item.id),
+                embeddings: batch.map(item => item.embedding),
+                metadatas: batch.map(item => item.metadata),
+                documents: batch.map(item => item.document)
+            });
+        }
+        console.log(`✅ Upserted ${delta.upsert.length} courses (${delta.model})`);
+
+        fs.unlinkSync(deltaPath);
+        console.log(`🎉 Collection now holds ${await collection.count()} courses`);
+    } catch (error) {
+        console.error('💥 Error applying embedding delta:', error);
+        process.exit(1);
+    }
+}
+
 // Create collection and populate with embeddings
-async function setupCourseEmbeddings() {
+async function setupCourseEmbeddings(changedOnly = false) {
     try {
         console.log('🚀 Starting ChromaDB course embeddings setup...');
         
         // Load courses
-        const courses = await loadCourseData();
+        let courses = await loadCourseData();
         
         // Create or get collection
         let collection;
-        try {
-            await client.deleteCollection({ name: "course_embeddings" });
-            console.log('Deleted existing collection');
-        } catch (error) {
-            // Collection doesn't exist, that's fine
+        if (changedOnly) {
+            // Only re-embed courses whose catalog entry changed since the last scrape
+            const changes = loadCourseChanges();
+            collection = await client.getOrCreateCollection({
+                name: "course_embeddings",
+                metadata: { "hnsw:space": "cosine" }
+            });
+            if (changes.removed.length > 0) {
+                await collection.delete({ ids: changes.removed });
+                console.log(`🗑️  Removed ${changes.removed.length} deleted courses`);
+            }
+            courses = courses.filter(course => changes.updated.has(`${course.Subject}_${course.Number}`));
+            console.log(`🔁 Re-embedding ${courses.length} added or changed courses`);
+        } else {
+            try {
+                await client.deleteCollection({ name: "course_embeddings" });
+                console.log('Deleted existing collection');
+            } catch (error) {
+                // Collection doesn't exist, that's fine
+            }
+            
+            collection = await client.createCollection({
+                name: "course_embeddings",
+                metadata: { "hnsw:space": "cosine" }
+            });
+            console.log('✅ Created ChromaDB collection: course_embeddings');
         }
-        
-        collection = await client.createCollection({
-            name: "course_embeddings",
-            metadata: { "hnsw:space": "cosine" }
-        });
-        console.log('✅ Created ChromaDB collection: course_embeddings');
 
         // Process courses in batches
         const batchSize = 50;
         const totalBatches = Math.ceil(courses.length / batchSize);
+        let failures = 0;
         
         for (let batchIndex = 0; batchIndex < totalBatches; batchIndex++) {
             const startIdx = batchIndex * batchSize;
@@ -126,12 +198,13 @@ async function setupCourseEmbeddings() {
                     
                 } catch (error) {
                     console.error(`❌ Error processing ${courseKey}:`, error.message);
+                    failures++;
                 }
             }
             
             // Add batch to ChromaDB
             if (ids.length > 0) {
-                await collection.add({
+                await collection.upsert({
                     ids,
                     embeddings,
                     metadatas,
@@ -141,6 +214,14 @@ async function setupCourseEmbeddings() {
             }
         }
         
+        if (changedOnly) {
+            if (failures > 0) {
+                console.log(`⚠️  Kept courses_changes.json: ${failures} courses failed and will be retried`);
+            } else if (fs.existsSync(changesPath)) {
+                fs.unlinkSync(changesPath);
+            }
+        }
+
         // Get final count
         const count = await collection.count();
         console.log(`🎉 Successfully created embeddings for ${count} courses!`);
@@ -154,7 +235,11 @@ async function setupCourseEmbeddings() {
 
 // Run the setup
 if (require.main === module) {
-    setupCourseEmbeddings();
+    if (process.argv.includes('--from-delta')) {
+        applyEmbeddingDelta();
+    } else {
+        setupCourseEmbeddings(process.argv.includes('--changed-only'));
+    }
 }
 
-module.exports = { setupCourseEmbeddings, generateEmbedding }; 
\ No newline at end of file
+module.exports = { setupCourseEmbeddings, applyEmbeddingDelta, generateEmbedding }; 
\ No newline at end of file
@@ -0,0 +1,166 @@
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from catalog_files import atomic_write
+from course_index import DEFAULT_INDEX_DIR
+from embedding_manager import DEFAULT_STORE_PATH, EmbeddingStore
+
+# Precomputes the k most similar courses of every course, so course pages need no search.
+#
+# Vectors come from the local index (course_index.py) or the embedding store
+# (embedding_manager.py). Similarity is the cosine of the unit vectors. Up to IVF_THRESHOLD
+# courses every pair is scored exactly with blocked matrix products; blocks are sized to stay
+# within BLOCK_ELEMENTS scores and run on a thread pool, since NumPy releases the GIL in the
+# product and the partial sort. Larger catalogs switch to an inverted-file index: courses are
+# clustered with spherical k-means and each cluster is only compared with the nprobe clusters
+# nearest to its centroid, or more when those hold no more than k courses.
+#
+# data/similar_courses.json holds
+#   courses     course codes
+#   k           neighbours per course
+#   neighbours  k indexes into courses per course, flattened, best first (-1 pads short rows)
+#   scores      the matching cosine similarities, rounded to 4 places
+#
+#   python scripts/similar_courses.py -k 10
+#   python scripts/similar_courses.py --source embeddings --method ivf
+
+DEFAULT_K = 10
+DEFAULT_OUTPUT = 'data/similar_courses.json'
+BLOCK_ELEMENTS = 1 << 24
+IVF_THRESHOLD = 50000
+KMEANS_ITERATIONS = 10
+
+def load_index_vectors(index_dir=DEFAULT_INDEX_DIR):
+    with open(os.path.join(index_dir, 'ids.json'), encoding='utf-8') as f:
+        ids = json.load(f)
+    return ids, np.load(os.path.join(index_dir, 'vectors.npy'), mmap_mode='r')
+
+def load_store_vectors(store_path=DEFAULT_STORE_PATH):
+    # The vectors each course had at its last sync
+    store = EmbeddingStore(store_path)
+    synced = store.synced()
+    vectors = store.get(set(synced.values()))
+    store.close()
+    ids = sorted(key for key, h in synced.items() if h in vectors)
+    return ids, np.stack([vectors[synced[key]] for key in ids]) if ids else np.zeros((0, 1), dtype=np.float32)
+
+def unit_rows(vectors):
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1
+    return vectors / norms
+
+def top_k(scores, k):
+    # Row-wise best k columns of a score block, best first
+    k = min(k, scores.shape[1])
+    if k == 0:
+        return np.zeros((len(scores), 0), dtype=np.int64), np.zeros((len(scores), 0), dtype=np.float32)
+    candidates = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    candidate_scores = np.take_along_axis(scores, candidates, axis=1)
+    order = np.argsort(-candidate_scores, axis=1, kind='stable')
+    return np.take_along_axis(candidates, order, axis=1), np.take_along_axis(candidate_scores, order, axis=1)
+
+def exact_neighbours(vectors, k, workers=None):
+    n = len(vectors)
+    neighbours = np.full((n, k), -1, dtype=np.int64)
+    scores = np.zeros((n, k), dtype=np.float32)
+    rows = max(1, BLOCK_ELEMENTS // max(n, 1))
+
+    def run(start):
+        block = vectors[start:start + rows] @ vectors.T
+        # A course is not its own neighbour
+        block[np.arange(len(block)), np.arange(start, start + len(block))] = -np.inf
+        found, found_scores = top_k(block, min(k, n - 1))
+        neighbours[start:start + len(block), :found.shape[1]] = found
+        scores[start:start + len(block), :found.shape[1]] = found_scores
+
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        list(pool.map(run, range(0, n, rows)))
+    return neighbours, scores
+
+def spherical_kmeans(vectors, clusters, iterations=KMEANS_ITERATIONS, seed=0):
+    rng = np.random.default_rng(seed)
+    centroids = vectors[rng.choice(len(vectors), clusters, replace=False)].copy()
+    for _ in range(iterations):
+        assignment = np.argmax(vectors @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignment, vectors)
+        empty = np.linalg.norm(sums, axis=1) == 0
+        # Empty clusters restart from random courses
+        sums[empty] = vectors[rng.choice(len(vectors), int(empty.sum()), replace=False)]
+        centroids = unit_rows(sums)
+    return centroids, np.argmax(vectors @ centroids.T, axis=1)
+
+def ivf_neighbours(vectors, k, clusters=None, nprobe=None, workers=None):
+    n = len(vectors)
+    clusters = clusters or max(1, int(np.sqrt(n)))
+    nprobe = nprobe or max(1, clusters // 16)
+    centroids, assignment = spherical_kmeans(vectors, clusters)
+    members = [np.flatnonzero(assignment == c) for c in range(clusters)]
+    # Every cluster ordered by how near its centroid is; the first is the cluster itself
+    nearest = top_k(centroids @ centroids.T, clusters)[0]
+
+    neighbours = np.full((n, k), -1, dtype=np.int64)
+    scores = np.zeros((n, k), dtype=np.float32)
+
+    def run(cluster):
+        queries = members[cluster]
+        if len(queries) == 0:
+            return
+        # Small clusters probe further, so every course still gets k neighbours
+        probes = nprobe
+        while probes < clusters and sum(len(members[c]) for c in nearest[cluster, :probes]) <= k:
+            probes += 1
+        candidates = np.concatenate([members[c] for c in nearest[cluster, :probes]])
+        block = vectors[queries] @ vectors[candidates].T
+        block[candidates[None, :] == queries[:, None]] = -np.inf
+        found, found_scores = top_k(block, min(k, len(candidates) - 1))
+        neighbours[queries, :found.shape[1]] = candidates[found]
+        scores[queries, :found.shape[1]] = found_scores
+
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        list(pool.map(run, range(clusters)))
+    return neighbours, scores
+
+def compute_similar_courses(ids, vectors, k=DEFAULT_K, method=None, workers=None):
+    vectors = unit_rows(vectors)
+    method = method or ('ivf' if len(ids) > IVF_THRESHOLD else 'exact')
+    if method == 'ivf':
+        return ivf_neighbours(vectors, k, workers=workers)
+    return exact_neighbours(vectors, k, workers)
+
+def write_similar_courses(path, ids, neighbours, scores, k):
+    with atomic_write(path) as f:
+        json.dump({
+            'courses': [key.replace('_', ' ', 1) for key in ids],
+            'k': k,
+            'neighbours': neighbours.ravel().tolist(),
+            'scores': np.round(np.where(neighbours >= 0, scores, 0).astype(np.float64), 4).ravel().tolist(),
+        }, f, separators=(',', ':'))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Precompute the most similar courses of every course")
+    parser.add_argument('-k', type=int, default=DEFAULT_K)
+    parser.add_argument('--source', choices=['index', 'embeddings'], default='index',
+                        help="course_index.py vectors or the embedding_manager.py store")
+    parser.add_argument('--index-dir', default=DEFAULT_INDEX_DIR)
+    parser.add_argument('--store', default=DEFAULT_STORE_PATH)
+    parser.add_argument('--method', choices=['exact', 'ivf'],
+                        help=f"default: exact up to {IVF_THRESHOLD} courses, ivf above")
+    parser.add_argument('--workers', type=int, help="threads (default: one per core)")
+    parser.add_argument('--output', default=DEFAULT_OUTPUT)
+    args = parser.parse_args()
+
+    if args.source == 'embeddings':
+        ids, vectors = load_store_vectors(args.store)
+    else:
+        ids, vectors = load_index_vectors(args.index_dir)
+
+    start = time.perf_counter()
+    neighbours, scores = compute_similar_courses(ids, vectors, args.k, args.method, args.workers)
+    elapsed = time.perf_counter() - start
+    write_similar_courses(args.output, ids, neighbours, scores, args.k)
+    print(f"Found {args.k} neighbours for {len(ids)} courses in {elapsed:.2f} s; wrote {args.output}")
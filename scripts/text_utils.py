@@ -0,0 +1,51 @@
+import html
+import re
+
+# Patterns shared by the scrapers, compiled once at import
+TAG_PATTERN = re.compile(r'<[^>]+>')
+COURSE_NOISE_PATTERN = re.compile(r'\s*Schedule of Classes\s*|\([^)]*\)')
+COURSE_CODE_PATTERN = re.compile(r'[A-Z]{4}\s+\d{4}L?')
+CREDITS_PATTERN = re.compile(r'\((\d+)\s*Credit\s*Hours?\)')
+# First number of a credits field such as "3", "(3)", "1-4" or "3 or 4"
+CREDIT_VALUE_PATTERN = re.compile(r'\d+(?:\.\d+)?')
+WORD_PATTERN = re.compile(r'[a-z0-9]+')
+
+# Words that appear in nearly every course description and carry no meaning for search
+STOP_WORDS = frozenset('''a an and are as at be by for from has in into is it its of on or that the this
+    to with will students student course courses including include includes'''.split())
+
+# Non-breaking and zero-width spaces the catalog sprinkles through its text
+SPACE_PATTERN = re.compile('[\xa0\u200b]')
+SPACE_REPLACEMENTS = {'\xa0': ' ', '\u200b': ''}
+
+def normalize_text(text):
+    # Remove HTML tags and decode every HTML entity, not just &amp; and &nbsp;
+    if '<' in text:
+        text = TAG_PATTERN.sub('', text)
+    if '&' in text:
+        text = html.unescape(text)
+    if not text.isascii():
+        text = SPACE_PATTERN.sub(lambda match: SPACE_REPLACEMENTS[match.group()], text)
+    return text
+
+def clean_text(text):
+    return normalize_text(text).strip()
+
+def clean_course_text(text):
+    # Also drop the "Schedule of Classes" link text and notes in parentheses, in one pass
+    return COURSE_NOISE_PATTERN.sub('', normalize_text(text)).strip()
+
+def extract_course_codes(text):
+    # Match course codes (e.g., "ACCT 2121" or "ACCT 2121L")
+    return COURSE_CODE_PATTERN.findall(text)
+
+def extract_credits(text):
+    # Extract credit hours from text like "Major Courses (22 Credit Hours)"
+    match = CREDITS_PATTERN.search(text)
+    if match:
+        return int(match.group(1))
+    return 0
+
+def search_tokens(text):
+    # Lowercased words for the search indexes, without stop words and single characters
+    return [word for word in WORD_PATTERN.findall(text.lower()) if word not in STOP_WORDS and len(word) > 1]
@@ -246,7 +246,7 @@ app.post('/api/semantic-search', async (req, res) => {
             console.log('ChromaDB not available, falling back to keyword search');
             const keywords = await simulateOpenAIAnalysis(query);
             return res.json({ 
-                results: performKeywordSearch(keywords, query),
+                results: await keywordSearch(keywords, query),
                 method: 'keyword-fallback',
                 message: 'ChromaDB not available. Run: node scripts/setup-embeddings.js'
             });
@@ -255,7 +255,7 @@ app.post('/api/semantic-search', async (req, res) => {
         if (!process.env.OPENAI_API_KEY) {
             const keywords = await simulateOpenAIAnalysis(query);
             return res.json({ 
-                results: performKeywordSearch(keywords, query),
+                results: await keywordSearch(keywords, query),
                 method: 'keyword'
             });
         }
@@ -334,7 +334,7 @@ app.post('/api/semantic-search', async (req, res) => {
         try {
             const keywords = await simulateOpenAIAnalysis(req.body.query);
             res.json({ 
-                results: performKeywordSearch(keywords, req.body.query),
+                results: await keywordSearch(keywords, req.body.query),
                 method: 'keyword-fallback',
                 error: error.message
             });
@@ -344,6 +344,22 @@ app.post('/api/semantic-search', async (req, res) => {
     }
 });
 
+// BM25 keyword index served by scripts/course_search.py; performKeywordSearch is the last resort
+const KEYWORD_SEARCH_URL = process.env.KEYWORD_SEARCH_URL || 'http://localhost:8765';
+
+async function keywordSearch(keywords, originalQuery) {
+    try {
+        const axios = require('axios');
+        const response = await axios.get(`${KEYWORD_SEARCH_URL}/search`, {
+            params: { q: [originalQuery, ...keywords].join(' '), k: 15 },
+            timeout: 500
+        });
+        return response.data.results;
+    } catch (error) {
+        return performKeywordSearch(keywords, originalQuery);
+    }
+}
+
 // Keyword-based search fallback
 function performKeywordSearch(keywords, originalQuery) {
     const scoredCourses = courses.map(course => {
@@ -0,0 +1,145 @@
+import csv
+import threading
+import pytest
+from catalog_db import CourseStoreSink, DatabaseManager, MajorStoreSink, choice_groups
+from requirements_parser import format_requirement, parse_requirement, requirement_courses
+from scrape_courses import CourseRecord
+from scrape_majors import CategoryRecord
+
+def record(code, name, prerequisite_text=None):
+    # A CourseRecord as scrape_courses extracts it
+    subject, number = code.split()
+    tree = parse_requirement(prerequisite_text)
+    prerequisites = [[code, required] for required in requirement_courses(tree)]
+    requirements = [[code, 'prerequisite', prerequisite_text, format_requirement(tree)]] if tree else []
+    return CourseRecord(code, [name, subject, number, '3', f'About {name}.', ''], prerequisites, [], [], requirements)
+
+CATALOG = [
+    record('ITSC 2214', 'Data Structures', "ITSC 1213 with a grade of C or above, and MATH 1241 or MATH 1120"),
+    record('ITSC 1213', 'Introduction to Computer Science II', "ITSC 1212"),
+    record('MATH 1241', 'Calculus I'),
+    record('ITSC 1212', 'Introduction to Computer Science I'),
+]
+
+@pytest.fixture
+def db(tmp_path):
+    db = DatabaseManager(str(tmp_path / 'MajorMap.db'))
+    yield db
+    db.close()
+
+def load(db, records, batch_size=500):
+    with CourseStoreSink(db, batch_size) as sink:
+        for course in records:
+            sink.write(course)
+
+def course_ids(db):
+    return {f'{subject} {number}': row_id for subject, number, row_id in db.conn.execute(
+        'SELECT subject, number, id FROM courses')}
+
+def test_schema(db):
+    db.create_db()
+    tables = {row[0] for row in db.conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    assert {'courses', 'relationships', 'requirements', 'major_categories', 'category_courses'} <= tables
+    unique = db.conn.execute("SELECT sql FROM sqlite_master WHERE name = 'idx_courses_code'").fetchone()[0]
+    assert unique.startswith('CREATE UNIQUE INDEX')
+    assert db.conn.execute('PRAGMA foreign_keys').fetchone()[0] == 1
+    # Creating the schema again leaves it alone
+    db.create_db()
+
+def test_choice_groups():
+    tree = parse_requirement("ITSC 1213 and (MATH 1241 or MATH 1120) and (STAT 1220 or STAT 1222)")
+    assert choice_groups(tree) == {'MATH 1241': 0, 'MATH 1120': 0, 'STAT 1220': 1, 'STAT 1222': 1}
+    assert choice_groups(parse_requirement("ITSC 1213")) == {}
+
+@pytest.mark.parametrize('batch_size', [1, 500])
+def test_requirements_and_choice_group_rows(db, batch_size):
+    load(db, CATALOG, batch_size)
+    groups = db.get_requirements('ITSC', '2214')
+    assert [code for code, _ in groups] == ['ITSC 1213', 'MATH 1241', 'MATH 1120']
+    assert groups[0][1] is None
+    assert groups[1][1] is not None and groups[1][1] == groups[2][1]
+    assert db.get_expression('ITSC', '2214') == 'ITSC 1213:C & (MATH 1241 | MATH 1120)'
+
+    # Required courses listed further down the catalog are linked when the load ends; MATH 1120
+    # isn't in the catalog and keeps only its code
+    ids = course_ids(db)
+    related = dict(db.conn.execute('SELECT related_code, related_course_id FROM relationships'))
+    assert related == {'ITSC 1213': ids['ITSC 1213'], 'MATH 1241': ids['MATH 1241'], 'MATH 1120': None,
+                       'ITSC 1212': ids['ITSC 1212']}
+    assert db.conn.execute('PRAGMA foreign_key_check').fetchall() == []
+
+def test_reload_upserts_by_subject_and_number(db):
+    load(db, CATALOG)
+    before = course_ids(db)
+    renamed = record('MATH 1241', 'Calculus I, revised')
+    load(db, [CATALOG[0], CATALOG[1], renamed, record('STAT 1220', 'Statistics')])
+
+    after = course_ids(db)
+    # Kept courses keep their ids, new ones get fresh ids, and courses no longer listed are gone
+    assert {code: after[code] for code in ('ITSC 2214', 'ITSC 1213', 'MATH 1241')} == \
+        {code: before[code] for code in ('ITSC 2214', 'ITSC 1213', 'MATH 1241')}
+    assert after['STAT 1220'] not in before.values()
+    assert 'ITSC 1212' not in after
+    assert db.conn.execute("SELECT name FROM courses WHERE subject = 'MATH'").fetchone()[0] == 'Calculus I, revised'
+    # Requirement rows are rebuilt, not duplicated
+    assert db.conn.execute('SELECT COUNT(*) FROM requirements').fetchone()[0] == 2
+    assert db.conn.execute('PRAGMA foreign_key_check').fetchall() == []
+
+def test_failed_load_keeps_the_previous_store(db):
+    load(db, CATALOG)
+    with pytest.raises(RuntimeError):
+        with CourseStoreSink(db) as sink:
+            sink.write(record('STAT 1220', 'Statistics'))
+            raise RuntimeError("scrape failed")
+    assert set(course_ids(db)) == {'ITSC 2214', 'ITSC 1213', 'MATH 1241', 'ITSC 1212'}
+    assert db.conn.execute('SELECT COUNT(*) FROM relationships').fetchone()[0] == 4
+
+def test_connections_are_per_thread(db):
+    assert db.connect() is db.connect()
+    other = []
+    thread = threading.Thread(target=lambda: other.append(db.connect()))
+    thread.start()
+    thread.join()
+    assert other[0] is not db.connect()
+    assert len(db._connections) == 2
+    db.close()
+    assert db._connections == []
+    assert db.connect() is not other[0]
+
+def test_transaction_rolls_back_on_exception(db):
+    db.create_db()
+    with pytest.raises(ValueError):
+        with db.transaction() as conn:
+            conn.execute("INSERT INTO major_categories (major, name) VALUES ('CS', 'Core')")
+            raise ValueError("halfway")
+    assert not db.conn.in_transaction
+    assert db.conn.execute('SELECT COUNT(*) FROM major_categories').fetchone()[0] == 0
+
+    with db.transaction() as conn:
+        conn.execute("INSERT INTO major_categories (major, name) VALUES ('CS', 'Core')")
+        # A nested transaction joins the enclosing one
+        with db.transaction() as nested:
+            nested.execute("INSERT INTO major_categories (major, name) VALUES ('CS', 'Electives')")
+    assert db.conn.execute('SELECT COUNT(*) FROM major_categories').fetchone()[0] == 2
+
+def test_upsert(db):
+    db.create_db()
+    db.upsert('major_categories', ('id', 'major', 'name', 'credits'), [(1, 'CS', 'Core', 12), (2, 'CS', 'Math', 6)])
+    db.upsert('major_categories', ('id', 'major', 'name', 'credits'), [(2, 'CS', 'Mathematics', 9)])
+    assert db.conn.execute('SELECT id, name, credits FROM major_categories ORDER BY id').fetchall() == \
+        [(1, 'Core', 12), (2, 'Mathematics', 9)]
+
+def test_export_only_tables_with_rows(db, tmp_path):
+    load(db, CATALOG)
+    output_dir = tmp_path / 'export'
+    assert db.export_csvs(str(output_dir)) == ['courses']
+    assert not (output_dir / 'major_categories.csv').exists()
+    with open(output_dir / 'prerequisites.csv', newline='', encoding='utf-8') as f:
+        assert list(csv.reader(f))[1:] == [['ITSC 2214', 'ITSC 1213'], ['ITSC 2214', 'MATH 1241'],
+                                           ['ITSC 2214', 'MATH 1120'], ['ITSC 1213', 'ITSC 1212']]
+
+    with MajorStoreSink(db) as sink:
+        sink.write(CategoryRecord('Computer Science, B.S.', 1, 'Major Requirements', 12, ['ITSC 2214', 'MATH 1241']))
+    assert db.export_csvs(str(output_dir)) == ['courses', 'majors']
+    with open(output_dir / 'category_courses.csv', newline='', encoding='utf-8') as f:
+        assert list(csv.reader(f))[1:] == [['1', 'ITSC 2214'], ['1', 'MATH 1241']]
@@ -0,0 +1,61 @@
+import csv
+import os
+import pytest
+from catalog_pipeline import load_config, run_catalog
+from http_cache import HttpCache
+from scrape_courses import COURSES_PATH
+
+BASE_URL = 'https://catalog.example.edu'
+MAJORS_URL = 'https://academics.example.edu/programs'
+# Catalog year -> (catoid, navoid, its one course, the course its program requires)
+YEARS = {'2019-2020': (25, 1100, 'ITSC 1200', 'MATH 1100'), '2024-2025': (38, 4596, 'ITSC 1212', 'MATH 1241')}
+
+def course_page(code):
+    return (f'<html><body><table><tr><td class="width"><h3>{code} - Intro</h3><hr>About it.'
+            f'<br><strong>Credit Hours:</strong> (3)<br></td></tr></table></body></html>')
+
+def program_page(term, code):
+    return (f'<html><body><div id="content-wrapper"><h1>Computer Science {term}</h1>'
+            f'<h3>Major Requirements (3 Credit Hours)</h3>'
+            f'<div class="courselist"><ul><li>{code} - Required</li></ul></div></div></body></html>')
+
+@pytest.fixture
+def cache_dir(tmp_path):
+    # Every page both catalog years need, so the pipeline runs offline
+    cache = HttpCache(str(tmp_path / 'cache'))
+    links = []
+    for term, (catoid, navoid, course, required) in YEARS.items():
+        cache.store(BASE_URL + COURSES_PATH.format(page=1, catalog_id=catoid, navoid=navoid), course_page(course))
+        program_url = f'{BASE_URL}/preview_program.php?catoid={catoid}&poid=1'
+        cache.store(program_url, program_page(term, required))
+        links.append(f'<a href="{program_url.replace("&", "&amp;")}">Computer Science, B.S. ({term})</a>')
+    # One listing page that links the programs of both years
+    cache.store(MAJORS_URL, f'<html><body>{"".join(links)}</body></html>')
+    return str(tmp_path / 'cache')
+
+def read_csv(path):
+    with open(path, newline='', encoding='utf-8') as f:
+        return list(csv.DictReader(f))
+
+def test_catalog_years_keep_their_own_programs(tmp_path, cache_dir):
+    output_root = str(tmp_path / 'out')
+    for term, (catoid, navoid, course, required) in YEARS.items():
+        catalog = {'name': 'example', 'term': term, 'base_url': BASE_URL, 'catalog_id': catoid, 'navoid': navoid,
+                   'pages': 1, 'majors_url': MAJORS_URL}
+        run_catalog(catalog, output_root, cache_dir, offline=True, workers=2)
+
+    for term, (catoid, navoid, course, required) in YEARS.items():
+        output_dir = os.path.join(output_root, 'example', term)
+        assert [(row['Subject'], row['Number']) for row in read_csv(os.path.join(output_dir, 'courses.csv'))] == \
+            [tuple(course.split())]
+        assert [row['Major'] for row in read_csv(os.path.join(output_dir, 'major_categories.csv'))] == \
+            [f'Computer Science, B.S. ({term})']
+        assert [row['Course'] for row in read_csv(os.path.join(output_dir, 'category_courses.csv'))] == [required]
+
+def test_majors_url_is_required(tmp_path):
+    path = tmp_path / 'catalogs.json'
+    path.write_text('{"catalogs": [{"name": "example", "term": "2019-2020", "catalog_id": 25}]}')
+    with pytest.raises(SystemExit, match='majors_url'):
+        load_config(str(path))
+    path.write_text('{"catalogs": [{"name": "example", "term": "2019-2020", "catalog_id": 25, "majors_url": null}]}')
+    assert load_config(str(path))['catalogs'][0]['majors_url'] is None
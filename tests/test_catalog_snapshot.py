@@ -0,0 +1,32 @@
+import csv
+import os
+import pytest
+from catalog_snapshot import CatalogSnapshot, write_snapshot
+
+pytest.importorskip('numpy')
+
+def write_csv(path, header, rows):
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        writer.writerows(rows)
+
+@pytest.fixture
+def snapshot_path(tmp_path):
+    write_csv(tmp_path / 'courses.csv', ['Name', 'Subject', 'Number', 'Credits', 'Description', 'Restrictions'],
+              [['Data Structures', 'ITSC', '2214', '3', '', ''], ['Calculus I', 'MATH', '1241', '3', '', '']])
+    write_csv(tmp_path / 'prerequisites.csv', ['Course ID', 'Required Course'], [['ITSC 2214', 'MATH 1241']])
+    write_snapshot(str(tmp_path))
+    return os.path.join(tmp_path, 'catalog.snapshot')
+
+def test_requirements(snapshot_path):
+    snapshot = CatalogSnapshot(snapshot_path)
+    assert [snapshot.code(i) for i in snapshot.requirements('ITSC 2214')] == ['MATH 1241']
+    assert snapshot.course('MATH 1241')['name'] == 'Calculus I'
+    snapshot.close()
+
+def test_close_while_a_view_is_held(snapshot_path):
+    snapshot = CatalogSnapshot(snapshot_path)
+    required = snapshot.requirements('ITSC 2214')
+    snapshot.close()
+    assert len(required) == 1
@@ -0,0 +1,97 @@
+import csv
+import multiprocessing
+import pytest
+import course_ids
+from course_ids import (CourseIds, load_course_ids, save_course_ids, shared_course_ids, write_category_ids,
+                        write_edge_ids)
+
+def write_csv(path, header, rows):
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        writer.writerows(rows)
+
+def read_csv(path):
+    with open(path, newline='', encoding='utf-8') as f:
+        return list(csv.reader(f))[1:]
+
+def catalog(data_dir, courses, prerequisites, corequisites=()):
+    data_dir.mkdir()
+    write_csv(data_dir / 'courses.csv', ['Name', 'Subject', 'Number', 'Credits', 'Description', 'Restrictions'],
+              [['', *code.split(), '3', '', ''] for code in courses])
+    write_csv(data_dir / 'prerequisites.csv', ['Course ID', 'Prerequisite Course ID'], prerequisites)
+    write_csv(data_dir / 'corequisites.csv', ['Course ID', 'Corequisite Course ID'], corequisites)
+    return data_dir
+
+def test_course_ids():
+    ids = CourseIds(['ITSC 1212', 'ITSC 1213', 'ITSC 1212'])
+    assert len(ids) == 2 and 'ITSC 1213' in ids
+    assert ids.intern('MATH 1241') == 2
+    assert ids.code(1) == 'ITSC 1213'
+    assert ids.get('PHYS 2101') == -1
+    assert list(ids.encode(['MATH 1241', 'PHYS 2101', 'ITSC 1212'])) == [2, -1, 0]
+
+def test_save_and_load(tmp_path):
+    path = tmp_path / 'course_ids.csv'
+    save_course_ids(CourseIds(['ITSC 1212', 'ITSC 1213']), path)
+    assert load_course_ids(path).codes == ['ITSC 1212', 'ITSC 1213']
+    assert len(load_course_ids(tmp_path / 'missing.csv')) == 0
+
+    write_csv(path, ['ID', 'Course'], [[0, 'ITSC 1212'], [2, 'ITSC 1213']])
+    with pytest.raises(ValueError, match='dense'):
+        load_course_ids(path)
+
+def test_ids_stay_stable_across_catalogs_and_runs(tmp_path):
+    ids_path = tmp_path / 'course_ids.csv'
+    older = catalog(tmp_path / '2024', ['ITSC 1212', 'ITSC 1213', 'ITSC 2214'],
+                    [['ITSC 1213', 'ITSC 1212'], ['ITSC 2214', 'ITSC 1213'], ['ITSC 2214', 'MATH 1241']],
+                    [['ITSC 1213', 'ITSC 1213L']])
+    write_edge_ids(older, ids_path)
+    first = read_csv(ids_path)
+    assert first == [['0', 'ITSC 1212'], ['1', 'ITSC 1213'], ['2', 'ITSC 2214'], ['3', 'MATH 1241'],
+                     ['4', 'ITSC 1213L']]
+    assert read_csv(older / 'requirement_edges.csv') == [['1', '0', '0'], ['2', '1', '0'], ['2', '3', '0'],
+                                                         ['1', '4', '1']]
+
+    # A newer catalog drops a course and adds one: old IDs keep their meaning, new codes go at the end
+    newer = catalog(tmp_path / '2025', ['ITSC 1213', 'ITSC 2175', 'ITSC 2214'],
+                    [['ITSC 2175', 'MATH 1241'], ['ITSC 2214', 'ITSC 1213']])
+    write_edge_ids(newer, ids_path)
+    assert read_csv(ids_path) == first + [['5', 'ITSC 2175']]
+    assert read_csv(newer / 'requirement_edges.csv') == [['5', '3', '0'], ['2', '1', '0']]
+
+    # Running again changes nothing, and category courses reuse the same IDs
+    write_edge_ids(older, ids_path)
+    write_csv(older / 'category_courses.csv', ['Category ID', 'Course'], [[7, 'ITSC 2214'], [7, 'STAT 2122']])
+    write_category_ids(older, ids_path)
+    assert read_csv(ids_path) == first + [['5', 'ITSC 2175'], ['6', 'STAT 2122']]
+    assert read_csv(older / 'category_course_ids.csv') == [['7', '2'], ['7', '6']]
+
+def intern_codes(ids_path, codes):
+    # One worker process: interns its codes a few at a time, taking the lock each time
+    for start in range(0, len(codes), 5):
+        with shared_course_ids(ids_path) as ids:
+            for code in codes[start:start + 5]:
+                ids.intern(code)
+
+@pytest.mark.skipif(course_ids.fcntl is None, reason="needs flock")
+def test_concurrent_processes_share_one_dictionary(tmp_path):
+    ids_path = str(tmp_path / 'course_ids.csv')
+    with shared_course_ids(ids_path) as ids:
+        for code in ('ITSC 1212', 'ITSC 1213'):
+            ids.intern(code)
+
+    # Overlapping code lists, so workers race to add the same codes
+    workers = [[f'ITSC {2000 + (w * 20 + i) % 100}' for i in range(60)] for w in range(6)]
+    context = multiprocessing.get_context('fork')
+    processes = [context.Process(target=intern_codes, args=(ids_path, codes)) for codes in workers]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    assert all(process.exitcode == 0 for process in processes)
+
+    # Dense, every code exactly once, and the codes that were there first kept their IDs
+    ids = load_course_ids(ids_path)
+    assert ids.codes[:2] == ['ITSC 1212', 'ITSC 1213']
+    assert sorted(ids.codes[2:]) == sorted({code for codes in workers for code in codes})
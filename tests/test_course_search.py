@@ -0,0 +1,64 @@
+import csv
+import pytest
+from course_search import CourseSearch, build_search_index, search_results
+
+COURSES = [
+    ('Machine Learning', 'ITCS', '3156', "Algorithms that learn from data: regression, classification and clustering."),
+    ('Introduction to Computer Science I', 'ITSC', '1212', "Programming in Python: variables, loops and functions."),
+    ('Introduction to Computer Science II', 'ITSC', '1213', "Object oriented programming, recursion and data structures."),
+    ('Data Structures and Algorithms', 'ITSC', '2214', "Lists, trees, graphs, sorting and hashing; learning to analyse algorithms."),
+    ('Calculus I', 'MATH', '1241', "Limits, derivatives and integrals of functions of one variable."),
+]
+
+@pytest.fixture
+def search(tmp_path):
+    courses_path = tmp_path / 'courses.csv'
+    with open(courses_path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['Name', 'Subject', 'Number', 'Credits', 'Description', 'Restrictions'])
+        writer.writerows([name, subject, number, '3', description, ''] for name, subject, number, description in COURSES)
+    index_path = tmp_path / 'search_index.json'
+    assert build_search_index(courses_path, index_path)[0] == len(COURSES)
+    return CourseSearch(index_path)
+
+def codes(rows):
+    return [f"{row['Subject']} {row['Number']}" for row in rows]
+
+def test_name_matches_rank_first(search):
+    # "algorithms" is in the name of ITSC 2214 and only in the description of ITCS 3156
+    matches = search.search('algorithms')
+    assert codes(course for course, _, _ in matches) == ['ITSC 2214', 'ITCS 3156']
+    assert matches[0][1] > matches[1][1] > 0
+    assert matches[0][2] == ['algorithms']
+
+def test_scores_add_up_over_terms(search):
+    matches = search.search('data structures recursion')
+    # The name boost puts "Data Structures and Algorithms" ahead of the course matching all three terms
+    assert codes(course for course, _, _ in matches)[:2] == ['ITSC 2214', 'ITSC 1213']
+    assert sorted(matches[1][2]) == ['data', 'recursion', 'structures']
+    single = {term: dict((f"{c['Subject']} {c['Number']}", score) for c, score, _ in search.search(term))
+              for term in ('data', 'structures', 'recursion')}
+    for course, score, matched in matches:
+        code = codes([course])[0]
+        assert score == pytest.approx(sum(single[term][code] for term in matched))
+    assert search.search('data structures recursion', k=2) == matches[:2]
+
+def test_no_match(search):
+    assert search.search('the of and') == []
+    assert search.search('astronomy') == []
+
+def test_search_results_shape(search):
+    results = search_results(search, 'programming', 15)
+    assert [result['course']['course_id'] for result in results] == ['ITSC 1212', 'ITSC 1213']
+    assert results[0]['similarity'] == 1.0 and results[0]['relevancePercentage'] == 100
+    assert results[0]['matchedKeywords'] == ['programming']
+
+def test_autocomplete(search):
+    assert codes(search.autocomplete('itsc 12')) == ['ITSC 1212', 'ITSC 1213']
+    assert codes(search.autocomplete('ITSC1213')) == ['ITSC 1213']
+    # Titles complete from their first word and from any later word of three letters or more
+    assert codes(search.autocomplete('intro')) == ['ITSC 1212', 'ITSC 1213']
+    assert codes(search.autocomplete('learn')) == ['ITCS 3156']
+    assert codes(search.autocomplete('  Data   Str')) == ['ITSC 2214']
+    assert codes(search.autocomplete('itsc', k=1)) == ['ITSC 1212']
+    assert search.autocomplete('physics') == []
@@ -0,0 +1,82 @@
+import random
+import pytest
+import degree_audit
+from degree_audit import DegreeAudit
+
+np = pytest.importorskip('numpy')
+
+# Two majors; ITSC 2214 sits in two categories of the first one
+CATEGORIES = [
+    ('c1', 'CS', 'Core', 6.0),
+    ('c2', 'CS', 'Electives', 3.0),
+    ('c3', 'Math', 'Computing', 3.0),
+]
+MEMBERS = [
+    ('c1', 'ITSC 1213'), ('c1', 'ITSC 2214'),
+    ('c2', 'ITSC 2214'), ('c2', 'STAT 2122'),
+    ('c3', 'STAT 2122'),
+]
+TRANSCRIPTS = {
+    'Student ID': ['s1', 's1', 's1', 's1', 's1', 's2', 's2', 's2'],
+    'Course': ['ITSC 1213', 'ITSC 2214', 'STAT 2122', 'ITSC 1213', 'PHIL 1101', 'STAT 2122', 'ITSC 2214', 'ITSC 1213'],
+    'Major': ['CS', 'CS', 'CS', 'CS', 'CS', 'Math', 'Math', 'Math'],
+    'Credits': ['3', '3', '3', '4', '3', '3', '3', '3'],
+    'Grade': ['C', 'B', 'F', 'A', 'A', '', 'A', 'W'],
+}
+
+def earned(result):
+    return {(student, category[0]): float(result['earned'][s, j])
+            for s, student in enumerate(result['students'])
+            for j, category in enumerate(CATEGORIES) if result['in_major'][s, j]}
+
+def without_scipy(monkeypatch):
+    monkeypatch.setattr(degree_audit, 'sparse', None)
+
+@pytest.mark.parametrize('dense', [False, True])
+def test_audit_credits(monkeypatch, dense):
+    if dense:
+        without_scipy(monkeypatch)
+    elif degree_audit.sparse is None:
+        pytest.skip("SciPy is not installed")
+    audit = DegreeAudit(CATEGORIES, MEMBERS)
+    result = audit.audit(TRANSCRIPTS)
+
+    # The repeat of ITSC 1213 counts once with its 4 credits; the F and the course in no category earn nothing
+    assert earned(result) == {('s1', 'c1'): 7.0, ('s1', 'c2'): 3.0, ('s2', 'c3'): 3.0}
+    assert result['satisfied'][0].tolist() == [6.0, 3.0, 0.0]
+    assert result['outstanding'].tolist() == [[0.0, 0.0, 0.0], [0.0, 0.0, 0.0]]
+
+    # Only s1's major lists ITSC 2214 twice
+    students, courses = result['double_counted']
+    assert [(result['students'][s], audit.courses[c]) for s, c in zip(students, courses)] == [('s1', 'ITSC 2214')]
+
+def test_scipy_and_numpy_agree(monkeypatch):
+    if degree_audit.sparse is None:
+        pytest.skip("SciPy is not installed")
+    rng = random.Random(3)
+    courses = [f'ITSC {1000 + i}' for i in range(60)]
+    categories = [(f'c{j}', f'm{j % 4}', f'Category {j}', float(rng.choice([3, 6, 9]))) for j in range(16)]
+    members = [(category[0], code) for category in categories for code in rng.sample(courses, 8)]
+    rows = [(f's{s}', rng.choice(courses)) for s in range(300) for _ in range(rng.randint(0, 12))]
+    transcripts = {
+        'Student ID': [student for student, _ in rows],
+        'Course': [code for _, code in rows],
+        'Major': [f'm{int(student[1:]) % 5}' for student, _ in rows],
+        'Credits': [str(rng.choice([1, 3, 4])) for _ in rows],
+    }
+
+    sparse_result = DegreeAudit(categories, members).audit(transcripts)
+    without_scipy(monkeypatch)
+    dense_result = DegreeAudit(categories, members).audit(transcripts)
+
+    for key in ('earned', 'satisfied', 'outstanding', 'in_major'):
+        assert np.array_equal(sparse_result[key], dense_result[key])
+    pairs = [sorted(zip(*result['double_counted'])) for result in (sparse_result, dense_result)]
+    assert pairs[0] == pairs[1] and pairs[0]
+
+def test_write(tmp_path):
+    audit = DegreeAudit(CATEGORIES, MEMBERS)
+    audit.write(audit.audit(TRANSCRIPTS), tmp_path)
+    assert (tmp_path / 'audit_categories.csv').read_text().splitlines()[1:] == [
+        's1,c1,Core,6,7,6,0', 's1,c2,Electives,3,3,3,0', 's2,c3,Computing,3,3,3,0']
+    assert (tmp_path / 'audit_double_counted.csv').read_text().splitlines()[1:] == ['s1,ITSC 2214,c1;c2']
@@ -0,0 +1,30 @@
+import pytest
+from degree_planner import DegreePlanner
+from eligibility import RequirementIndex
+from requirements_parser import parse_requirement
+
+CREDITS = {'MATH 1241': 3, 'MATH 1242': 3, 'ITSC 1212': 3, 'ITSC 4990': 3, 'ITSC 2214': 3}
+REQUIREMENTS = {
+    ('MATH 1242', 'prerequisite'): parse_requirement("MATH 1241 or permission of the department"),
+    ('ITSC 4990', 'prerequisite'): parse_requirement("Permission of the instructor"),
+    ('ITSC 2214', 'prerequisite'): parse_requirement("MATH 1241 or MATH 1120, and ITSC 1212"),
+}
+
+def test_plan_orders_prerequisites():
+    planner = DegreePlanner(CREDITS, REQUIREMENTS)
+    terms = planner.plan(['ITSC 2214', 'MATH 1242'])
+    term_of = {code: t for t, term in enumerate(terms) for code in term}
+    assert term_of['MATH 1241'] < term_of['MATH 1242']
+    assert term_of['ITSC 1212'] < term_of['ITSC 2214']
+
+@pytest.mark.parametrize('allow_permission', [False, True])
+def test_permission_rule_matches_eligibility(allow_permission):
+    planner = DegreePlanner(CREDITS, REQUIREMENTS, allow_permission=allow_permission)
+    eligible = RequirementIndex(CREDITS, REQUIREMENTS, allow_permission).eligible([])
+    for code in CREDITS:
+        assert planner.satisfied(planner.prerequisite_tree(code), set()) == (code in eligible)
+
+def test_permission_only_course_needs_allow_permission():
+    with pytest.raises(ValueError):
+        DegreePlanner(CREDITS, REQUIREMENTS).plan(['ITSC 4990'])
+    assert DegreePlanner(CREDITS, REQUIREMENTS, allow_permission=True).plan(['ITSC 4990']) == [['ITSC 4990']]
@@ -0,0 +1,77 @@
+import random
+import pytest
+import eligibility
+from eligibility import RequirementIndex
+from requirements_parser import is_satisfied, parse_requirement
+
+np = pytest.importorskip('numpy')
+
+# Requirement text as the catalog writes it
+TEXTS = {
+    ('ITSC 1213', 'prerequisite'): "ITSC 1212 with a grade of C or above",
+    ('ITSC 2214', 'prerequisite'): "ITSC 1213 with a grade of C or above, and MATH 1241 or MATH 1120",
+    ('ITSC 2175', 'prerequisite'): "MATH 1241 or MATH 1120, and ITSC 1212",
+    ('ITSC 2181', 'prerequisite'): "ITSC 1213 and (MATH 1165 or MATH 1241); or permission of the department",
+    ('ITSC 3146', 'prerequisite'): "ITSC 2181 and ITSC 2214",
+    ('ITSC 3155', 'prerequisite'): "ITSC 2214 and ITSC 2175",
+    ('STAT 2122', 'prerequisite'): "MATH 1120 or MATH 1241, and STAT 1220 or STAT 1222",
+    ('MATH 1242', 'prerequisite'): "MATH 1241 with a grade of C or above",
+    ('MATH 1242', 'corequisite'): "MATH 1242L",
+    ('ITIS 4990', 'prerequisite'): "Permission of the instructor",
+    ('ITSC 3688', 'pre_or_corequisite'): "ITSC 2214 or ITSC 2175",
+}
+REQUIREMENTS = {key: parse_requirement(text) for key, text in TEXTS.items()}
+CREDITS = {code: 3 for code, _ in TEXTS}
+
+def expected(index, completed):
+    # Eligibility straight from the trees
+    done = set(completed)
+    ready = {code for code in index.courses if code not in done
+             and is_satisfied(REQUIREMENTS.get((code, 'prerequisite')), done, allow_permission=index.allow_permission)}
+    taking = done | ready
+    return [code for code in index.courses if code in ready and all(
+        is_satisfied(REQUIREMENTS.get((code, t)), taking, allow_permission=index.allow_permission)
+        for t in ('corequisite', 'pre_or_corequisite'))]
+
+def students(index, n=200, seed=7):
+    rng = random.Random(seed)
+    return {f's{i}': rng.sample(index.courses, rng.randint(0, len(index.courses) // 2)) for i in range(n)}
+
+@pytest.mark.parametrize('allow_permission', [False, True])
+@pytest.mark.parametrize('use_sparse', [False, True])
+def test_batch_matches_single_student(monkeypatch, allow_permission, use_sparse):
+    if use_sparse:
+        pytest.importorskip('scipy')
+    else:
+        monkeypatch.setattr(eligibility, 'sparse', None)
+    index = RequirementIndex(CREDITS, REQUIREMENTS, allow_permission)
+    batch = students(index)
+    results = index.eligible_batch(batch)
+    for student, completed in batch.items():
+        assert index.eligible(completed) == expected(index, completed)
+        assert results[student] == index.eligible(completed)
+
+def test_anded_prerequisite_is_required():
+    index = RequirementIndex(CREDITS, REQUIREMENTS)
+    assert 'ITSC 2175' not in index.eligible(['MATH 1241'])
+    assert 'ITSC 2175' in index.eligible(['MATH 1241', 'ITSC 1212'])
+    assert 'STAT 2122' not in index.eligible(['MATH 1241'])
+    assert 'STAT 2122' in index.eligible(['MATH 1120', 'STAT 1222'])
+
+def test_allow_permission():
+    assert 'ITIS 4990' not in RequirementIndex(CREDITS, REQUIREMENTS).eligible([])
+    assert 'ITIS 4990' in RequirementIndex(CREDITS, REQUIREMENTS, allow_permission=True).eligible([])
+    assert 'ITSC 2181' in RequirementIndex(CREDITS, REQUIREMENTS, allow_permission=True).eligible([])
+
+def test_too_many_clauses_falls_back_to_the_tree(monkeypatch):
+    monkeypatch.setattr(eligibility, 'MAX_CLAUSES', 4)
+    requirements = dict(REQUIREMENTS)
+    # An OR of three ANDs multiplies out into 3 x 3 x 2 = 18 clauses
+    requirements[('ITSC 4155', 'prerequisite')] = parse_requirement(
+        "(ITSC 3146 and ITSC 3155 and ITSC 2181) or (ITSC 2214 and STAT 2122 and MATH 1242) or (ITSC 3688 and ITSC 2175)")
+    index = RequirementIndex(dict(CREDITS, **{'ITSC 4155': 3}), requirements)
+    assert index.prereq_trees
+    assert 'ITSC 4155' not in index.eligible(['ITSC 2214', 'STAT 2122'])
+    assert 'ITSC 4155' in index.eligible(['ITSC 2214', 'STAT 2122', 'MATH 1242'])
+    assert 'ITSC 4155' in index.eligible_batch({'s': ['ITSC 3688', 'ITSC 2175']})['s']
+    assert 'ITSC 4155' not in index.eligible_batch({'s': ['ITSC 3688']})['s']
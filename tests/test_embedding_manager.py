@@ -0,0 +1,110 @@
+import csv
+import json
+import pytest
+from embedding_manager import EmbeddingManager, EmbeddingStore, StandInEmbedder
+
+np = pytest.importorskip('numpy')
+
+COURSES = {
+    'ITSC_1212': ('Introduction to Computer Science I', "Programming in Python: variables, loops and functions."),
+    'ITSC_1213': ('Introduction to Computer Science II', "Object oriented programming, recursion and data structures."),
+    'ITSC_2214': ('Data Structures and Algorithms', "Lists, trees, graphs, sorting and hashing."),
+    'MATH_1241': ('Calculus I', "Limits, derivatives and integrals of functions of one variable."),
+}
+
+@pytest.fixture
+def catalog(tmp_path):
+    def write(courses):
+        with open(tmp_path / 'courses.csv', 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(['Name', 'Subject', 'Number', 'Credits', 'Description', 'Restrictions'])
+            for key, (name, description) in courses.items():
+                writer.writerow([name, *key.split('_'), '3', description, ''])
+    write(COURSES)
+    return write
+
+@pytest.fixture
+def manager(tmp_path):
+    store = EmbeddingStore(str(tmp_path / 'embeddings.db'))
+    yield EmbeddingManager(store, StandInEmbedder())
+    store.close()
+
+def sync(manager, tmp_path):
+    return manager.sync(tmp_path / 'courses.csv', tmp_path / 'delta.json')
+
+def read_delta(tmp_path):
+    with open(tmp_path / 'delta.json', encoding='utf-8') as f:
+        return json.load(f)
+
+def applied(tmp_path):
+    # What setup-embeddings.js --from-delta does once it has applied the file
+    (tmp_path / 'delta.json').unlink()
+
+def test_first_sync_embeds_everything(manager, tmp_path, catalog):
+    assert sync(manager, tmp_path) == {'courses': 4, 'embedded': 4, 'upserted': 4, 'deleted': 0}
+    delta = read_delta(tmp_path)
+    assert delta['model'] == 'stand-in-64'
+    assert [item['id'] for item in delta['upsert']] == list(COURSES)
+    assert delta['delete'] == []
+    item = delta['upsert'][0]
+    assert len(item['embedding']) == 64
+    assert item['document'] == f"{COURSES['ITSC_1212'][1]} {COURSES['ITSC_1212'][0]}"
+    assert item['metadata']['subject'] == 'ITSC' and item['metadata']['number'] == '1212'
+
+def test_unchanged_courses_are_not_embedded_again(manager, tmp_path, catalog):
+    sync(manager, tmp_path)
+    applied(tmp_path)
+    calls = manager.embedder.calls
+    assert sync(manager, tmp_path) == {'courses': 4, 'embedded': 0, 'upserted': 0, 'deleted': 0}
+    assert manager.embedder.calls == calls
+    assert read_delta(tmp_path) == {'model': 'stand-in-64', 'upsert': [], 'delete': []}
+
+def test_changes_and_removals(manager, tmp_path, catalog):
+    sync(manager, tmp_path)
+    applied(tmp_path)
+    courses = dict(COURSES)
+    courses['ITSC_2214'] = (courses['ITSC_2214'][0], "Lists, trees, graphs, heaps, sorting and hashing.")
+    del courses['MATH_1241']
+    catalog(courses)
+    assert sync(manager, tmp_path) == {'courses': 3, 'embedded': 1, 'upserted': 1, 'deleted': 1}
+    delta = read_delta(tmp_path)
+    assert [item['id'] for item in delta['upsert']] == ['ITSC_2214']
+    assert delta['delete'] == ['MATH_1241']
+
+    # Going back to the old text is a content-hash hit: no embedding, but the course moves again
+    applied(tmp_path)
+    calls = manager.embedder.calls
+    catalog(COURSES)
+    assert sync(manager, tmp_path) == {'courses': 4, 'embedded': 0, 'upserted': 2, 'deleted': 0}
+    assert manager.embedder.calls == calls
+    upserts = {item['id']: item['embedding'] for item in read_delta(tmp_path)['upsert']}
+    assert sorted(upserts) == ['ITSC_2214', 'MATH_1241']
+    expected = manager.embedder.embed([f"{COURSES['MATH_1241'][1]} {COURSES['MATH_1241'][0]}"])[0]
+    assert np.allclose(upserts['MATH_1241'], expected)
+
+def test_unapplied_delta_is_merged(manager, tmp_path, catalog):
+    sync(manager, tmp_path)
+    courses = dict(COURSES)
+    del courses['ITSC_1212']
+    catalog(courses)
+    sync(manager, tmp_path)
+    # The first delta was never applied: ITSC 1212 leaves its upserts and joins the deletes
+    delta = read_delta(tmp_path)
+    assert [item['id'] for item in delta['upsert']] == ['ITSC_1213', 'ITSC_2214', 'MATH_1241']
+    assert delta['delete'] == ['ITSC_1212']
+
+    catalog(COURSES)
+    sync(manager, tmp_path)
+    delta = read_delta(tmp_path)
+    assert sorted(item['id'] for item in delta['upsert']) == sorted(COURSES)
+    assert delta['delete'] == []
+
+def test_identical_texts_are_embedded_once(manager, tmp_path, catalog):
+    catalog({**COURSES, 'ITSC_1212L': COURSES['ITSC_1212']})
+    assert sync(manager, tmp_path) == {'courses': 5, 'embedded': 4, 'upserted': 5, 'deleted': 0}
+
+def test_unapplied_delta_of_another_model(manager, tmp_path, catalog):
+    sync(manager, tmp_path)
+    manager.embedder = StandInEmbedder(dimensions=32)
+    with pytest.raises(SystemExit, match='apply it before switching models'):
+        sync(manager, tmp_path)
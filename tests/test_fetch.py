@@ -0,0 +1,134 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+import fetch
+from fetch import (DeadLetterError, DeadLetters, FetchError, PoliteSession, RateLimiter, fetch_pages,
+                   replay_dead_letters)
+from http_cache import HttpCache
+
+class ScriptedServer:
+    # Answers each path with its scripted (status, headers, body) responses in turn, repeating the
+    # last one, and records when every request arrived
+    def __init__(self):
+        self.scripts = {}
+        self.hits = []
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                server.hits.append((self.path, time.monotonic()))
+                script = server.scripts.get(self.path) or [(200, {}, 'ok')]
+                status, headers, body = script.pop(0) if len(script) > 1 else script[0]
+                data = body.encode('utf-8')
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self.httpd.server_address[1]}'
+        threading.Thread(target=self.httpd.serve_forever, args=(0.05,), daemon=True).start()
+
+    def count(self, path):
+        return sum(1 for hit, _ in self.hits if hit == path)
+
+@pytest.fixture
+def server():
+    server = ScriptedServer()
+    yield server
+    server.httpd.shutdown()
+    server.httpd.server_close()
+
+@pytest.fixture(autouse=True)
+def fast_backoff(monkeypatch):
+    monkeypatch.setattr(fetch, 'BACKOFF_BASE', 0.01)
+
+def session(retries=2, rate=100.0):
+    return PoliteSession(RateLimiter(rate=rate), timeout=5, retries=retries)
+
+@pytest.mark.parametrize('status', [429, 503])
+def test_retry_after_is_honoured(server, status):
+    server.scripts['/page'] = [(status, {'Retry-After': '0.3'}, 'busy'), (200, {}, 'catalog page')]
+    polite = session()
+    start = time.monotonic()
+    assert polite.get(server.url + '/page').text == 'catalog page'
+    assert time.monotonic() - start >= 0.3
+    assert server.count('/page') == 2
+    # The throttle halved the host's rate before the success nudged it back up
+    assert polite.limiter.host(server.url).rate < 100.0
+
+def test_gives_up_after_max_retries(server):
+    server.scripts['/broken'] = [(500, {}, 'error')]
+    with pytest.raises(FetchError, match='after 3 attempts'):
+        session(retries=2).get(server.url + '/broken')
+    assert server.count('/broken') == 3
+
+def test_client_errors_are_not_retried(server):
+    server.scripts['/missing'] = [(404, {}, 'not found')]
+    with pytest.raises(FetchError, match='HTTP 404'):
+        session().get(server.url + '/missing')
+    assert server.count('/missing') == 1
+
+def test_failed_pages_go_to_dead_letters(server, tmp_path):
+    server.scripts['/2'] = [(503, {}, 'down')]
+    dead_letters = DeadLetters(str(tmp_path / 'dead.json'))
+    pages = list(fetch_pages([server.url + f'/{n}' for n in (1, 2, 3)], 2, session(retries=1),
+                             dead_letters=dead_letters))
+    assert pages == ['ok', None, 'ok']
+    dead_letters.save()
+    with open(tmp_path / 'dead.json', encoding='utf-8') as f:
+        saved = json.load(f)
+    assert [(item['url'], item['attempts']) for item in saved] == [(server.url + '/2', 1)]
+    assert 'HTTP 503 after 2 attempts' in saved[0]['reason']
+
+def test_replay_recovers_dead_pages(server, tmp_path):
+    path = str(tmp_path / 'dead.json')
+    server.scripts['/2'] = [(503, {}, 'down'), (503, {}, 'down'), (200, {}, 'page two')]
+    dead_letters = DeadLetters(path)
+    list(fetch_pages([server.url + '/2'], 1, session(retries=1), dead_letters=dead_letters))
+    dead_letters.save()
+
+    cache = HttpCache(str(tmp_path / 'cache'))
+    replay_dead_letters(path, cache, session(retries=1))
+    assert not (tmp_path / 'dead.json').exists()
+    # The recovered page is cached for the scrape that follows
+    assert cache.load(server.url + '/2')[1] == 'page two'
+
+def test_replay_reports_pages_that_still_fail(server, tmp_path):
+    path = str(tmp_path / 'dead.json')
+    server.scripts['/2'] = [(500, {}, 'down')]
+    dead_letters = DeadLetters(path)
+    list(fetch_pages([server.url + '/2'], 1, session(retries=0), dead_letters=dead_letters))
+    dead_letters.save()
+    with pytest.raises(DeadLetterError):
+        replay_dead_letters(path, None, session(retries=0))
+    assert DeadLetters(path).failures[server.url + '/2']['attempts'] == 2
+
+def test_shared_host_budget_limits_the_combined_rate(server):
+    # Two scrapers of one host, as two pipeline processes would be after share_hosts({host: 2})
+    host = server.url.split('//', 1)[1]
+    sessions = [PoliteSession(RateLimiter(rate=10.0, shares={host: 2}), timeout=5) for _ in range(2)]
+    assert all(polite.limiter.host(server.url).rate == 5.0 for polite in sessions)
+    assert all(polite.limiter.host(server.url).concurrency == fetch.DEFAULT_WORKERS // 2 for polite in sessions)
+
+    deadline = time.monotonic() + 1.0
+    def scrape(polite):
+        while time.monotonic() < deadline:
+            polite.get(server.url + '/page')
+    threads = [threading.Thread(target=scrape, args=(polite,)) for polite in sessions]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    # About 14: one second at 10 requests/s, each bucket's first token and the rate's rise on
+    # success. Unshared, the two make about 30.
+    assert len(server.hits) <= 18
@@ -0,0 +1,81 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http.server import ThreadingHTTPServer
+import pytest
+import requests
+from catalog_stub_server import make_handler
+from fetch import FetchError, fetch_page
+from http_cache import CacheMiss, HttpCache
+
+@pytest.fixture
+def stub(tmp_path):
+    # catalog_stub_server answering If-None-Match with 304, recording every status it sends
+    pages = tmp_path / 'pages'
+    pages.mkdir()
+    (pages / 'page_1.html').write_text('<html>page one</html>', encoding='utf-8')
+    statuses = []
+
+    class RecordingHandler(make_handler(str(pages), 0)):
+        def send_response(self, code, message=None):
+            statuses.append(code)
+            super().send_response(code, message)
+
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), RecordingHandler)
+    threading.Thread(target=httpd.serve_forever, args=(0.05,), daemon=True).start()
+    yield f'http://127.0.0.1:{httpd.server_address[1]}', pages, statuses
+    httpd.shutdown()
+    httpd.server_close()
+
+def page_url(base_url, page):
+    return f'{base_url}/content.php?filter%5Bcpage%5D={page}'
+
+def test_revalidation_reuses_the_cached_body(stub, tmp_path):
+    base_url, pages, statuses = stub
+    cache = HttpCache(str(tmp_path / 'cache'))
+    session = requests.Session()
+    assert cache.get(session, page_url(base_url, 1)) == '<html>page one</html>'
+    assert cache.get(session, page_url(base_url, 1)) == '<html>page one</html>'
+    assert statuses == [200, 304]
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    # A changed page has a new ETag and replaces the cached copy
+    (pages / 'page_1.html').write_text('<html>page one, revised</html>', encoding='utf-8')
+    assert cache.get(session, page_url(base_url, 1)) == '<html>page one, revised</html>'
+    assert statuses[-1] == 200
+    assert cache.load(page_url(base_url, 1))[1] == '<html>page one, revised</html>'
+
+def test_fragment_does_not_split_the_cache(stub, tmp_path):
+    base_url, _, statuses = stub
+    cache = HttpCache(str(tmp_path / 'cache'))
+    cache.get(requests.Session(), page_url(base_url, 1) + '#acalog_template_course_filter')
+    assert cache.load(page_url(base_url, 1))[1] == '<html>page one</html>'
+
+def test_error_pages_are_not_cached(stub, tmp_path):
+    base_url, _, statuses = stub
+    cache = HttpCache(str(tmp_path / 'cache'))
+    cache.get(requests.Session(), page_url(base_url, 2))
+    assert statuses == [404]
+    assert cache.load(page_url(base_url, 2)) == (None, None)
+
+def test_offline(stub, tmp_path):
+    base_url, _, statuses = stub
+    cache_dir = str(tmp_path / 'cache')
+    HttpCache(cache_dir).get(requests.Session(), page_url(base_url, 1))
+    offline = HttpCache(cache_dir, offline=True)
+    assert fetch_page(None, page_url(base_url, 1), offline) == '<html>page one</html>'
+    with pytest.raises(CacheMiss):
+        offline.get(None, page_url(base_url, 2))
+    with pytest.raises(FetchError, match='no cached copy'):
+        fetch_page(None, page_url(base_url, 2), offline)
+    assert statuses == [200]
+
+def test_concurrent_stores_of_one_url(tmp_path):
+    cache = HttpCache(str(tmp_path / 'cache'))
+    texts = [f'<html>version {n % 4}</html>' for n in range(64)]
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        list(executor.map(lambda text: cache.store('https://catalog.example.edu/page', text), texts))
+    _, text = cache.load('https://catalog.example.edu/page')
+    assert text in texts
+    leftovers = [name for root, _, files in os.walk(tmp_path) for name in files if name.endswith('.tmp')]
+    assert not leftovers
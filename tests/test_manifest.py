@@ -0,0 +1,101 @@
+import gc
+import json
+import pytest
+from manifest import Manifest, merge_changes
+
+def run(path, blocks, incremental=True, version=1, changes_path=None):
+    # One scrape over {key: source}; returns the manifest, the rows of every block and the changes
+    manifest = Manifest(str(path), incremental, version)
+    rows = {}
+    for key, source in blocks.items():
+        block_hash = manifest.hash_block(source)
+        stored = manifest.lookup(key, block_hash)
+        rows[key] = stored if stored is not None else [[key, source.upper()]]
+        manifest.record(key, block_hash, key, rows[key])
+    changes = manifest.save(str(changes_path) if changes_path else None)
+    return manifest, rows, changes
+
+def rows_files(tmp_path):
+    return sorted(path.name for path in tmp_path.glob('manifest.rows.*.jsonl'))
+
+def test_unchanged_blocks_reuse_their_rows(tmp_path):
+    path = tmp_path / 'manifest.json'
+    run(path, {'ITSC 1212': 'intro', 'MATH 1241': 'calculus'})
+    manifest, rows, changes = run(path, {'ITSC 1212': 'intro', 'MATH 1241': 'calculus'})
+    assert manifest.reused == 2
+    assert rows == {'ITSC 1212': [['ITSC 1212', 'INTRO']], 'MATH 1241': [['MATH 1241', 'CALCULUS']]}
+    assert changes == {'added': [], 'changed': [], 'removed': []}
+
+def test_changes_are_detected(tmp_path):
+    path = tmp_path / 'manifest.json'
+    run(path, {'ITSC 1212': 'intro', 'MATH 1241': 'calculus', 'STAT 1220': 'statistics'})
+    manifest, rows, changes = run(path, {'ITSC 1212': 'intro, revised', 'MATH 1241': 'calculus',
+                                         'ITSC 2214': 'data structures'})
+    assert manifest.reused == 1
+    assert rows['ITSC 1212'] == [['ITSC 1212', 'INTRO, REVISED']]
+    assert changes == {'added': ['ITSC 2214'], 'changed': ['ITSC 1212'], 'removed': ['STAT 1220']}
+
+def test_moved_block_reuses_rows_by_hash(tmp_path):
+    path = tmp_path / 'manifest.json'
+    run(path, {'ITSC 1212': 'intro'})
+    manifest, rows, _ = run(path, {'ITSC 1212#2': 'intro'})
+    assert manifest.reused == 1
+    assert rows['ITSC 1212#2'] == [['ITSC 1212', 'INTRO']]
+
+def test_full_runs_reextract(tmp_path):
+    path = tmp_path / 'manifest.json'
+    run(path, {'ITSC 1212': 'intro'})
+    manifest, _, changes = run(path, {'ITSC 1212': 'intro'}, incremental=False)
+    assert manifest.reused == 0
+    assert changes == {'added': [], 'changed': [], 'removed': []}
+
+def test_only_the_current_rows_file_is_kept(tmp_path):
+    path = tmp_path / 'manifest.json'
+    run(path, {'ITSC 1212': 'intro'})
+    run(path, {'ITSC 1212': 'intro'})
+    manifest, _, _ = run(path, {'ITSC 1212': 'intro'}, version=2)
+    # The version bump discards the old rows and removes their file
+    assert manifest.reused == 0
+    assert rows_files(tmp_path) == [json.loads(path.read_text())['rows_file']]
+
+def test_unsaved_run_leaves_no_rows_file(tmp_path):
+    path = tmp_path / 'manifest.json'
+    run(path, {'ITSC 1212': 'intro'})
+    before = rows_files(tmp_path)
+    manifest = Manifest(str(path), incremental=True)
+    manifest.record('ITSC 1212', manifest.hash_block('changed'), 'ITSC 1212', [['ITSC 1212', 'CHANGED']])
+    manifest.rows_file.close()
+    del manifest
+    gc.collect()
+    assert rows_files(tmp_path) == before
+
+def test_changes_accumulate_until_consumed(tmp_path):
+    path = tmp_path / 'manifest.json'
+    changes_path = tmp_path / 'changes.json'
+    run(path, {'ITSC 1212': 'intro', 'MATH 1241': 'calculus', 'STAT 1220': 'statistics'})
+    run(path, {'ITSC 1212': 'intro, revised', 'MATH 1241': 'calculus', 'STAT 1220': 'statistics'},
+        changes_path=changes_path)
+    # A second scrape before any consumer has read the first delta
+    _, _, changes = run(path, {'ITSC 1212': 'intro, revised', 'MATH 1241': 'calculus, revised',
+                               'ITSC 2214': 'data structures'}, changes_path=changes_path)
+    assert changes == {'added': ['ITSC 2214'], 'changed': ['MATH 1241'], 'removed': ['STAT 1220']}
+    assert json.loads(changes_path.read_text()) == \
+        {'added': ['ITSC 2214'], 'changed': ['ITSC 1212', 'MATH 1241'], 'removed': ['STAT 1220']}
+
+    # Once the consumer deletes the file, the next delta starts fresh
+    changes_path.unlink()
+    run(path, {'ITSC 1212': 'intro', 'MATH 1241': 'calculus, revised', 'ITSC 2214': 'data structures'},
+        changes_path=changes_path)
+    assert json.loads(changes_path.read_text()) == {'added': [], 'changed': ['ITSC 1212'], 'removed': []}
+
+@pytest.mark.parametrize('pending, changes, merged', [
+    ({'added': ['A'], 'changed': [], 'removed': []}, {'added': [], 'changed': ['A'], 'removed': []}, 'added'),
+    ({'added': ['A'], 'changed': [], 'removed': []}, {'added': [], 'changed': [], 'removed': ['A']}, None),
+    ({'added': [], 'changed': ['A'], 'removed': []}, {'added': [], 'changed': [], 'removed': ['A']}, 'removed'),
+    ({'added': [], 'changed': [], 'removed': ['A']}, {'added': ['A'], 'changed': [], 'removed': []}, 'changed'),
+])
+def test_merge_changes(pending, changes, merged):
+    expected = {'added': [], 'changed': [], 'removed': []}
+    if merged:
+        expected[merged] = ['A']
+    assert merge_changes(pending, changes) == expected
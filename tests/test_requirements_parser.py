@@ -0,0 +1,33 @@
+from requirements_parser import format_requirement, parse_requirement
+
+def parsed(text):
+    return format_requirement(parse_requirement(text))
+
+def test_trailing_grade():
+    assert parsed("ITSC 1213 with a grade of C or above, and (MATH 1241 or MATH 1120)") == \
+        "ITSC 1213:C & (MATH 1241 | MATH 1120)"
+
+def test_compact_form_round_trips():
+    assert parsed("ITSC 1213:C & (MATH 1241 | MATH 1120)") == "ITSC 1213:C & (MATH 1241 | MATH 1120)"
+
+def test_stray_closing_paren_keeps_the_rest():
+    assert parsed("MATH 1241) and MATH 1242") == "MATH 1241 & MATH 1242"
+    assert parsed("(MATH 1241 or MATH 1242)) and STAT 2122") == "(MATH 1241 | MATH 1242) & STAT 2122"
+
+def test_leading_grade():
+    assert parsed("C or better in ITSC 1213") == "ITSC 1213:C"
+    assert parsed("a grade of C or better in ITSC 1213 and MATH 1241") == "ITSC 1213:C & MATH 1241"
+
+def test_leading_grade_applies_to_group():
+    assert parsed("minimum grade of B- in (MATH 1241 or MATH 1120)") == "MATH 1241:B- | MATH 1120:B-"
+
+def test_comma_conjunction_separates_clauses():
+    assert parsed("MATH 1241 or MATH 1120, and ITSC 1212") == "(MATH 1241 | MATH 1120) & ITSC 1212"
+    assert parsed("ITSC 1212 with a grade of C or above, and MATH 1241 or MATH 1120") == \
+        "ITSC 1212:C & (MATH 1241 | MATH 1120)"
+    assert parsed("MATH 1120 or MATH 1241, and STAT 1220 or STAT 1222") == \
+        "(MATH 1120 | MATH 1241) & (STAT 1220 | STAT 1222)"
+
+def test_commas_in_a_plain_list():
+    assert parsed("ITSC 1212, ITSC 1213, or ITSC 1214") == "ITSC 1212 | ITSC 1213 | ITSC 1214"
+    assert parsed("ITSC 1212, ITSC 1213 or ITSC 1214") == "ITSC 1212 | ITSC 1213 | ITSC 1214"
@@ -0,0 +1,65 @@
+import json
+import pytest
+import similar_courses
+from embedding_manager import EmbeddingStore
+from similar_courses import (compute_similar_courses, exact_neighbours, ivf_neighbours, load_store_vectors,
+                             unit_rows, write_similar_courses)
+
+np = pytest.importorskip('numpy')
+
+@pytest.fixture
+def vectors():
+    return unit_rows(np.random.default_rng(5).normal(size=(300, 16)))
+
+def brute_force(vectors, k):
+    scores = vectors @ vectors.T
+    np.fill_diagonal(scores, -np.inf)
+    order = np.argsort(-scores, axis=1, kind='stable')[:, :k]
+    return order, np.take_along_axis(scores, order, axis=1)
+
+def test_exact_matches_brute_force(monkeypatch, vectors):
+    # Small blocks, so rows are split over several blocks and threads
+    monkeypatch.setattr(similar_courses, 'BLOCK_ELEMENTS', 300 * 7)
+    neighbours, scores = exact_neighbours(vectors, 5, workers=4)
+    expected, expected_scores = brute_force(vectors, 5)
+    assert np.array_equal(neighbours, expected)
+    assert np.allclose(scores, expected_scores)
+
+def test_ivf_probing_every_cluster_is_exact(vectors):
+    neighbours, scores = ivf_neighbours(vectors, 5, clusters=6, nprobe=6)
+    expected, expected_scores = brute_force(vectors, 5)
+    assert np.array_equal(neighbours, expected)
+    assert np.allclose(scores, expected_scores)
+
+def test_ivf_finds_neighbours_within_clusters():
+    # Four tight groups of courses: every neighbour should come from the course's own group
+    rng = np.random.default_rng(2)
+    centres = np.eye(16)[:4] * 10
+    vectors = np.concatenate([centre + rng.normal(size=(50, 16)) for centre in centres])
+    neighbours, _ = compute_similar_courses(list(range(200)), vectors, k=5, method='ivf')
+    assert (neighbours >= 0).all()
+    assert (neighbours // 50 == np.arange(200)[:, None] // 50).all()
+    assert not (neighbours == np.arange(200)[:, None]).any()
+
+def test_short_rows_are_padded(tmp_path):
+    ids = ['ITSC_1212', 'ITSC_1213', 'MATH_1241']
+    vectors = np.array([[1, 0], [1, 1], [0, 1]], dtype=np.float32)
+    neighbours, scores = compute_similar_courses(ids, vectors, k=3)
+    assert neighbours.tolist() == [[1, 2, -1], [0, 2, -1], [1, 0, -1]]
+
+    path = tmp_path / 'similar_courses.json'
+    write_similar_courses(path, ids, neighbours, scores, 3)
+    saved = json.loads(path.read_text())
+    assert saved['courses'] == ['ITSC 1212', 'ITSC 1213', 'MATH 1241']
+    assert saved['k'] == 3
+    assert saved['neighbours'] == [1, 2, -1, 0, 2, -1, 1, 0, -1]
+    assert saved['scores'] == [0.7071, 0.0, 0.0, 0.7071, 0.7071, 0.0, 0.7071, 0.0, 0.0]
+
+def test_store_vectors_are_the_synced_ones(tmp_path):
+    store = EmbeddingStore(str(tmp_path / 'embeddings.db'))
+    store.put(['a', 'b', 'c'], np.eye(3, dtype=np.float32))
+    store.record_sync({'MATH_1241': 'b', 'ITSC_1212': 'a'}, [])
+    store.close()
+    ids, vectors = load_store_vectors(str(tmp_path / 'embeddings.db'))
+    assert ids == ['ITSC_1212', 'MATH_1241']
+    assert vectors.tolist() == [[1, 0, 0], [0, 1, 0]]